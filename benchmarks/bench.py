@@ -0,0 +1,343 @@
+"""Бенчмарки парсера, fuzzy-проверки, БД и полного цикла job().
+
+Запуск:
+    python benchmarks/bench.py                  # сравнить с baseline.json (без него - код 2)
+    python benchmarks/bench.py --save-baseline  # записать новый baseline
+
+Страницы выдачи берутся из benchmarks/corpus/*.html (сохранённые страницы hh.ru,
+в порядке имён файлов). Если каталог пуст, корпус генерируется в разметке hh.ru.
+hh.ru и Telegram подменяются локальными HTTP серверами, БД - SQLite в памяти.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+import logging
+
+import builder
+import parser
+import main as hh_main
+import ratelimit
+
+# Чекпоинты (upsert) и поиск повторов (NOW() - INTERVAL) написаны под MySQL,
+# SQLite-фикстура их не понимает
+logging.getLogger('hh.checkpoint').setLevel(logging.CRITICAL)
+logging.getLogger('hh.fingerprint').setLevel(logging.CRITICAL)
+logging.getLogger('hh.stats').setLevel(logging.CRITICAL)
+
+CORPUS_DIR = os.path.join(BENCH_DIR, 'corpus')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+
+SEARCH_TEXT = "Middle Python Backend Developer"
+
+TITLES = [
+    "Middle Python Backend Developer", "Python разработчик", "Senior Python Engineer",
+    "Backend разработчик (Go)", "Java Developer", "Бухгалтер", "DevOps инженер",
+    "Frontend Developer (React)", "Data Engineer (Python, Spark)", "QA Automation (Python)",
+]
+COMPANIES = ["Яндекс", "Сбер", "Т-Банк", "VK", "Ozon", "Авито", "Kaspersky", "Positive Technologies"]
+SALARIES = ["от 150 000 ₽ за месяц", "200 000 – 300 000 ₽ за месяц", "до 250 000 руб.", "", "от 3 000 $"]
+
+
+def generate_page(page, count, rnd):
+    """Страница выдачи в разметке hh.ru"""
+    blocks = []
+    for i in range(count):
+        vacancy_id = 10_000_000 + page * 100 + i
+        salary = rnd.choice(SALARIES)
+        salary_html = (
+            f'<span class="magritte-text_typography-label-1-regular___pi3R-_4-2-3">{salary}</span>'
+            if salary else ''
+        )
+        blocks.append(f"""
+        <div data-qa="vacancy-serp__vacancy">
+          <h2><a data-qa="serp-item__title" href="/vacancy/{vacancy_id}?query=python">{rnd.choice(TITLES)}</a></h2>
+          <div><span class="magritte-text_typography-label-1-regular___pi3R-_4-2-3">Можно удалённо</span>{salary_html}</div>
+          <a data-qa="vacancy-serp__vacancy-employer">{rnd.choice(COMPANIES)}</a>
+          <div data-qa="vacancy-serp__vacancy-address">Москва</div>
+          <div data-qa="vacancy-serp__vacancy-work-experience-between1And3">Опыт 1–3 года</div>
+        </div>""")
+    return f"<html><head><title>Вакансии</title></head><body>{''.join(blocks)}</body></html>"
+
+
+def load_corpus(pages=6, per_page=50):
+    files = sorted(glob.glob(os.path.join(CORPUS_DIR, '*.html')))
+    if files:
+        corpus = []
+        for path in files:
+            with open(path, encoding='utf-8') as f:
+                corpus.append(f.read())
+        return corpus
+
+    rnd = random.Random(42)
+    corpus = [generate_page(p, per_page, rnd) for p in range(pages - 1)]
+    corpus.append(generate_page(pages - 1, per_page // 5, rnd))
+    return corpus
+
+
+class FakeServers:
+    """Локальные заглушки hh.ru и Telegram Bot API"""
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self.telegram_calls = 0
+        self._servers = []
+
+    def _hh_handler(self):
+        servers = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                page = int(query.get('page', ['0'])[0])
+                html = servers.corpus[page] if page < len(servers.corpus) else "<html></html>"
+                body = html.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _telegram_handler(self):
+        servers = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                servers.telegram_calls += 1
+                body = b'{"ok": true, "result": {}}'
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _start(self, handler):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def __enter__(self):
+        self._orig = (builder.HH_BASE_URL, parser.TELEGRAM_API_URL)
+        builder.HH_BASE_URL = self._start(self._hh_handler())
+        parser.TELEGRAM_API_URL = self._start(self._telegram_handler())
+        return self
+
+    def __exit__(self, *exc):
+        builder.HH_BASE_URL, parser.TELEGRAM_API_URL = self._orig
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+
+class SQLiteConnection:
+    """Обёртка над sqlite3 с плейсхолдерами %s как у mysql.connector"""
+
+    class Cursor:
+        def __init__(self, cursor):
+            self._cursor = cursor
+
+        def execute(self, query, params=()):
+            return self._cursor.execute(query.replace('%s', '?'), params)
+
+        def __getattr__(self, name):
+            return getattr(self._cursor, name)
+
+    def __init__(self):
+        self._conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE sent_vacancies (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url VARCHAR(500) UNIQUE NOT NULL,
+                title VARCHAR(500),
+                company VARCHAR(255),
+                sent_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                status VARCHAR(16) NOT NULL DEFAULT 'sent',
+                claimed_by VARCHAR(64),
+                search_name VARCHAR(255)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE vacancy_fingerprints (
+                url VARCHAR(500) PRIMARY KEY,
+                fingerprint INTEGER NOT NULL,
+                b0 INTEGER, b1 INTEGER, b2 INTEGER, b3 INTEGER,
+                sent_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def cursor(self):
+        return self.Cursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def _measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def bench_parse(corpus, repeat):
+    def run():
+        for html in corpus:
+            parser.parse_vacancies_html(html)
+    seconds = _measure(run, repeat)
+    return {'pages_per_sec': len(corpus) / seconds}
+
+
+def bench_similarity(vacancies, repeat):
+    def run():
+        for v in vacancies:
+            parser.similarity_check(SEARCH_TEXT, v, 70)
+    seconds = _measure(run, repeat)
+    return {'vacancies_per_sec': len(vacancies) / seconds}
+
+
+def bench_db(vacancies, repeat):
+    def run():
+        conn = SQLiteConnection()
+        for v in vacancies:
+            if not parser.is_vacancy_sent(conn, v['href']):
+                parser.mark_vacancy_sent(conn, v['href'], v['title'], v['company'])
+        for v in vacancies:
+            parser.is_vacancy_sent(conn, v['href'])
+        conn.close()
+    seconds = _measure(run, repeat)
+    return {'db_ops_per_sec': 3 * len(vacancies) / seconds}
+
+
+def bench_cycle(corpus, vacancies, repeat):
+    config = builder.DEFAULT_CONFIG.copy()
+    config.update({
+        "bot_token": "bench",
+        "chat_id": "1",
+        "search_text": SEARCH_TEXT,
+        "area_ids": ["area=113"],
+        "page_delay": 0,
+    })
+
+    timings = []
+    with FakeServers(corpus):
+        for _ in range(repeat):
+            conn = SQLiteConnection()
+            start = time.perf_counter()
+            hh_main.job(conn, config)
+            timings.append(time.perf_counter() - start)
+            conn.close()
+
+    seconds = statistics.median(timings)
+    return {
+        'cycle_latency_sec': seconds,
+        'cycle_vacancies_per_sec': len(vacancies) / seconds,
+    }
+
+
+def run_all(repeat):
+    # Локальный сервер не нужно беречь от перегрузки
+    ratelimit.configure({"hh_rate": 1_000_000, "hh_burst": 1_000_000})
+    corpus = load_corpus()
+    vacancies = [v for html in corpus for v in parser.parse_vacancies_html(html)]
+
+    results = {}
+    results.update(bench_parse(corpus, repeat))
+    results.update(bench_similarity(vacancies, repeat))
+    results.update(bench_db(vacancies, repeat))
+    results.update(bench_cycle(corpus, vacancies, repeat))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно baseline (латентность - чем меньше, тем лучше)"""
+    regressions = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if name.endswith('_sec') and not name.endswith('per_sec'):
+            change = value / base - 1
+        else:
+            change = base / value - 1
+        if change > tolerance:
+            regressions.append((name, base, value, change))
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='допустимое ухудшение относительно baseline (0.2 = 20%%)')
+    arg_parser.add_argument('--save-baseline', action='store_true')
+    arg_parser.add_argument('--json', help='сохранить результаты в файл')
+    args = arg_parser.parse_args()
+
+    results = run_all(args.repeat)
+    for name, value in results.items():
+        print(f"{name:28} {value:12.3f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline сохранён в {BASELINE_FILE}")
+        return 0
+
+    return check_baseline(results, BASELINE_FILE, args.tolerance)
+
+
+def check_baseline(results, path, tolerance):
+    """Код выхода: 0 - регрессий нет, 1 - есть регрессии, 2 - нет baseline.
+
+    Без baseline проверка ничего бы не сравнила, поэтому это ошибка, а не успех:
+    baseline снимается на той же машине, где потом идёт сравнение.
+    """
+    if not os.path.exists(path):
+        sys.stderr.write(f"Baseline {path} не найден: сначала запустите bench.py --save-baseline "
+                         f"на этой машине\n")
+        return 2
+
+    with open(path, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, tolerance)
+    for name, base, value, change in regressions:
+        print(f"РЕГРЕССИЯ {name}: {base:.3f} -> {value:.3f} ({change:+.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
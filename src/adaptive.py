@@ -0,0 +1,74 @@
+import metrics
+from log_config import get_logger
+from parser import get_time
+
+logger = get_logger('adaptive')
+
+
+def in_quiet_hours(hour, quiet_hours):
+    """Попадает ли час (по Москве) в тихие часы [start, end), в том числе через полночь"""
+    if not quiet_hours:
+        return False
+    start, end = quiet_hours
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def count_recent_matches(db_conn, search_name, window_hours):
+    """Сколько вакансий поиска отправлено за последние window_hours часов
+    (незавершённые pending-захваты не считаются)"""
+    if db_conn is None:
+        return None
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='count_recent_matches')
+        cursor.execute(
+            "SELECT COUNT(*) FROM sent_vacancies "
+            "WHERE search_name = %s AND status = 'sent' AND sent_date > NOW() - INTERVAL %s HOUR",
+            (search_name, window_hours)
+        )
+        return cursor.fetchone()[0]
+    except Exception as e:
+        logger.error("Ошибка подсчёта новых вакансий: %s", e)
+        return None
+    finally:
+        cursor.close()
+
+
+class AdaptiveInterval:
+    """Интервал опроса по наблюдаемой частоте новых совпадений.
+
+    Цель - примерно одна новая вакансия за цикл: интервал = 60 / (совпадений в час),
+    в пределах [min_interval, max_interval] минут. Ночью (quiet_hours по Москве)
+    интервал умножается на quiet_factor. Без БД используется обычный interval.
+    """
+
+    def __init__(self, now=get_time):
+        self.now = now
+
+    def minutes(self, db_conn, search):
+        base = search["interval"]
+        min_interval = search.get("min_interval") or base
+        max_interval = search.get("max_interval") or base
+        window = search.get("adaptive_window", 24)
+
+        matches = count_recent_matches(db_conn, search["name"], window)
+        if matches is None:
+            interval = base
+        elif matches == 0:
+            interval = max_interval
+        else:
+            interval = 60 / (matches / window)
+
+        if in_quiet_hours(self.now().hour, search.get("quiet_hours")):
+            interval *= search.get("quiet_factor", 3)
+
+        interval = min(max(interval, min_interval), max_interval)
+        metrics.set_gauge('poll_interval_minutes', interval, search=search["name"])
+        return interval
+
+    def __call__(self, db_conn, search):
+        """Интервал в секундах - формат, который ждёт Scheduler"""
+        return self.minutes(db_conn, search) * 60
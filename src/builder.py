@@ -1,8 +1,18 @@
 
+import argparse
+import csv
+import functools
 import json
 import os
+import re
+import sys
+from urllib.parse import urlencode
+from log_config import get_logger, setup_logging
+
+logger = get_logger('builder')
 
 CONFIG_FILE = 'config.json'
+HH_BASE_URL = 'https://hh.ru'    # Подменяется в бенчмарках на локальный сервер
 
 
 DEFAULT_CONFIG = {              # Заполняется автоматически при запуске файла
@@ -15,7 +25,59 @@ DEFAULT_CONFIG = {              # Заполняется автоматичес
     "area_ids": [],             # Список регионов для поиска 
     "experience": "",           # Опыт работы
     "daily_stats": True,        # Ежедневная статистика (True/False)
-    "stats_time": "00:00"       # Время отправки статистики по МСК
+    "stats_time": "00:00",      # Время отправки статистики по МСК
+    "stats_windows": ["daily"], # Отчёты: hourly (каждый час), daily, weekly
+    "stats_weekday": 0,         # День недельного отчёта (0 - понедельник)
+    "metrics_port": 0,          # Порт HTTP эндпоинта /metrics (0 = выключен)
+    "metrics_file": "",         # Файл для JSON-дампа метрик после каждого цикла
+    "log_level": "INFO",        # Общий уровень логов (DEBUG включает строки по каждой вакансии)
+    "log_levels": {},           # Уровни по модулям, например {"parser": "DEBUG"}
+    "log_format": "json",       # Формат логов: json или text
+    "page_delay": 0,            # Доп. пауза между страницами в секундах (темп задаёт hh_rate)
+    "page_attempts": 3,         # Попыток загрузить страницу при ошибке сети/сервера
+    "page_retry_delay": 2,      # Пауза перед повтором в секундах, удваивается
+    "max_failed_pages": 3,      # Столько страниц подряд не загрузилось - цикл завершается
+    "interval_jitter": 0.1,     # Случайное отклонение интервала (доля), чтобы поиски не стартовали разом
+    "searches": [],             # Дополнительные поиски: список переопределений полей выше
+    "cluster": False,           # Несколько воркеров делят поиски через общую БД
+    "worker_id": "",            # Имя воркера (пусто = hostname-pid)
+    "lease_ttl": 0,             # Срок аренды поиска в секундах (0 = два интервала + минута)
+    "adaptive_interval": False, # Подстраивать интервал под частоту новых вакансий
+    "min_interval": 5,          # Границы адаптивного интервала в минутах
+    "max_interval": 60,
+    "adaptive_window": 24,      # Окно (часы) для оценки частоты новых вакансий
+    "quiet_hours": [1, 7],      # Тихие часы по МСК [с, до), интервал умножается на quiet_factor
+    "quiet_factor": 3,
+    "hh_rate": 1.0,             # Запросов к hh.ru в секунду на весь процесс
+    "hh_burst": 3,              # Допустимый всплеск запросов
+    "hh_cooldown": 60,          # Пауза после 429/403/капчи в секундах, удваивается подряд
+    "hh_max_cooldown": 3600,
+    "min_salary": 0,            # Минимальная зарплата в base_currency (0 = без фильтра)
+    "include_no_salary": True,  # Пропускать вакансии без указанной зарплаты при min_salary
+    "base_currency": "RUB",     # Валюта для сравнения зарплат
+    "currency_rates": {},       # Свои курсы к рублю, например {"USD": 90}
+    "update_currency_rates": False, # Обновлять курсы с сайта ЦБ РФ раз в сутки
+    "repost_dedup": True,       # Не присылать повторные публикации (новый id, тот же текст)
+    "repost_distance": 3,       # Допустимое отличие отпечатков в битах (меньше 4)
+    "repost_window_days": 30,   # За сколько дней сравнивать с отправленными
+    "liveness_check": False,    # Проверять перед отправкой, не закрыта ли вакансия (запрос к hh.ru)
+    "liveness_ttl": 3600,       # Сколько секунд считать проверенную вакансию открытой
+    "liveness_concurrency": 4,  # Одновременных проверок (общий лимит hh_rate всё равно действует)
+    "liveness_keep_days": 30,   # Сколько дней помнить закрытые вакансии в БД
+    "retention_days": 0,        # Через сколько дней переносить историю отправок в архив (0 = хранить всё)
+    "archive_dir": "archive",   # Каталог сжатых архивов (table-ГГГГММ.jsonl.gz)
+    "retention_interval": 6,    # Как часто запускать архивацию, в часах
+    "archive_batch": 1000,      # Строк за одну пачку архивации
+    "memory_diagnostics": False, # Отчёт о росте памяти (tracemalloc) между циклами
+    "memory_report_interval": 600, # Не чаще раза в N секунд
+    "memory_top": 10,           # Сколько строк кода с наибольшим приростом показывать
+    "commands": False,          # Команды бота (/stats, /pause, /threshold) через getUpdates
+    "command_chats": [],        # Чаты, кроме chat_id, которым разрешены команды
+    "commands_poll_timeout": 10, # Long polling getUpdates, сек (столько же может занять остановка)
+    "config_poll_interval": 5,  # Как часто проверять изменения config.json, в секундах
+    "message_format": "html",   # Формат сообщений: html, markdown или compact (сводка по странице)
+    "subscriptions": []         # Доп. чаты: {"chat_id", "min_salary", "keywords", "experience",
+                                #   "excluded_companies", "searches", "message_format"}
 }
 
 REGIONS = {         # Для составления URL (не менять)
@@ -31,131 +93,228 @@ REGIONS = {         # Для составления URL (не менять)
 }
 
 
+def with_defaults(config):
+    for key in DEFAULT_CONFIG:
+        if key not in config:
+            config[key] = DEFAULT_CONFIG[key]
+    return config
+
+def read_config(path=None):
+    """Читает конфиг с диска; ошибки чтения и JSON пробрасываются вызывающему"""
+    with open(path or CONFIG_FILE, 'r', encoding='utf-8') as f:
+        return with_defaults(json.load(f))
+
 def load_config():
     if os.path.exists(CONFIG_FILE):
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                for key in DEFAULT_CONFIG:
-                    if key not in config:
-                        config[key] = DEFAULT_CONFIG[key]
-                return config
+            return read_config()
         except Exception as e:
-            print(f"Ошибка загрузки конфига: {e}")
+            logger.error("Ошибка загрузки конфига: %s", e)
             return DEFAULT_CONFIG.copy()
     else:
         return DEFAULT_CONFIG.copy()
 
-def save_config(config):
+def validate_config(config):
+    """Список ошибок конфига (пустой, если конфиг можно применять)"""
+    errors = []
+    if not config.get("bot_token") or not config.get("chat_id"):
+        errors.append("не заданы bot_token и chat_id")
+    searches = config.get("searches") or []
+    if not isinstance(searches, list) or not all(isinstance(s, dict) for s in searches):
+        return errors + ["searches должен быть списком объектов"]
+
+    names = set()
+    for search in _merge_searches(config):
+        name = search["name"]
+        if name in names:
+            errors.append(f"{name}: повторяющееся имя поиска")
+        names.add(name)
+        if not isinstance(search.get("search_text"), str) or not search["search_text"].strip():
+            errors.append(f"{name}: пустой search_text")
+        interval = search.get("interval")
+        if not isinstance(interval, (int, float)) or isinstance(interval, bool) or interval <= 0:
+            errors.append(f"{name}: interval должен быть положительным числом")
+        similarity = search.get("min_similarity")
+        if not isinstance(similarity, (int, float)) or not 0 <= similarity <= 100:
+            errors.append(f"{name}: min_similarity должен быть от 0 до 100")
+        if search.get("experience", "") not in EXPERIENCE_CODES + ("",):
+            errors.append(f"{name}: experience должен быть одним из {', '.join(EXPERIENCE_CODES)}")
+        try:
+            if not isinstance(search.get("area_ids"), list):
+                raise ValueError
+            area_numbers(search["area_ids"])
+        except ValueError:
+            errors.append(f"{name}: area_ids должен быть списком вида [\"area=113\"]")
+
+    windows = config.get("stats_windows", ["daily"])
+    if not isinstance(windows, list) or not windows or not set(windows) <= {"hourly", "daily", "weekly"}:
+        errors.append("stats_windows должен быть списком из hourly, daily, weekly")
+    return errors
+
+def save_config(config, path=None):
     """Сохраняет конфигурацию в JSON файл"""
+    path = path or CONFIG_FILE
     try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+        with open(path, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
-        print("Конфигурация сохранена в config.json")
+        logger.info("Конфигурация сохранена в %s", path)
     except Exception as e:
-        print(f"Ошибка сохранения конфига: {e}")
+        logger.error("Ошибка сохранения конфига: %s", e)
+
+_EXCLUDED_SEPARATOR_RE = re.compile(r'[\s,]+|(?<=\w)\+(?=\w)')
+
+# Постоянные параметры выдачи: 50 вакансий на странице, сортировка по релевантности
+SEARCH_PARAMS = (
+    ("L_save_area", "true"),
+    ("items_on_page", "50"),
+    ("order_by", "relevance"),
+    ("search_period", "0"),
+)
+
+def excluded_words(excluded_text):
+    """Слова исключения: список, "java php" или старый формат "java+php" ("C++" не режется)"""
+    if isinstance(excluded_text, (list, tuple)):
+        excluded_text = " ".join(excluded_text)
+    return tuple(word for word in _EXCLUDED_SEPARATOR_RE.split(excluded_text or "") if word)
+
+def area_numbers(area_ids):
+    """Id регионов числами без повторов: из "area=113", 113 или "113" """
+    return tuple(sorted({int(str(area).strip().removeprefix("area=")) for area in area_ids or []}))
+
+@functools.lru_cache(maxsize=256)
+def _canonical_url(base_url, search_text, excluded, areas, experience):
+    params = list(SEARCH_PARAMS)
+    params += [("area", area) for area in areas]
+    if excluded:
+        params.append(("excluded_text", " ".join(excluded)))
+    if experience:
+        params.append(("experience", experience))
+    params.append(("text", search_text))
+    params.sort()
+    return f"{base_url}/search/vacancy?{urlencode(params)}"
 
 def build_url(search_text, excluded_text, area_ids, experience, page=0):
-    base_url = "https://hh.ru/search/vacancy?"
-    search_text_encoded = search_text.replace(' ', '+')
-    excluded_param = f"excluded_text={excluded_text}" if excluded_text else ""
-    area_params = "&".join(area_ids)
-    
-    params = [
-        f"text={search_text_encoded}",
-        excluded_param,
-        area_params,
-        f"experience={experience}",
-        "order_by=relevance",
-        "search_period=0",
-        "items_on_page=50",
-        "L_save_area=true",
-        f"page={page}"
-    ]
-    params = [p for p in params if p]
-    return base_url + "&".join(params)
+    """URL выдачи hh.ru с параметрами в каноническом порядке.
+
+    Одинаковые по смыслу запросы (другой порядок регионов, лишние пробелы,
+    старый формат исключений) дают один и тот же URL; база без страницы
+    кэшируется, page дописывается в конец (None - без страницы).
+    """
+    base = _canonical_url(
+        HH_BASE_URL, " ".join(search_text.split()), excluded_words(excluded_text),
+        area_numbers(area_ids), experience or ""
+    )
+    return base if page is None else f"{base}&page={page}"
+
+def parse_regions(value):
+    """area_ids из названий регионов или их id: "россия, казахстан", [113, "area=40"]"""
+    items = value.split(',') if isinstance(value, str) else list(value or [])
+    known_ids = set(REGIONS.values())
+    area_ids = []
+    invalid_regions = []
+    for item in items:
+        name = str(item).strip().lower()
+        if not name:
+            continue
+        region_id = name[len("area="):] if name.startswith("area=") else name
+        if region_id.isdigit() and int(region_id) in known_ids:
+            area_ids.append(f"area={int(region_id)}")
+        elif name in REGIONS:
+            area_ids.append(f"area={REGIONS[name]}")
+        else:
+            invalid_regions.append(name)
+    if invalid_regions:
+        raise ValueError(f"Неизвестные регионы: {', '.join(invalid_regions)}")
+    return area_ids
 
 def get_regions():
     while True:
         area_input = input("Введите регионы через запятую: ").strip()
-        region_names = [r.strip().lower() for r in area_input.split(',')]
-        area_ids = []
-        invalid_regions = []
-        
-        for name in region_names:
-            region_id = REGIONS.get(name)
-            if region_id:
-                area_ids.append(f"area={region_id}")
-            else:
-                invalid_regions.append(name)
-        
-        if invalid_regions:
-            print(f"Неизвестные регионы: {', '.join(invalid_regions)}. Попробуйте снова.\n")
-        else:
+        try:
+            area_ids = parse_regions(area_input)
+        except ValueError as e:
+            print(f"{e}. Попробуйте снова.\n")
+            continue
+        if area_ids:
             return area_ids
+        print("Укажите хотя бы один регион.\n")
 
 def get_search_text():
     text = input("Введите поисковый запрос (пустой = дефолтный): ").strip()
     return text if text else "Middle Python Backend Developer"
 
+def normalize_excluded(value):
+    """Исключённые слова в формате конфига: "java, php" или ["java", "php"] -> "java php" """
+    if isinstance(value, str):
+        value = value.split(',')
+    return " ".join(word.strip() for word in value or [] if word.strip())
+
 def get_excluded_words():
     excluded = input("Введите исключённые слова (через запятую, можно пусто): ").strip()
-    return excluded.replace(',', '+').replace(' ', '+') if excluded else ""
+    return normalize_excluded(excluded)
 
-def get_experience():
-    while True:
-        exp_input = input("\nВведите опыт работы (например: 0, 1-3, 6+):").strip()
-        
-        if exp_input == "0":
-            return "noExperience"
-        
-        if exp_input.endswith('+'):
+EXPERIENCE_CODES = ("noExperience", "between1And3", "between3And6", "moreThan6")
+
+def parse_experience(value):
+    """Код опыта hh.ru из "0", "1-3", "6+", числа лет или готового кода"""
+    value = str(value).strip()
+    if value in EXPERIENCE_CODES or value == "":
+        return value
+
+    if value.endswith('+'):
+        try:
+            start = int(value[:-1])
+        except ValueError:
+            raise ValueError("Неверный формат!")
+        # "0+" - любой опыт, иначе вариант hh.ru, в который попадает нижняя граница
+        return "" if start == 0 else parse_experience(start)
+
+    if '-' in value:
+        parts = value.split('-')
+        if len(parts) == 2:
             try:
-                val = int(exp_input[:-1])
-                return "moreThan6"
+                start = int(parts[0])
+                end = int(parts[1])
             except ValueError:
-                print("Неверный формат!")
-                continue
-        
-        if '-' in exp_input:
-            parts = exp_input.split('-')
-            if len(parts) == 2:
-                try:
-                    start = int(parts[0])
-                    end = int(parts[1])
-                    if start > end or start < 0 or end < 0:
-                        print("Неверный диапазон!")
-                        continue
-                    
-                    if end < 1:
-                        return "noExperience"
-                    elif start >= 6:
-                        return "moreThan6"
-                    elif start >= 3:
-                        return "between3And6"
-                    elif start >= 1:
-                        return "between1And3"
-                    elif start >= 0:
-                        return "between0And1"
-                except ValueError:
-                    print("Неверный формат диапазона!")
-                    continue
-        
-        try:
-            val = int(exp_input)
-            if val == 0:
+                raise ValueError("Неверный формат диапазона!")
+            if start > end or start < 0 or end < 0:
+                raise ValueError("Неверный диапазон!")
+
+            if end <= 1:
                 return "noExperience"
-            elif 1 <= val < 3:
-                return "between1And3"
-            elif 3 <= val < 6:
-                return "between3And6"
-            elif val >= 6:
+            elif start >= 6:
                 return "moreThan6"
-            elif 0 < val < 1:
-                return "between0And1"
-        except ValueError:
-            print("Неверный формат ввода опыта!")
+            elif start >= 3:
+                return "between3And6"
+            elif start >= 1:
+                return "between1And3"
+            raise ValueError("Диапазон охватывает несколько вариантов опыта hh.ru!")
+
+    try:
+        val = int(value)
+    except ValueError:
+        raise ValueError("Неверный формат ввода опыта!")
+    if val == 0:
+        return "noExperience"
+    elif 1 <= val < 3:
+        return "between1And3"
+    elif 3 <= val < 6:
+        return "between3And6"
+    elif val >= 6:
+        return "moreThan6"
+    raise ValueError("Неверный формат ввода опыта!")
+
+def get_experience():
+    while True:
+        exp_input = input("\nВведите опыт работы (например: 0, 1-3, 6+):").strip()
+        try:
+            experience = parse_experience(exp_input)
+        except ValueError as e:
+            print(e)
             continue
+        if experience:
+            return experience
+        print("Неверный формат ввода опыта!")
 
 def setup_config():
     """Настройка конфигурации и сохранение в JSON"""
@@ -184,5 +343,146 @@ def setup_config():
 def get_config():
     return load_config()
 
+def _merge_searches(config):
+    result = []
+    for overrides in config.get("searches") or [{}]:
+        search = {key: value for key, value in config.items() if key != "searches"}
+        search.update(overrides)
+        search["name"] = overrides.get("name") or search["search_text"]
+        result.append(search)
+    return result
+
+def get_searches(config):
+    """Список поисков: элементы config["searches"] поверх общих настроек, либо один поиск из корня конфига.
+
+    base_url - URL выдачи без номера страницы, считается один раз на поиск.
+    """
+    result = _merge_searches(config)
+    for search in result:
+        search["base_url"] = build_url(
+            search["search_text"], search.get("excluded_text", ""), search.get("area_ids", []),
+            search.get("experience", ""), None
+        )
+    return result
+
+# Поля поиска, которые принимаются из файлов импорта, и их преобразования
+SEARCH_FIELDS = {
+    "name": str,
+    "search_text": str,
+    "excluded_text": normalize_excluded,
+    "regions": parse_regions,
+    "area_ids": parse_regions,
+    "experience": parse_experience,
+    "interval": float,
+    "min_similarity": float,
+    "min_salary": int,
+    "message_format": str,
+}
+
+def normalize_search(raw):
+    """Проверяет и приводит поиск из файла импорта к формату конфига.
+
+    Пустые значения не переопределяют общие настройки. Возвращает
+    (поиск, ошибки); regions превращаются в area_ids.
+    """
+    search = {}
+    errors = []
+    label = raw.get("name") or raw.get("search_text") or "?"
+    for key, value in raw.items():
+        if value is None or value == "":
+            continue
+        convert = SEARCH_FIELDS.get(key)
+        if convert is None:
+            search[key] = value
+            continue
+        try:
+            value = convert(value)
+        except (TypeError, ValueError) as e:
+            detail = e if convert in (parse_regions, parse_experience) else f"неверное значение {value!r}"
+            errors.append(f"{label}: {key}: {detail}")
+            continue
+        if key in ("interval", "min_similarity") and value == int(value):
+            value = int(value)
+        search["area_ids" if key == "regions" else key] = value
+    return search, errors
+
+def read_searches_file(path):
+    """Поиски из JSON, YAML или CSV: (общие настройки, список поисков)"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            return {}, list(csv.DictReader(f))
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("Для YAML нужен PyYAML: pip install pyyaml")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    if isinstance(data, list):
+        return {}, data
+    if isinstance(data, dict):
+        data = dict(data)
+        return data, data.pop("searches", [])
+    raise ValueError("Ожидается список поисков или объект с ключом searches")
+
+def import_searches(path, base=None, **overrides):
+    """Конфиг с поисками из файла поверх base: (конфиг, ошибки)"""
+    root, raw_searches = read_searches_file(path)
+    config = with_defaults(dict(base or {}))
+    errors = []
+
+    root_search, root_errors = normalize_search(root)
+    config.update(root_search)
+    errors += root_errors
+
+    searches = []
+    for raw in raw_searches:
+        search, search_errors = normalize_search(raw)
+        errors += search_errors
+        searches.append(search)
+    config["searches"] = searches
+    config.update({key: value for key, value in overrides.items() if value})
+
+    if not errors:
+        errors = validate_config(config)
+    return config, errors
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Настройка config.json: без аргументов - интерактивно, с --searches - из файла"
+    )
+    arg_parser.add_argument("--searches", help="файл поисков: .json, .yaml или .csv")
+    arg_parser.add_argument("--output", default=None, help="куда записать конфиг (по умолчанию config.json)")
+    arg_parser.add_argument("--bot-token", help="токен бота")
+    arg_parser.add_argument("--chat-id", help="чат для уведомлений")
+    arg_parser.add_argument("--fresh", action="store_true",
+                            help="не брать остальные настройки из текущего config.json")
+    arg_parser.add_argument("--check", action="store_true", help="только проверить, не записывая")
+    return arg_parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.searches:
+        setup_config()
+        return 0
+
+    base = DEFAULT_CONFIG.copy() if args.fresh else load_config()
+    try:
+        config, errors = import_searches(args.searches, base, bot_token=args.bot_token, chat_id=args.chat_id)
+    except Exception as e:
+        errors = [str(e)]
+    if errors:
+        for error in errors:
+            logger.error("❌ %s", error)
+        return 1
+
+    logger.info("✅ Поисков: %d", len(config["searches"]))
+    if not args.check:
+        save_config(config, args.output)
+    return 0
+
 if __name__ == "__main__":
-    setup_config()
\ No newline at end of file
+    setup_logging({"log_format": "text"})
+    sys.exit(main())
\ No newline at end of file
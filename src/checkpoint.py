@@ -0,0 +1,150 @@
+import metrics
+from log_config import get_logger
+
+logger = get_logger('checkpoint')
+
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+# Размер колонки failed_pages
+MAX_PAGES_LENGTH = 255
+
+
+def create_checkpoint_table(db_conn):
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS cycle_checkpoints (
+                search_name VARCHAR(255) PRIMARY KEY,
+                page INT NOT NULL DEFAULT 0,
+                status VARCHAR(16) NOT NULL DEFAULT 'done',
+                failed_pages VARCHAR(%d) NOT NULL DEFAULT '',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+        """ % MAX_PAGES_LENGTH)
+        cursor.execute("SHOW COLUMNS FROM cycle_checkpoints LIKE 'failed_pages'")
+        if cursor.fetchone() is None:
+            cursor.execute("ALTER TABLE cycle_checkpoints "
+                           "ADD COLUMN failed_pages VARCHAR(%d) NOT NULL DEFAULT ''" % MAX_PAGES_LENGTH)
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка создания таблицы чекпоинтов: %s", e)
+    finally:
+        cursor.close()
+
+
+def _pack_pages(pages):
+    """Номера страниц через запятую; самые дальние, не влезающие в колонку, отбрасываются"""
+    packed = ""
+    for page in sorted(set(pages)):
+        item = f"{packed},{page}" if packed else str(page)
+        if len(item) > MAX_PAGES_LENGTH:
+            logger.warning("Слишком много незагруженных страниц: начиная с %d, они не будут запрошены повторно", page)
+            break
+        packed = item
+    return packed
+
+
+def _unpack_pages(value):
+    return [int(page) for page in (value or "").split(",") if page.strip().isdigit()]
+
+
+def save_checkpoint(db_conn, search_name, page, status=IN_PROGRESS, failed_pages=()):
+    """Сохраняет прогресс цикла: следующая страница и страницы,
+    которые не загрузились (их следующий цикл запросит первыми)"""
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='save_checkpoint')
+        cursor.execute(
+            "INSERT INTO cycle_checkpoints (search_name, page, status, failed_pages) "
+            "VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE page = VALUES(page), "
+            "status = VALUES(status), "
+            "failed_pages = VALUES(failed_pages)",
+            (search_name, page, status, _pack_pages(failed_pages))
+        )
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка сохранения чекпоинта: %s", e)
+    finally:
+        cursor.close()
+
+
+def load_checkpoint(db_conn, search_name):
+    """Чекпоинт поиска: dict(page, status, age, failed_pages) или None"""
+    if db_conn is None:
+        return None
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='load_checkpoint')
+        cursor.execute(
+            "SELECT page, status, TIMESTAMPDIFF(SECOND, updated_at, NOW()), failed_pages "
+            "FROM cycle_checkpoints WHERE search_name = %s",
+            (search_name,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        page, status, age, failed_pages = row
+        return {'page': int(page), 'status': status, 'age': int(age), 'failed_pages': _unpack_pages(failed_pages)}
+    except Exception as e:
+        logger.error("Ошибка чтения чекпоинта: %s", e)
+        return None
+    finally:
+        cursor.close()
+
+
+class CycleResult:
+    """Итог цикла поиска: загруженные и не загрузившиеся страницы, число отправленных"""
+
+    def __init__(self, search_name):
+        self.search_name = search_name
+        self.pages = []
+        self.failed_pages = []
+        self.sent = 0
+        self.interrupted = False
+
+    @property
+    def complete(self):
+        return not self.failed_pages and not self.interrupted
+
+
+def retry_pages(checkpoint, interval_seconds):
+    """Страницы, не загрузившиеся в прошлом цикле: их стоит запросить первыми.
+
+    Как и прерванный цикл, учитываются только свежие (не старше двух
+    интервалов) - номера страниц давно прошедшей выдачи уже сдвинулись.
+    """
+    if not checkpoint or checkpoint['age'] > 2 * interval_seconds:
+        return []
+    return list(checkpoint.get('failed_pages', []))
+
+
+def resume_page(checkpoint, interval_seconds):
+    """Страница, с которой продолжить прерванный цикл (0 - начать заново).
+
+    Прерванный цикл продолжается, только если он прерван не раньше одного
+    интервала назад; старый прогресс уже неактуален и выдачу проходим целиком.
+    """
+    if not checkpoint or checkpoint['status'] != IN_PROGRESS:
+        return 0
+    if checkpoint['age'] > interval_seconds:
+        return 0
+    return checkpoint['page']
+
+
+def initial_delay(checkpoint, interval_seconds):
+    """Сколько ждать до первого цикла после рестарта.
+
+    Если последний цикл завершился недавно, полный обход сразу после запуска
+    не нужен - ждём остаток интервала. Прерванный цикл продолжаем сразу.
+    """
+    if not checkpoint or checkpoint['status'] != DONE:
+        return 0
+    return max(0, interval_seconds - checkpoint['age'])
@@ -0,0 +1,157 @@
+import math
+import os
+import socket
+
+import metrics
+from log_config import get_logger
+
+logger = get_logger('cluster')
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def create_cluster_tables(db_conn):
+    """Таблицы координации воркеров: heartbeat и аренда поисков"""
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS hh_workers (
+                worker_id VARCHAR(64) PRIMARY KEY,
+                heartbeat TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS search_leases (
+                search_name VARCHAR(255) PRIMARY KEY,
+                worker_id VARCHAR(64) NOT NULL,
+                expires_at TIMESTAMP NOT NULL
+            )
+        """)
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка создания таблиц кластера: %s", e)
+    finally:
+        cursor.close()
+
+
+class LeaseCoordinator:
+    """Распределяет поиски между воркерами через таблицу аренды в общей БД.
+
+    Отдельного процесса-координатора нет: перед каждым циклом воркер продлевает
+    или захватывает аренду поиска и держит не больше своей доли
+    ceil(поисков / живых воркеров). Лишние аренды отпускаются, и их подхватывают
+    новые воркеры, так что нагрузка выравнивается при масштабировании.
+    """
+
+    def __init__(self, worker_id, total_searches, lease_ttl=None):
+        self.worker_id = worker_id
+        self.total_searches = total_searches
+        self.lease_ttl = lease_ttl
+
+    def _ttl(self, search):
+        # Аренда должна пережить паузу между циклами
+        return self.lease_ttl or int(search["interval"] * 60 * 2 + 60)
+
+    def _heartbeat(self, cursor, ttl):
+        cursor.execute(
+            "INSERT INTO hh_workers (worker_id, heartbeat) VALUES (%s, NOW()) "
+            "ON DUPLICATE KEY UPDATE heartbeat = NOW()",
+            (self.worker_id,)
+        )
+        cursor.execute(
+            "SELECT COUNT(*) FROM hh_workers WHERE heartbeat > NOW() - INTERVAL %s SECOND",
+            (ttl,)
+        )
+        return max(1, cursor.fetchone()[0])
+
+    def acquire(self, db_conn, search):
+        """True, если этот воркер должен выполнить цикл поиска"""
+        if db_conn is None:
+            return True
+
+        name = search["name"]
+        ttl = self._ttl(search)
+        cursor = db_conn.cursor()
+        try:
+            metrics.inc('db_round_trips_total', 5, query='lease')
+            live_workers = self._heartbeat(cursor, ttl)
+            fair_share = math.ceil(self.total_searches / live_workers)
+
+            cursor.execute(
+                "SELECT COUNT(*) FROM search_leases WHERE worker_id = %s AND expires_at > NOW()",
+                (self.worker_id,)
+            )
+            held = cursor.fetchone()[0]
+
+            cursor.execute(
+                "SELECT worker_id, expires_at > NOW() FROM search_leases WHERE search_name = %s",
+                (name,)
+            )
+            row = cursor.fetchone()
+            mine = row is not None and row[0] == self.worker_id and row[1]
+
+            if mine and held > fair_share:
+                cursor.execute(
+                    "DELETE FROM search_leases WHERE search_name = %s AND worker_id = %s",
+                    (name, self.worker_id)
+                )
+                db_conn.commit()
+                logger.info("Отдаю поиск %s другому воркеру (%d из %d)", name, held, fair_share)
+                return False
+
+            if not mine and held >= fair_share:
+                db_conn.commit()
+                return False
+
+            cursor.execute(
+                "INSERT IGNORE INTO search_leases (search_name, worker_id, expires_at) "
+                "VALUES (%s, %s, NOW() + INTERVAL %s SECOND)",
+                (name, self.worker_id, ttl)
+            )
+            cursor.execute(
+                "UPDATE search_leases SET worker_id = %s, expires_at = NOW() + INTERVAL %s SECOND "
+                "WHERE search_name = %s AND (worker_id = %s OR expires_at <= NOW())",
+                (self.worker_id, ttl, name, self.worker_id)
+            )
+            db_conn.commit()
+
+            cursor.execute("SELECT worker_id FROM search_leases WHERE search_name = %s", (name,))
+            row = cursor.fetchone()
+            acquired = row is not None and row[0] == self.worker_id
+            if acquired and not mine:
+                logger.info("Воркер %s взял поиск %s", self.worker_id, name)
+            return acquired
+        except Exception as e:
+            logger.error("Ошибка аренды поиска %s: %s", name, e)
+            return False
+        finally:
+            cursor.close()
+
+    def release_all(self, db_conn):
+        """Отпускает все аренды воркера (при штатной остановке)"""
+        if db_conn is None:
+            return
+
+        cursor = db_conn.cursor()
+        try:
+            cursor.execute("DELETE FROM search_leases WHERE worker_id = %s", (self.worker_id,))
+            cursor.execute("DELETE FROM hh_workers WHERE worker_id = %s", (self.worker_id,))
+            db_conn.commit()
+        except Exception as e:
+            logger.error("Ошибка освобождения аренды: %s", e)
+        finally:
+            cursor.close()
+
+    def wrap(self, job):
+        """job(), который выполняется только для поисков, арендованных этим воркером"""
+        def cluster_job(db_conn, search, stop_event=None):
+            if self.acquire(db_conn, search):
+                return job(db_conn, search, stop_event)
+            logger.debug("Поиск %s ведёт другой воркер", search["name"])
+            return None
+        return cluster_job
@@ -0,0 +1,226 @@
+import threading
+
+import metrics
+import transport
+from log_config import get_logger
+from parser import TELEGRAM_API_URL, get_time, send_payload
+from templates import escape_html
+
+logger = get_logger('commands')
+
+HELP_TEXT = (
+    "<b>Команды</b>\n"
+    "/stats - статистика с момента запуска\n"
+    "/searches - поиски и их состояние\n"
+    "/pause &lt;поиск&gt; - приостановить поиск\n"
+    "/resume &lt;поиск&gt; - возобновить поиск\n"
+    "/threshold &lt;поиск&gt; &lt;0-100&gt; - порог схожести (без числа - вернуть из конфига)"
+)
+
+
+class CommandState:
+    """Состояние, которым управляют команды бота, и счётчики циклов для /stats.
+
+    Пауза и порог схожести хранятся в памяти и действуют до перезапуска:
+    config.json командами не меняется.
+    """
+
+    def __init__(self):
+        self.paused = set()
+        self.thresholds = {}
+        self.started = get_time()
+        self.cycles = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, sent):
+        with self._lock:
+            stats = self.cycles.setdefault(name, {'cycles': 0, 'sent': 0, 'last_cycle': None, 'last_sent': 0})
+            stats['cycles'] += 1
+            stats['sent'] += sent
+            stats['last_cycle'] = get_time()
+            stats['last_sent'] = sent
+
+    def effective(self, search):
+        """Поиск с учётом команд: None - поиск на паузе"""
+        name = search.get("name", search["search_text"])
+        if name in self.paused:
+            return None
+        threshold = self.thresholds.get(name)
+        if threshold is not None:
+            search = dict(search, min_similarity=threshold)
+        return search
+
+    def wrap(self, job):
+        """job(), который пропускает поиски на паузе и учитывает отправленные вакансии"""
+        def commanded_job(db_conn, search, stop_event=None):
+            name = search.get("name", search["search_text"])
+            effective = self.effective(search)
+            if effective is None:
+                logger.debug("Поиск %s на паузе", name)
+                return None
+            result = job(db_conn, effective, stop_event)
+            if result is not None:
+                self.record(name, result.sent)
+            return result
+        return commanded_job
+
+
+class CommandBot:
+    """Команды из Telegram через long polling getUpdates.
+
+    poll() выполняет один запрос getUpdates (он блокируется до timeout секунд,
+    пока нет новых сообщений) и отвечает на команды. Запросы идут через общий
+    transport. Команды принимаются только из chat_id и command_chats, ответы
+    собираются из CommandState и метрик без запросов к БД.
+    """
+
+    def __init__(self, config, state, get_searches, timeout=10):
+        self.bot_token = config["bot_token"]
+        self.chats = {str(config["chat_id"])} | {str(chat) for chat in config.get("command_chats", [])}
+        self.state = state
+        self.get_searches = get_searches
+        self.timeout = timeout
+        self.offset = None
+        self.drained = False
+        self.handlers = {
+            'start': self.cmd_help,
+            'help': self.cmd_help,
+            'stats': self.cmd_stats,
+            'searches': self.cmd_searches,
+            'pause': self.cmd_pause,
+            'resume': self.cmd_resume,
+            'threshold': self.cmd_threshold,
+        }
+
+    def fetch_updates(self, offset=None, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        params = {'timeout': timeout, 'allowed_updates': '["message"]'}
+        if offset is not None:
+            params['offset'] = offset
+        response = transport.get(f"{TELEGRAM_API_URL}/bot{self.bot_token}/getUpdates",
+                                 params=params, timeout=timeout + 5)
+        response.raise_for_status()
+        return response.json().get('result', [])
+
+    def drain(self):
+        """Подтверждает накопленные до запуска обновления, не выполняя их.
+
+        Telegram хранит неподтверждённые обновления до суток: без этого после
+        перезапуска повторились бы уже выполненные команды (например, /pause).
+        offset=-1 возвращает только последнее обновление и подтверждает предыдущие.
+        """
+        updates = self.fetch_updates(offset=-1, timeout=0)
+        self.offset = updates[-1]['update_id'] + 1 if updates else None
+        self.drained = True
+        if updates:
+            logger.info("Команды, полученные до запуска, пропущены")
+
+    def poll(self):
+        """Один цикл long polling; возвращает число обработанных команд"""
+        if not self.drained:
+            self.drain()
+        handled = 0
+        for update in self.fetch_updates(self.offset):
+            self.offset = update['update_id'] + 1
+            message = update.get('message') or {}
+            chat_id = str((message.get('chat') or {}).get('id', ''))
+            text = message.get('text') or ''
+            if not text.startswith('/'):
+                continue
+            if chat_id not in self.chats:
+                logger.warning("Команда из чужого чата %s проигнорирована", chat_id)
+                continue
+            reply = self.handle(text)
+            metrics.inc('bot_commands_total', command=text.split()[0].split('@')[0].lstrip('/'))
+            try:
+                send_payload(self.bot_token, {'chat_id': chat_id, 'text': reply, 'parse_mode': 'HTML'},
+                             kind='command')
+            except Exception as e:
+                logger.error("Ошибка ответа на команду: %s", e)
+            handled += 1
+        return handled
+
+    def handle(self, text):
+        parts = text.split()
+        command = parts[0].split('@')[0].lstrip('/').lower()
+        handler = self.handlers.get(command)
+        if handler is None:
+            return "Неизвестная команда. /help - список команд"
+        return handler(parts[1:])
+
+    def _search_name(self, args):
+        """Имя поиска из аргументов (имена с пробелами допускаются) или None"""
+        name = " ".join(args)
+        names = [search.get("name", search["search_text"]) for search in self.get_searches()]
+        if name in names:
+            return name
+        matches = [n for n in names if n.lower() == name.lower()]
+        return matches[0] if len(matches) == 1 else None
+
+    def cmd_help(self, args):
+        return HELP_TEXT
+
+    def cmd_stats(self, args):
+        started = self.state.started.strftime('%d.%m.%Y %H:%M')
+        parts = [f"📊 <b>Статистика с {started}</b>\n"]
+        total = 0
+        for search in self.get_searches():
+            name = search.get("name", search["search_text"])
+            stats = self.state.cycles.get(name)
+            if stats is None:
+                parts.append(f"\n<b>{escape_html(name)}</b>: циклов ещё не было")
+                continue
+            total += stats['sent']
+            parts.append(
+                f"\n<b>{escape_html(name)}</b>: отправлено {stats['sent']} за {stats['cycles']} циклов, "
+                f"последний в {stats['last_cycle'].strftime('%H:%M')} (+{stats['last_sent']})"
+            )
+        parts.append(f"\n\n<b>Всего отправлено:</b> {total}")
+        suppressed = sum(counter['value'] for counter in metrics.snapshot()['counters']
+                         if counter['name'] == 'reposts_suppressed_total')
+        if suppressed:
+            parts.append(f"\n<b>Повторных публикаций отсеяно:</b> {int(suppressed)}")
+        return "".join(parts)
+
+    def cmd_searches(self, args):
+        lines = ["🔍 <b>Поиски</b>\n"]
+        for search in self.get_searches():
+            name = search.get("name", search["search_text"])
+            effective = self.state.effective(search)
+            status = "⏸️ пауза" if effective is None else "▶️ работает"
+            threshold = self.state.thresholds.get(name, search["min_similarity"])
+            lines.append(f"{escape_html(name)}: {status}, порог {threshold}%, раз в {search['interval']} мин")
+        return "\n".join(lines)
+
+    def cmd_pause(self, args):
+        name = self._search_name(args)
+        if name is None:
+            return "Поиск не найден. /searches - список поисков"
+        self.state.paused.add(name)
+        logger.info("⏸️ Поиск %s приостановлен командой", name)
+        return f"⏸️ Поиск {escape_html(name)} приостановлен"
+
+    def cmd_resume(self, args):
+        name = self._search_name(args)
+        if name is None:
+            return "Поиск не найден. /searches - список поисков"
+        self.state.paused.discard(name)
+        logger.info("▶️ Поиск %s возобновлён командой", name)
+        return f"▶️ Поиск {escape_html(name)} возобновлён"
+
+    def cmd_threshold(self, args):
+        value = None
+        if args and args[-1].isdigit():
+            value = int(args[-1])
+            args = args[:-1]
+        name = self._search_name(args)
+        if name is None:
+            return "Поиск не найден. /searches - список поисков"
+        if value is None:
+            self.state.thresholds.pop(name, None)
+            return f"Порог {escape_html(name)} взят из конфига"
+        if not 0 <= value <= 100:
+            return "Порог должен быть от 0 до 100"
+        self.state.thresholds[name] = value
+        logger.info("🎯 Порог схожести %s изменён командой: %d%%", name, value)
+        return f"🎯 Порог схожести {escape_html(name)}: {value}%"
@@ -0,0 +1,48 @@
+import os
+
+import builder
+from builder import read_config, validate_config
+from log_config import get_logger
+
+logger = get_logger('config_watch')
+
+
+class ConfigWatcher:
+    """Следит за config.json по mtime и отдаёт новую версию, только если она корректна.
+
+    Файл, сохранённый наполовину или с ошибками, не применяется: остаётся
+    текущий конфиг, а следующее сохранение файла будет проверено заново.
+    """
+
+    def __init__(self, config, path=None):
+        self.config = config
+        self.path = path or builder.CONFIG_FILE
+        self.mtime = self._mtime()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self):
+        mtime = self._mtime()
+        if mtime is None or mtime == self.mtime:
+            return None
+        self.mtime = mtime
+
+        try:
+            config = read_config(self.path)
+        except Exception as e:
+            logger.error("Конфиг не применён: %s", e)
+            return None
+        errors = validate_config(config)
+        if errors:
+            logger.error("Конфиг не применён: %s", "; ".join(errors))
+            return None
+        if config == self.config:
+            return None
+
+        self.config = config
+        logger.info("🔄 Конфиг перечитан из %s", self.path)
+        return config
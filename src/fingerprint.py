@@ -0,0 +1,148 @@
+import hashlib
+import re
+
+import metrics
+from log_config import get_logger
+
+logger = get_logger('fingerprint')
+
+BITS = 64
+BANDS = 4
+BAND_BITS = BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    return " ".join(_WORD_RE.findall((text or "").lower().replace('ё', 'е')))
+
+
+def _features(vacancy):
+    """Признаки вакансии: слова и биграммы заголовка, компания и зарплата целиком"""
+    words = normalize_text(vacancy.get('title')).split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    features.append("company:" + normalize_text(vacancy.get('company')))
+    features.append(f"salary:{vacancy.get('salary_from_base')}-{vacancy.get('salary_to_base')}")
+    return features
+
+
+def _hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(features):
+    weights = [0] * BITS
+    for feature in features:
+        h = _hash(feature)
+        for bit in range(BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(BITS) if weights[bit] > 0)
+
+
+def fingerprint(vacancy):
+    """64-битный SimHash по нормализованным заголовку, компании и зарплате"""
+    return simhash(_features(vacancy))
+
+
+def bands(fp):
+    """Части отпечатка для LSH: при расстоянии < BANDS совпадёт хотя бы одна"""
+    return [(fp >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+
+def distance(a, b):
+    return (a ^ b).bit_count()
+
+
+class FingerprintIndex:
+    """LSH-индекс в памяти: отпечатки раскладываются по корзинам своих частей"""
+
+    def __init__(self):
+        self._buckets = {}
+
+    def add(self, url, fp):
+        for band, bucket in enumerate(bands(fp)):
+            self._buckets.setdefault((band, bucket), []).append((url, fp))
+
+    def find(self, fp, max_distance, exclude_url=None):
+        for band, bucket in enumerate(bands(fp)):
+            for url, other in self._buckets.get((band, bucket), ()):
+                if url != exclude_url and distance(fp, other) <= max_distance:
+                    return url
+        return None
+
+
+def create_fingerprint_table(db_conn):
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vacancy_fingerprints (
+                url VARCHAR(500) PRIMARY KEY,
+                fingerprint BIGINT UNSIGNED NOT NULL,
+                b0 SMALLINT UNSIGNED NOT NULL,
+                b1 SMALLINT UNSIGNED NOT NULL,
+                b2 SMALLINT UNSIGNED NOT NULL,
+                b3 SMALLINT UNSIGNED NOT NULL,
+                sent_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_b0 (b0), INDEX idx_b1 (b1), INDEX idx_b2 (b2), INDEX idx_b3 (b3),
+                INDEX idx_fp_date (sent_date)
+            )
+        """)
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка создания таблицы отпечатков: %s", e)
+    finally:
+        cursor.close()
+
+
+def record_fingerprint(db_conn, url, fp):
+    """Запоминает отпечаток отправленной вакансии"""
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='record_fingerprint')
+        cursor.execute(
+            "INSERT IGNORE INTO vacancy_fingerprints (url, fingerprint, b0, b1, b2, b3) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            (url, fp, *bands(fp))
+        )
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка сохранения отпечатка вакансии: %s", e)
+    finally:
+        cursor.close()
+
+
+def find_repost(db_conn, url, fp, max_distance=3, window_days=30):
+    """URL ранее отправленной вакансии с тем же содержимым (или None).
+
+    Кандидаты выбираются по индексам частей отпечатка, а не полным
+    просмотром истории; точное расстояние Хэмминга считается уже здесь.
+    """
+    if db_conn is None:
+        return None
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='find_repost')
+        b0, b1, b2, b3 = bands(fp)
+        cursor.execute(
+            "SELECT url, fingerprint FROM vacancy_fingerprints "
+            "WHERE (b0 = %s OR b1 = %s OR b2 = %s OR b3 = %s) "
+            "AND url <> %s AND sent_date > NOW() - INTERVAL %s DAY",
+            (b0, b1, b2, b3, url, window_days)
+        )
+        for other_url, other in cursor.fetchall():
+            if distance(fp, int(other)) <= max_distance:
+                return other_url
+        return None
+    except Exception as e:
+        logger.error("Ошибка поиска повторной публикации: %s", e)
+        return None
+    finally:
+        cursor.close()
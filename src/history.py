@@ -0,0 +1,255 @@
+import argparse
+import csv
+import datetime
+import gzip
+import json
+import os
+
+from log_config import get_logger, setup_logging
+from parser import connect_db
+from retention import ARCHIVED_TABLES
+
+logger = get_logger('history')
+
+CHUNK_SIZE = 5000
+
+
+def detect_format(path):
+    """Формат файла по расширению: csv, parquet или jsonl (архивы retention)"""
+    name = path[:-3] if path.endswith('.gz') else path
+    for fmt in ('csv', 'parquet', 'jsonl'):
+        if name.endswith('.' + fmt):
+            return fmt
+    raise ValueError(f"Неизвестный формат файла: {path}")
+
+
+def _open_text(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Для Parquet нужен pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _arrow_schema(pa, columns):
+    def column_type(name):
+        if name == 'id':
+            return pa.int64()
+        if name == 'sent_date':
+            return pa.timestamp('s')
+        return pa.string()
+    return pa.schema([(name, column_type(name)) for name in columns])
+
+
+def iter_chunks(cursor, chunk_size=CHUNK_SIZE):
+    """Строки запроса пачками: небуферизованный курсор читает их с сервера по мере надобности"""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self._file = _open_text(path, 'w')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path, columns):
+        self._file = _open_text(path, 'w')
+        self.columns = columns
+
+    def write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path, columns):
+        self._pa = _import_pyarrow()
+        self.columns = columns
+        self.schema = _arrow_schema(self._pa, columns)
+        self._writer = self._pa.parquet.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        arrays = list(zip(*rows))
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array(values, type=field.type) for values, field in zip(arrays, self.schema)],
+            schema=self.schema
+        ))
+
+    def close(self):
+        self._writer.close()
+
+
+WRITERS = {'csv': CsvWriter, 'jsonl': JsonlWriter, 'parquet': ParquetWriter}
+
+
+def export_table(db_conn, table, path, chunk_size=CHUNK_SIZE):
+    """Выгружает таблицу в файл пачками по chunk_size строк. Возвращает число строк"""
+    if table not in ARCHIVED_TABLES:
+        raise ValueError(f"Неизвестная таблица: {table}")
+
+    fmt = detect_format(path)
+    cursor = db_conn.cursor()
+    exported = 0
+    try:
+        cursor.execute(f"SELECT * FROM {table} ORDER BY sent_date")
+        columns = [d[0] for d in cursor.description]
+        writer = WRITERS[fmt](path, columns)
+        try:
+            for rows in iter_chunks(cursor, chunk_size):
+                writer.write(rows)
+                exported += len(rows)
+                logger.info("%s: выгружено %d строк", table, exported)
+        finally:
+            writer.close()
+    finally:
+        cursor.close()
+    return exported
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Строки файла (dict) пачками, не загружая файл целиком"""
+    fmt = detect_format(path)
+    if fmt == 'parquet':
+        pa = _import_pyarrow()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pylist()
+        return
+
+    with _open_text(path, 'r') as f:
+        rows = csv.DictReader(f) if fmt == 'csv' else (json.loads(line) for line in f if line.strip())
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _progress_path(path):
+    return path + '.progress'
+
+
+def _load_progress(path):
+    try:
+        with open(_progress_path(path), encoding='utf-8') as f:
+            return json.load(f)['rows']
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+def _save_progress(path, rows):
+    tmp = _progress_path(path) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'rows': rows}, f)
+    os.replace(tmp, _progress_path(path))
+
+
+def _value(value):
+    # Пустые ячейки CSV - это NULL, а не пустая строка
+    if value == '':
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=None)
+    return value
+
+
+def import_table(db_conn, table, path, chunk_size=CHUNK_SIZE, resume=False):
+    """Загружает файл в таблицу пакетными INSERT IGNORE.
+
+    id не переносится (его выдаст AUTO_INCREMENT), дубли отсекаются
+    уникальным ключом. После каждой пачки число загруженных строк
+    сохраняется в <файл>.progress; с resume=True они пропускаются.
+    Возвращает число обработанных строк.
+    """
+    if table not in ARCHIVED_TABLES:
+        raise ValueError(f"Неизвестная таблица: {table}")
+
+    done = _load_progress(path) if resume else 0
+    if done:
+        logger.info("%s: продолжаю импорт с %d строки", table, done)
+
+    seen = 0
+    cursor = db_conn.cursor()
+    try:
+        for rows in read_chunks(path, chunk_size):
+            if seen + len(rows) <= done:
+                seen += len(rows)
+                continue
+            rows = rows[max(0, done - seen):]
+            seen = max(seen, done)
+
+            columns = [c for c in rows[0] if c != 'id']
+            cursor.executemany(
+                f"INSERT IGNORE INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(['%s'] * len(columns))})",
+                [tuple(_value(row.get(c)) for c in columns) for row in rows]
+            )
+            db_conn.commit()
+            seen += len(rows)
+            _save_progress(path, seen)
+            logger.info("%s: загружено %d строк", table, seen)
+    finally:
+        cursor.close()
+
+    if os.path.exists(_progress_path(path)):
+        os.remove(_progress_path(path))
+    return seen
+
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Выгрузка и загрузка истории отправок")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("export", "выгрузить таблицу в файл"), ("import", "загрузить файл в таблицу")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path", help="файл .csv, .parquet или .jsonl (можно .gz, кроме parquet)")
+        command.add_argument("--table", default="sent_vacancies", choices=sorted(ARCHIVED_TABLES))
+        command.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="строк в пачке")
+    commands.choices["import"].add_argument("--resume", action="store_true",
+                                            help="продолжить прерванный импорт")
+    return arg_parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging({"log_format": "text"})
+    db_conn = connect_db()
+    if db_conn is None:
+        return 1
+    try:
+        if args.command == "export":
+            count = export_table(db_conn, args.table, args.path, args.chunk)
+            logger.info("✅ Выгружено %d строк в %s", count, args.path)
+        else:
+            count = import_table(db_conn, args.table, args.path, args.chunk, args.resume)
+            logger.info("✅ Загружено %d строк из %s", count, args.path)
+    finally:
+        db_conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
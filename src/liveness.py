@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import metrics
+import ratelimit
+import transport
+from log_config import get_logger
+from parser import HH_HEADERS, vacancy_id
+
+logger = get_logger('liveness')
+
+# Страница вакансии в архиве отдаётся с кодом 200, закрытую выдают только эти пометки
+ARCHIVED_MARKERS = ('vacancy-archive-description', 'Вакансия в архиве')
+# Удалённая вакансия
+GONE_STATUSES = (404, 410)
+
+
+def check_vacancy(url, timeout=10):
+    """Открыта ли вакансия: True, False (в архиве или удалена) или None (не удалось проверить).
+
+    Нужен GET, а не HEAD: HEAD замечает только удалённые вакансии (404/410),
+    архив виден лишь в теле страницы. Запросы идут через общий лимитер hh.ru;
+    при троттлинге размыкается общая цепь, а вакансия считается открытой -
+    лучше отправить лишнюю ссылку, чем потерять живую вакансию.
+    """
+    host = urlparse(url).netloc
+    if not ratelimit.breaker.allow(host):
+        return None
+    ratelimit.limiter(host).acquire()
+
+    try:
+        with metrics.timer('liveness_check_seconds', host=host):
+            response = transport.get(url, headers=HH_HEADERS, timeout=timeout)
+    except Exception as e:
+        ratelimit.breaker.record_error(host)
+        metrics.inc('liveness_checks_total', result='error')
+        logger.debug("Не удалось проверить вакансию: %s", e, extra={'url': url})
+        return None
+
+    if response.status_code in (403, 429):
+        metrics.inc('liveness_checks_total', result='throttled')
+        retry_after = response.headers.get('Retry-After', '')
+        ratelimit.breaker.record_throttle(host, int(retry_after) if retry_after.isdigit() else None)
+        return None
+    ratelimit.breaker.record_success(host)
+
+    if response.status_code in GONE_STATUSES:
+        alive = False
+    elif not response.ok:
+        metrics.inc('liveness_checks_total', result='error')
+        return None
+    else:
+        alive = not any(marker in response.text for marker in ARCHIVED_MARKERS)
+    metrics.inc('liveness_checks_total', result='open' if alive else 'closed')
+    return alive
+
+
+class LivenessChecker:
+    """Проверка вакансий перед отправкой с кэшем по id вакансии.
+
+    Открытые вакансии перепроверяются не чаще раза в ttl секунд, закрытые
+    запоминаются насовсем (кэш ограничен max_size записями, старые вытесняются)
+    и записываются в archived_vacancies, чтобы после перезапуска отсекаться
+    одним запросом к БД. Сеть проверяется в пуле до concurrency потоков.
+    """
+
+    def __init__(self, ttl=3600, concurrency=4, max_size=10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.concurrency = max(1, concurrency)
+        self.max_size = max_size
+        self.clock = clock
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def cached(self, vid):
+        """True/False из кэша или None, если вакансию пора проверить"""
+        with self._lock:
+            entry = self._cache.get(vid)
+            if entry is None:
+                return None
+            alive, checked = entry
+            if alive and self.clock() - checked > self.ttl:
+                del self._cache[vid]
+                return None
+            self._cache.move_to_end(vid)
+            return alive
+
+    def remember(self, vid, alive):
+        with self._lock:
+            self._cache[vid] = (alive, self.clock())
+            self._cache.move_to_end(vid)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def _check(self, vacancy):
+        return check_vacancy(vacancy['href'])
+
+    def closed(self, db_conn, vacancies):
+        """URL закрытых вакансий из vacancies; новые закрытые записываются в БД"""
+        closed = set()
+        unknown = {}
+        for v in vacancies:
+            vid = vacancy_id(v['href'])
+            if not vid:
+                continue
+            alive = self.cached(vid)
+            if alive is None:
+                unknown[vid] = v
+                continue
+            metrics.inc('liveness_cache_hits_total')
+            if not alive:
+                closed.add(v['href'])
+
+        for vid in archived_ids(db_conn, list(unknown)):
+            self.remember(vid, False)
+            closed.add(unknown.pop(vid)['href'])
+
+        if unknown:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.concurrency, thread_name_prefix='liveness')
+            archived = []
+            for (vid, v), alive in zip(unknown.items(), self._pool.map(self._check, unknown.values())):
+                if alive is None:
+                    continue
+                self.remember(vid, alive)
+                if not alive:
+                    archived.append(v)
+                    closed.add(v['href'])
+            if archived:
+                record_archived(db_conn, archived)
+                metrics.inc('vacancies_archived_total', len(archived))
+                logger.info("🗄️ Закрытых вакансий: %d", len(archived))
+        return closed
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+checker = LivenessChecker()
+
+
+def configure(config):
+    """Применяет liveness_ttl и liveness_concurrency из конфига"""
+    global checker
+    checker.close()
+    checker = LivenessChecker(
+        config.get("liveness_ttl", 3600),
+        config.get("liveness_concurrency", 4),
+    )
+
+
+def create_archived_table(db_conn):
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archived_vacancies (
+                vacancy_id BIGINT UNSIGNED PRIMARY KEY,
+                url VARCHAR(500) NOT NULL,
+                archived_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка создания таблицы закрытых вакансий: %s", e)
+    finally:
+        cursor.close()
+
+
+def archived_ids(db_conn, ids):
+    """Id из ids, уже известные как закрытые (один запрос на страницу)"""
+    if db_conn is None or not ids:
+        return set()
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='archived_ids')
+        cursor.execute(
+            "SELECT vacancy_id FROM archived_vacancies WHERE vacancy_id IN (%s)" % ", ".join(["%s"] * len(ids)),
+            tuple(ids)
+        )
+        return {int(row[0]) for row in cursor.fetchall()}
+    except Exception as e:
+        logger.error("Ошибка чтения закрытых вакансий: %s", e)
+        return set()
+    finally:
+        cursor.close()
+
+
+def record_archived(db_conn, vacancies):
+    if db_conn is None or not vacancies:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='record_archived')
+        cursor.executemany(
+            "INSERT IGNORE INTO archived_vacancies (vacancy_id, url) VALUES (%s, %s)",
+            [(vacancy_id(v['href']), v['href']) for v in vacancies]
+        )
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка сохранения закрытых вакансий: %s", e)
+    finally:
+        cursor.close()
@@ -0,0 +1,87 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+ROOT_LOGGER = 'hh'
+
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_exc_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись лога в одну JSON строку"""
+
+    def format(self, record):
+        data = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class ExcQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не вклеивает traceback в текст сообщения.
+
+    Стандартный prepare() форматирует запись целиком в msg, и до JsonFormatter
+    исключение доходит уже внутри msg. Здесь в msg подставляются только args,
+    а traceback сохраняется текстом в exc_text - для поля exc.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def get_logger(name):
+    """Логгер подсистемы внутри общего дерева 'hh'"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def setup_logging(config):
+    """Настраивает логирование: QueueHandler в горячем пути, вывод в отдельном потоке"""
+    global _listener
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(config.get("log_level", "INFO").upper())
+    for name, level in config.get("log_levels", {}).items():
+        get_logger(name).setLevel(level.upper())
+
+    if _listener is not None:
+        return _listener
+
+    if config.get("log_format", "json") == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root.handlers = [ExcQueueHandler(log_queue)]
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -1,116 +1,550 @@
 import time
-import schedule
-from datetime import time as dt_time
-from builder import build_url, get_config
+
+# Время импорта модулей считается для --once (см. run_once)
+IMPORT_START = time.perf_counter()
+
+import argparse
+import logging
+import sys
+from collections import defaultdict
+import metrics
+import liveness
+import ratelimit
+import salary
+import transport
+from log_config import get_logger, setup_logging
+from builder import build_url, get_config, get_searches
 from parser import (
     parse_vacancies_from_url, similarity_check, send_telegram_message,
     connect_db, is_vacancy_sent, mark_vacancy_sent, format_vacancy_message,
-    create_table_if_not_exists, send_statistics, get_time
+    create_table_if_not_exists, get_time, claim_vacancy, release_vacancy,
+    FetchBlocked, send_digest, claim_delivery, confirm_delivery, release_delivery, delivered_chats
+)
+from templates import is_digest
+from subscriptions import get_router
+from fingerprint import (
+    FingerprintIndex, create_fingerprint_table, find_repost, fingerprint, record_fingerprint
 )
+from checkpoint import (
+    create_checkpoint_table, load_checkpoint, save_checkpoint, resume_page, retry_pages, CycleResult, DONE
+)
+from stats import CycleStats, create_stats_tables, record_cycle
+from liveness import create_archived_table
+from memwatch import MemoryMonitor, rss_bytes
+from config_watch import ConfigWatcher
+from commands import CommandBot, CommandState
+from retention import run_retention
+from adaptive import AdaptiveInterval
+from cluster import LeaseCoordinator, create_cluster_tables, default_worker_id
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_START
 
+logger = get_logger('main')
 
-def schedule_stats(db_conn, config):
-    """Планировщик ежедневной статистики"""
-    if config.get("daily_stats", True):
-        schedule.every().day.at("00:00").do(
-            lambda: send_statistics(db_conn, config["bot_token"], config["chat_id"])
-        )
-        print("Ежедневная статистика запланирована на 00:00 по Москве")
 
-def job(db_conn, config):
-    print("🔍 Ищу вакансии...")
-    page = 0
-    new_found = False
+def deliver(db_conn, config, name, vacancies, subscription=None, cycle=None):
+    """Отправляет занятые вакансии в Telegram и подтверждает или снимает захват.
+
+    Без subscription вакансии уходят в основной чат config["chat_id"] и
+    учитываются в sent_vacancies, иначе - в чат подписки через chat_deliveries.
+    Для формата-сводки (compact) все вакансии страницы уходят одним сообщением.
+    Доставленные в основной чат вакансии учитываются в cycle (CycleStats).
+    Возвращает число доставленных вакансий.
+    """
+    if subscription is None:
+        chat_id, fmt = config["chat_id"], config.get("message_format", "html")
+    else:
+        chat_id, fmt = subscription.chat_id, subscription.message_format
+
+    if is_digest(fmt):
+        delivered = send_digest(config["bot_token"], chat_id, vacancies, fmt)
+    else:
+        delivered = [v for v in vacancies
+                     if send_telegram_message(config["bot_token"], chat_id, v, fmt)]
+
+    delivered_urls = {v['href'] for v in delivered}
+    for v in vacancies:
+        if v['href'] in delivered_urls:
+            if 'fingerprint' in v:
+                record_fingerprint(db_conn, v['href'], v['fingerprint'])
+            if subscription is None:
+                mark_vacancy_sent(db_conn, v['href'], v['title'], v['company'], name)
+                if cycle is not None:
+                    cycle.add_sent(v)
+            else:
+                confirm_delivery(db_conn, chat_id, v['href'])
+        else:
+            if subscription is None:
+                release_vacancy(db_conn, v['href'])
+            else:
+                release_delivery(db_conn, chat_id, v['href'])
+            logger.warning("❌ Не удалось отправить сообщение в телеграм",
+                           extra={'href': v['href'], 'chat_id': chat_id})
+    return len(delivered)
+
+def fetch_page(url, attempts=3, delay=2, stop_event=None):
+    """Вакансии страницы с повторами при ошибке загрузки (пауза delay, затем вдвое больше).
+
+    None - страница так и не загрузилась. FetchBlocked не повторяется: при
+    ограничении hh.ru повторный запрос только продлит паузу.
+    """
+    for attempt in range(attempts):
+        vacancies = parse_vacancies_from_url(url)
+        if vacancies is not None:
+            return vacancies
+        if attempt + 1 < attempts:
+            metrics.inc('page_retries_total')
+            wait = delay * 2 ** attempt
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return None
+            else:
+                time.sleep(wait)
+    return None
+
+def job(db_conn, config, stop_event=None):
+    name = config.get("name", config["search_text"])
+    interval_seconds = config.get("interval", 10) * 60
+    checkpoint = load_checkpoint(db_conn, name)
+    page = resume_page(checkpoint, interval_seconds)
+    if page:
+        logger.info("🔁 Продолжаю прерванный цикл %s со страницы %d", name, page)
+    else:
+        logger.info("🔍 Ищу вакансии: %s", name)
+    cycle_start = time.perf_counter()
+    digest = is_digest(config.get("message_format"))
+    router = get_router(config)
+    main_salary = (config.get("min_salary", 0), config.get("include_no_salary", True))
+    # Дешёвый отсев до нечёткого сравнения и БД: порог, который не пройдёт ни один чат
+    min_salary, include_no_salary = main_salary
+    if min_salary and router.subscriptions:
+        min_salary = min([min_salary] + [s.min_salary for s in router.subscriptions])
+        include_no_salary = include_no_salary or any(s.include_no_salary for s in router.subscriptions)
+    repost_dedup = config.get("repost_dedup", True)
+    repost_distance = config.get("repost_distance", 3)
+    seen = FingerprintIndex()
+    liveness_check = config.get("liveness_check", False)
+    # get_searches считает base_url заранее; иначе собираем его один раз на цикл
+    base_url = config.get("base_url") or build_url(
+        config["search_text"],
+        config["excluded_text"],
+        config["area_ids"],
+        config["experience"],
+        None
+    )
     vacancies_found_today = 0
-    
+    cycle = CycleStats(name)
+    result = CycleResult(name)
+    interrupted = False
+    attempts = max(1, config.get("page_attempts", 3))
+    max_failed = config.get("max_failed_pages", 3)
+    # Страницы, не загрузившиеся в прошлом цикле, запрашиваются первыми
+    pending = [p for p in retry_pages(checkpoint, interval_seconds) if p != page]
+    fetched = {}
+    failed_in_row = 0
+
     while True:
-        url = build_url(
-            config["search_text"], 
-            config["excluded_text"], 
-            config["area_ids"], 
-            config["experience"], 
-            page
-        )
-        
-        vacancies = parse_vacancies_from_url(url)
-        
-        if not vacancies:
-            print("❌ Вакансии не найдены/ошибка парсинга")
+        if stop_event is not None and stop_event.is_set():
+            interrupted = True
             break
-            
-        print(f"📄 Найдено {len(vacancies)} вакансий на странице {page}")
+
+        retrying = bool(pending)
+        current = pending.pop(0) if retrying else page
+        if retrying or current not in fetched:
+            url = f"{base_url}&page={current}"
+            try:
+                vacancies = fetch_page(url, attempts, config.get("page_retry_delay", 2), stop_event)
+            except FetchBlocked as e:
+                # Это не конец выдачи: страницу пройдём после паузы, начиная с неё
+                logger.warning("⛔ Цикл %s прерван ограничением hh.ru: %s", name, e)
+                if retrying:
+                    pending.insert(0, current)
+                interrupted = True
+                break
+
+            if vacancies is None:
+                result.failed_pages.append(current)
+                metrics.inc('pages_failed_total')
+                logger.warning("⚠️ Страница %d не загрузилась (попыток: %d)", current, attempts)
+                if retrying:
+                    continue
+                failed_in_row += 1
+                if failed_in_row >= max_failed:
+                    logger.warning("⛔ %d страниц подряд не загрузились, цикл %s завершён досрочно",
+                                   failed_in_row, name)
+                    break
+                page += 1
+                continue
+
+            failed_in_row = 0
+            fetched[current] = len(vacancies)
+            result.pages.append(current)
+        else:
+            # Страница уже загружена повторной попыткой в начале цикла
+            vacancies = []
+
+        if vacancies:
+            logger.info("📄 Найдено %d вакансий на странице %d", len(vacancies), current)
+        cycle.seen += len(vacancies)
         
+        # Сначала отбираются подходящие вакансии страницы, чтобы проверить
+        # закрытые одним пакетом, а затем они занимаются и отправляются
+        candidates = []
         for v in vacancies:
+            if stop_event is not None and stop_event.is_set():
+                interrupted = True
+                break
+
+            if not salary.salary_matches(v, min_salary, include_no_salary):
+                logger.debug("💸 Зарплата ниже порога: %s (%s)", v['title'], v.get('salary'))
+                continue
             is_similar, similarity_percent = similarity_check(config["search_text"], v, config["min_similarity"])
             
-            if is_similar:
-                if not is_vacancy_sent(db_conn, v['href']):
-                    print(f"✅ Новая вакансия: {v['title']} (схожесть: {similarity_percent}%)")
-
-                    success = send_telegram_message(config["bot_token"], config["chat_id"], v)
-                    if success:
-                        mark_vacancy_sent(db_conn, v['href'], v['title'], v['company'])
-                        new_found = True
-                        vacancies_found_today += 1
-                    else:
-                        print(f"❌ Не удалось отправить сообщение в телеграм")
+            if not is_similar:
+                logger.debug("❌ Не подходит: %s (схожесть: %s%%)", v['title'], similarity_percent)
+                continue
+
+            cycle.matched += 1
+            if repost_dedup:
+                v['fingerprint'] = fingerprint(v)
+                original = seen.find(v['fingerprint'], repost_distance, v['href']) or find_repost(
+                    db_conn, v['href'], v['fingerprint'], repost_distance, config.get("repost_window_days", 30))
+                if original:
+                    logger.debug("♻️ Повторная публикация: %s (как %s)", v['title'], original)
+                    metrics.inc('reposts_suppressed_total')
+                    continue
+                seen.add(v['href'], v['fingerprint'])
+
+            fresh = salary.salary_matches(v, *main_salary) and not is_vacancy_sent(db_conn, v['href'])
+            recipients = router.recipients(v, name)
+            if recipients:
+                # Чатам, которые уже получили вакансию, она не нужна - и проверять её для них незачем
+                delivered = delivered_chats(db_conn, v['href'])
+                recipients = [sub for sub in recipients if sub.chat_id not in delivered]
+            candidates.append((v, similarity_percent, fresh, recipients))
+
+        closed = set()
+        if liveness_check and not interrupted:
+            # Проверяются только вакансии, которые ещё кому-то не отправлены
+            closed = liveness.checker.closed(
+                db_conn, [v for v, _, fresh, recipients in candidates if fresh or recipients])
+
+        claimed = []
+        fanout = defaultdict(list)
+        for v, similarity_percent, fresh, recipients in candidates:
+            if stop_event is not None and stop_event.is_set():
+                interrupted = True
+                break
+
+            if v['href'] in closed:
+                logger.debug("🗄️ Вакансия закрыта: %s", v['title'], extra={'href': v['href']})
+                continue
+            if not salary.salary_matches(v, *main_salary):
+                logger.debug("💸 Ниже порога основного чата: %s", v['title'])
+            elif fresh and claim_vacancy(
+                    db_conn, v['href'], v['title'], v['company'], config.get("worker_id", ""), name):
+                logger.debug("✅ Новая вакансия: %s (схожесть: %s%%)", v['title'], similarity_percent,
+                             extra={'href': v['href'], 'score': similarity_percent})
+                if digest:
+                    claimed.append(v)
                 else:
-                    print(f"⏩ Уже отправлена: {v['title']} (схожесть: {similarity_percent}%)")
+                    vacancies_found_today += deliver(db_conn, config, name, [v], cycle=cycle)
             else:
-                print(f"❌ Не подходит: {v['title']} (схожесть: {similarity_percent}%)")
+                logger.debug("⏩ Уже отправлена: %s (схожесть: %s%%)", v['title'], similarity_percent)
+
+            for sub in recipients:
+                if claim_delivery(db_conn, sub.chat_id, v['href'], config.get("worker_id", "")):
+                    if sub.digest:
+                        fanout[sub].append(v)
+                    else:
+                        deliver(db_conn, config, name, [v], sub)
+
+        if claimed:
+            vacancies_found_today += deliver(db_conn, config, name, claimed, cycle=cycle)
+        for sub, sub_vacancies in fanout.items():
+            deliver(db_conn, config, name, sub_vacancies, sub)
 
-        if len(vacancies) < 20:
-            print("🏁 Последняя страница достигнута")
+        if interrupted:
+            if retrying:
+                pending.insert(0, current)
+            break
+        if retrying:
+            continue
+
+        if not fetched[current]:
+            logger.info("❌ Вакансии не найдены")
+            break
+        if fetched[current] < 20:
+            logger.info("🏁 Последняя страница достигнута")
             break
             
         page += 1
-        time.sleep(1) 
+        save_checkpoint(db_conn, name, page, failed_pages=result.failed_pages + pending)
+        time.sleep(config.get("page_delay", 0))
     
-    if new_found:
-        print(f"✅ Найдено {vacancies_found_today} новых вакансий!")
+    result.interrupted = interrupted
+    if interrupted:
+        # Текущую страницу пройдём заново после рестарта, дубли отсечёт БД
+        save_checkpoint(db_conn, name, page, failed_pages=result.failed_pages + pending)
+        logger.info("⏸️ Цикл %s остановлен на странице %d", name, page)
+    else:
+        save_checkpoint(db_conn, name, 0, DONE, result.failed_pages)
+    if result.failed_pages:
+        logger.warning("⚠️ Цикл %s: не загрузились страницы %s, они будут запрошены первыми в следующем цикле",
+                       name, ", ".join(map(str, sorted(set(result.failed_pages)))))
+
+    if vacancies_found_today:
+        logger.info("✅ Найдено %d новых вакансий!", vacancies_found_today)
     else:
-        print("ℹ️ Новых подходящих вакансий не найдено.")
+        logger.info("ℹ️ Новых подходящих вакансий не найдено.")
+
+    record_cycle(db_conn, cycle)
+    metrics.observe('cycle_duration_seconds', time.perf_counter() - cycle_start)
+    metrics.inc('cycles_total')
+    metrics.set_gauge('process_rss_bytes', rss_bytes())
+    metrics.inc('vacancies_sent_total', vacancies_found_today)
+    if config.get("metrics_file"):
+        metrics.dump_json(config["metrics_file"])
+    result.sent = vacancies_found_today
+    return result
+
+RATELIMIT_KEYS = ("hh_rate", "hh_burst", "hh_cooldown", "hh_max_cooldown")
+SALARY_KEYS = ("base_currency", "currency_rates", "currency_rates_ttl", "update_currency_rates")
+LIVENESS_KEYS = ("liveness_ttl", "liveness_concurrency")
+LOGGING_KEYS = ("log_level", "log_levels")
+# Настройки, которые читаются один раз в main(): их изменение требует перезапуска
+RESTART_KEYS = (
+    "log_format", "metrics_port", "cluster", "worker_id", "lease_ttl", "adaptive_interval",
+    "memory_diagnostics", "memory_top", "memory_report_interval",
+    "commands", "command_chats", "commands_poll_timeout",
+)
+
+def apply_config(old, new, coordinator=None):
+    """Поиски нового конфига; общие лимитеры, курсы валют и кэш проверки вакансий
+    перестраиваются, только если изменились их настройки, иначе их состояние сохраняется.
+    Уровни логов применяются сразу, про настройки из RESTART_KEYS выводится предупреждение"""
+    if any(old.get(key) != new.get(key) for key in RATELIMIT_KEYS):
+        ratelimit.configure(new)
+    if any(old.get(key) != new.get(key) for key in SALARY_KEYS):
+        salary.configure(new)
+    if any(old.get(key) != new.get(key) for key in LIVENESS_KEYS):
+        liveness.configure(new)
+    if any(old.get(key) != new.get(key) for key in LOGGING_KEYS):
+        # Подсистемы, убранные из log_levels, снова наследуют общий уровень
+        for name in set(old.get("log_levels", {})) - set(new.get("log_levels", {})):
+            get_logger(name).setLevel(logging.NOTSET)
+        setup_logging(new)
+
+    restart = [key for key in RESTART_KEYS if old.get(key) != new.get(key)]
+    if old.get("commands") and old.get("bot_token") != new.get("bot_token"):
+        restart.append("bot_token")  # Сообщения уходят с новым токеном, команды - со старым
+    if restart:
+        logger.warning("⚠️ Изменения %s применятся только после перезапуска", ", ".join(restart))
+
+    searches = get_searches(new)
+    if coordinator:
+        for search in searches:
+            search["worker_id"] = coordinator.worker_id
+        coordinator.total_searches = len(searches)
+    return searches
+
+def prepare_db(db_conn, config):
+    """Создаёт и обновляет таблицы перед первым циклом"""
+    create_table_if_not_exists(db_conn)
+    create_checkpoint_table(db_conn)
+    create_fingerprint_table(db_conn)
+    create_stats_tables(db_conn)
+    create_archived_table(db_conn)
+    if config.get("cluster"):
+        create_cluster_tables(db_conn)
 
 def main():
     config = get_config()
+    setup_logging(config)
 
     if not config["bot_token"] or not config["chat_id"]:
-        print("❌ Ошибка: Сначала запустите builder.py для настройки конфигурации!")
+        logger.error("❌ Ошибка: Сначала запустите builder.py для настройки конфигурации!")
         return
     
-    print("⚙️ Конфиг загружен из config.json")
-    print(f"🔍 Поиск: {config['search_text']}")
-    print(f"⏱️ Интервал проверки: {config['interval']} минут")
-    print(f"📊 Ежедневная статистика: {'ВКЛ' if config.get('daily_stats', True) else 'ВЫКЛ'}")
+    searches = get_searches(config)
+    ratelimit.configure(config)
+    salary.configure(config)
+    liveness.configure(config)
+    logger.info("⚙️ Конфиг загружен из config.json")
+    for search in searches:
+        logger.info("🔍 Поиск: %s, интервал проверки: %s минут", search['search_text'], search['interval'])
+    logger.info("📊 Ежедневная статистика: %s", 'ВКЛ' if config.get('daily_stats', True) else 'ВЫКЛ')
 
     db_conn = connect_db()
     if db_conn:
-        create_table_if_not_exists(db_conn)
+        prepare_db(db_conn, config)
+        db_conn.close()
     else:
-        print("⚠️ Не удалось подключиться к БД, работаю без сохранения истории!")
+        logger.warning("⚠️ Не удалось подключиться к БД, работаю без сохранения истории!")
     
-    print("🚀 Запускаю мониторинг...")
-    print(f"🕐 Текущее время по Москве: {get_time().strftime('%H:%M:%S')}")
+    logger.info("🚀 Запускаю мониторинг...")
+    logger.info("🕐 Текущее время по Москве: %s", get_time().strftime('%H:%M:%S'))
+
+    if config.get("metrics_port"):
+        metrics.start_http_server(config["metrics_port"])
 
+    cycle_job = job
+    coordinator = None
+    if config.get("cluster") and db_conn:
+        worker_id = config.get("worker_id") or default_worker_id()
+        for search in searches:
+            search["worker_id"] = worker_id
+        coordinator = LeaseCoordinator(worker_id, len(searches), config.get("lease_ttl") or None)
+        cycle_job = coordinator.wrap(job)
+        logger.info("🤝 Режим кластера, воркер %s", worker_id)
 
-    def scheduled_job():
-        job(db_conn, config)
+    watcher = ConfigWatcher(config)
 
-    schedule.every(config["interval"]).minutes.do(scheduled_job)
+    def reload():
+        old = watcher.config
+        new = watcher.poll()
+        if new is None:
+            return None
+        return new, apply_config(old, new, coordinator)
 
-    schedule_stats(db_conn, config)
+    if config.get("memory_diagnostics"):
+        monitor = MemoryMonitor(config.get("memory_top", 10), config.get("memory_report_interval", 600))
+        monitor.start()
+        cycle_job = monitor.wrap(cycle_job)
+        logger.info("🧠 Диагностика памяти включена (tracemalloc)")
 
-    scheduled_job()
+    bot = None
+    if config.get("commands"):
+        state = CommandState()
+        cycle_job = state.wrap(cycle_job)
+        bot = CommandBot(config, state, lambda: scheduler.searches, config.get("commands_poll_timeout", 10))
+        logger.info("🤖 Команды бота включены")
 
+    # asyncio и планировщик нужны только долгоживущему процессу, не --once/--replay
+    import asyncio
+    from scheduler import Scheduler
+
+    interval_policy = AdaptiveInterval() if config.get("adaptive_interval") else None
+    scheduler = Scheduler(cycle_job, searches, config, connect_db if db_conn else None,
+                          interval_policy, run_retention, reload, bot)
+    logger.info("⏱️ Запуск занял %.3f с (импорт модулей %.3f с)",
+                time.perf_counter() - IMPORT_START, IMPORT_SECONDS)
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        asyncio.run(scheduler.run())
     except KeyboardInterrupt:
-        print("\n🛑 Завершаю работу...")
+        pass
+    finally:
+        logger.info("🛑 Завершаю работу...")
+        if coordinator:
+            release_conn = connect_db()
+            coordinator.release_all(release_conn)
+            if release_conn:
+                release_conn.close()
+
+def run_profile(args):
+    """Один цикл job() под профайлером (--profile-cycle)"""
+    from profiling import profile_cycle
+
+    config = get_config()
+    setup_logging(config)
+    # Профилируется первый поиск в том виде, в каком его получает планировщик
+    search = get_searches(config)[0]
+    if args.fixture:
+        search.update(page_delay=0, page_retry_delay=0, page_attempts=1)
+
+    db_conn = None if args.fixture else connect_db()
+    try:
+        report = profile_cycle(sys.modules[__name__], db_conn, search, args.profile_out, args.fixture)
+        sys.stdout.write(report + "\n")
+    finally:
+        if db_conn:
+            db_conn.close()
+
+def run_replay(args):
+    """Полный прогон job() по всем поискам из архива запросов (--replay), без сети и БД"""
+    config = get_config()
+    setup_logging(config)
+    # Ответы берутся из архива, беречь hh.ru не от чего
+    ratelimit.configure({"hh_rate": 1e9, "hh_burst": 1e9})
+    salary.configure(config)
+    replay = transport.ReplayTransport(args.replay)
+    previous = transport.install(replay)
+    start = time.perf_counter()
+    try:
+        for search in get_searches(config):
+            # Повтор запроса из архива даст тот же ответ, паузы только исказят замер
+            search.update(page_delay=0, page_retry_delay=0, page_attempts=1)
+            job(None, search)
+    finally:
+        transport.install(previous)
+        replay.close()
+    elapsed = time.perf_counter() - start
+    counters = defaultdict(float)
+    for counter in metrics.snapshot()['counters']:
+        counters[counter['name']] += counter['value']
+    logger.info("⏱️ Прогон из архива: %.3f с, страниц: %d, отправлено: %d", elapsed,
+                counters['hh_pages_parsed_total'], counters['vacancies_sent_total'])
+    return elapsed
+
+def run_once(args):
+    """Один цикл каждого поиска и выход (--once); замеряет импорт, запуск и цикл"""
+    config = get_config()
+    setup_logging(config)
+    if not config["bot_token"] or not config["chat_id"]:
+        logger.error("❌ Ошибка: Сначала запустите builder.py для настройки конфигурации!")
+        return 1
+    ratelimit.configure(config)
+    salary.configure(config)
+    liveness.configure(config)
+
+    db_conn = connect_db()
+    if db_conn:
+        prepare_db(db_conn, config)
+    startup = time.perf_counter() - IMPORT_START
+    metrics.set_gauge('import_seconds', IMPORT_SECONDS)
+    metrics.set_gauge('startup_seconds', startup)
+
+    sent = 0
+    start = time.perf_counter()
+    try:
+        for search in get_searches(config):
+            result = job(db_conn, search)
+            if result is not None:
+                sent += result.sent
     finally:
         if db_conn:
             db_conn.close()
+    logger.info("⏱️ Импорт модулей %.3f с, запуск %.3f с, цикл %.3f с, отправлено: %d",
+                IMPORT_SECONDS, startup, time.perf_counter() - start, sent)
+    return 0
+
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Мониторинг вакансий hh.ru")
+    arg_parser.add_argument("--profile-cycle", action="store_true",
+                            help="прогнать один цикл под профайлером и выйти")
+    arg_parser.add_argument("--profile-out", default="profile",
+                            help="префикс файлов профиля (.prof, .txt, .collapsed)")
+    arg_parser.add_argument("--fixture",
+                            help="каталог с сохранёнными страницами выдачи вместо hh.ru")
+    arg_parser.add_argument("--record", metavar="ARCHIVE",
+                            help="записывать все запросы к hh.ru и Telegram в архив (.jsonl.gz)")
+    arg_parser.add_argument("--replay", metavar="ARCHIVE",
+                            help="прогнать по одному циклу каждого поиска по архиву и выйти")
+    arg_parser.add_argument("--once", action="store_true",
+                            help="прогнать по одному циклу каждого поиска и выйти")
+    return arg_parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    if args.profile_cycle:
+        run_profile(args)
+    elif args.replay:
+        run_replay(args)
+    else:
+        if args.record:
+            transport.install(transport.RecordingTransport(args.record))
+        try:
+            code = run_once(args) if args.once else main()
+        finally:
+            transport.current.close()
+        sys.exit(code)
\ No newline at end of file
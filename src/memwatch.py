@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+import tracemalloc
+
+import metrics
+from log_config import get_logger
+
+logger = get_logger('memwatch')
+
+
+def rss_bytes():
+    """Текущий RSS процесса (Linux: /proc/self/statm), иначе пиковый из getrusage"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryMonitor:
+    """Диагностика роста памяти между циклами на tracemalloc.
+
+    После цикла (не чаще раза в interval секунд) снимается снимок и в лог
+    пишутся top строк кода с наибольшим приростом выделенной памяти
+    относительно предыдущего снимка. tracemalloc замедляет выделение памяти,
+    поэтому монитор включается только настройкой memory_diagnostics.
+    """
+
+    def __init__(self, top=10, interval=600, frames=1, clock=time.monotonic):
+        self.top = top
+        self.interval = interval
+        self.frames = frames
+        self.clock = clock
+        self._previous = None
+        self._last = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._previous = self._snapshot()
+        self._last = self.clock()
+
+    def _snapshot(self):
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def report(self, force=False):
+        """Пишет в лог top прироста; возвращает список StatisticDiff (или None, если рано)"""
+        with self._lock:
+            if self._previous is None:
+                return None
+            if not force and self.clock() - self._last < self.interval:
+                return None
+            snapshot = self._snapshot()
+            diff = [d for d in snapshot.compare_to(self._previous, 'lineno') if d.size_diff > 0]
+            self._previous = snapshot
+            self._last = self.clock()
+
+        current, peak = tracemalloc.get_traced_memory()
+        metrics.set_gauge('tracemalloc_current_bytes', current)
+        logger.info("🧠 Память: RSS %.1f МБ, tracemalloc %.1f МБ (пик %.1f МБ)",
+                    rss_bytes() / 2**20, current / 2**20, peak / 2**20)
+        for stat in diff[:self.top]:
+            frame = stat.traceback[0]
+            logger.info("  +%.1f КБ (%+d блоков) %s:%d", stat.size_diff / 1024, stat.count_diff,
+                        frame.filename, frame.lineno)
+        return diff[:self.top]
+
+    def wrap(self, job):
+        def monitored_job(db_conn, search, stop_event=None):
+            try:
+                return job(db_conn, search, stop_event)
+            finally:
+                self.report()
+        return monitored_job
@@ -0,0 +1,154 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from log_config import get_logger
+
+logger = get_logger('metrics')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def inc(name, value=1, **labels):
+    """Увеличивает счётчик"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    """Устанавливает значение gauge-метрики"""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    """Добавляет наблюдение в гистограмму"""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = {'buckets': [0] * len(DEFAULT_BUCKETS), 'sum': 0.0, 'count': 0}
+            _histograms[key] = hist
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                hist['buckets'][i] += 1
+        hist['sum'] += value
+        hist['count'] += 1
+
+
+@contextmanager
+def timer(name, **labels):
+    """Замеряет время выполнения блока и пишет его в гистограмму"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def reset():
+    """Сбрасывает все метрики"""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + list(extra or [])
+    if not items:
+        return ""
+    inner = ",".join(f'{k}="{str(v)}"' for k, v in items)
+    return "{" + inner + "}"
+
+
+def render_prometheus():
+    """Метрики в текстовом формате Prometheus"""
+    lines = []
+    with _lock:
+        for (name, labels), value in sorted(_counters.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(_gauges.items()):
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), hist in sorted(_histograms.items()):
+            for bound, count in zip(DEFAULT_BUCKETS, hist['buckets']):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """Метрики в виде словаря (для JSON)"""
+    def pack(items, value_fn):
+        result = []
+        for (name, labels), value in sorted(items):
+            result.append({'name': name, 'labels': dict(labels), **value_fn(value)})
+        return result
+
+    with _lock:
+        return {
+            'counters': pack(_counters.items(), lambda v: {'value': v}),
+            'gauges': pack(_gauges.items(), lambda v: {'value': v}),
+            'histograms': pack(_histograms.items(), lambda h: {
+                'count': h['count'],
+                'sum': h['sum'],
+                'buckets': dict(zip(map(str, DEFAULT_BUCKETS), h['buckets'])),
+            }),
+        }
+
+
+def dump_json(path):
+    """Сохраняет снимок метрик в JSON файл"""
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot(), f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        logger.error("Ошибка сохранения метрик: %s", e)
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """Запускает HTTP эндпоинт /metrics в фоновом потоке"""
+    # http.server нужен только при включённом metrics_port
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics.json'):
+                body = json.dumps(snapshot(), ensure_ascii=False).encode('utf-8')
+                content_type = 'application/json'
+            elif self.path.startswith('/metrics'):
+                body = render_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except Exception as e:
+        logger.error("Ошибка запуска сервера метрик: %s", e)
+        return None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logger.info("Метрики доступны на http://%s:%s/metrics", host, port)
+    return server
@@ -1,143 +1,97 @@
 import json
-import requests
-from bs4 import BeautifulSoup
-from fuzzywuzzy import fuzz
-import mysql.connector
+import re
 import datetime
 from datetime import timezone, timedelta
+from urllib.parse import urlparse
+import metrics
+import ratelimit
+import transport
+from ratelimit import FetchBlocked
+from log_config import get_logger
+from salary import looks_like_salary, normalize_salary
+from templates import (
+    render_vacancy, vacancy_payload, digest_payloads, encode_payload
+)
+
+logger = get_logger('parser')
+
+TELEGRAM_API_URL = 'https://api.telegram.org'
+JSON_HEADERS = {'Content-Type': 'application/json'}
+VACANCY_ID_RE = re.compile(r'/vacancy/(\d+)')
+HH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+}
 
 def get_time():
     """Получаем текущее время"""
     tz = timezone(timedelta(hours=3))
     return datetime.datetime.now(tz)
 
-def collect_statistics(db_conn):
-    """Сбор ежедневной статистики"""
-    if db_conn is None:
-        print("БД не подключена - статистика недоступна")
-        return None
-        
-    cursor = db_conn.cursor()
-    try:
-        cursor.execute("""
-            SELECT COUNT(*) as total_today 
-            FROM sent_vacancies 
-            WHERE DATE(sent_date) = CURDATE()
-        """)
-        total_today = cursor.fetchone()[0]
-
-        cursor.execute("""
-            SELECT COUNT(*) as total_yesterday 
-            FROM sent_vacancies 
-            WHERE DATE(sent_date) = DATE_SUB(CURDATE(), INTERVAL 1 DAY)
-        """)
-        total_yesterday = cursor.fetchone()[0]
-
-        cursor.execute("""
-            SELECT company, COUNT(*) as count 
-            FROM sent_vacancies 
-            WHERE DATE(sent_date) = CURDATE()
-            GROUP BY company 
-            ORDER BY count DESC 
-            LIMIT 5
-        """)
-        top_companies = cursor.fetchall()
-
-        cursor.execute("SELECT COUNT(*) FROM sent_vacancies")
-        total_all = cursor.fetchone()[0]
-        
-        return {
-            'total_today': total_today,
-            'total_yesterday': total_yesterday,
-            'top_companies': top_companies,
-            'total_all': total_all,
-            'date': get_time().strftime('%d.%m.%Y')
-        }
-    except Exception as e:
-        print(f"Ошибка сбора статистики: {e}")
-        return None
-    finally:
-        cursor.close()
+def is_captcha_page(response):
+    """hh.ru отдаёт капчу с кодом 200 - такая страница парсится в 0 вакансий"""
+    if 'captcha' in response.url.lower():
+        return True
+    text = response.text
+    return 'vacancy-serp' not in text and 'captcha' in text.lower()
 
-def format_statistics_message(stats):
-    """Форматирование сообщения со статистикой"""
-    if not stats:
-        return "❌ Не удалось собрать статистику"
-    
-    message = f"📊 <b>Статистика за {stats['date']}</b>\n\n"
-
-    diff = stats['total_today'] - stats['total_yesterday']
-    if diff > 0:
-        trend = f"📈 +{diff}"
-    elif diff < 0:
-        trend = f"📉 {diff}"
-    else:
-        trend = "➡️ 0"
-    
-    message += f"<b>Сегодня найдено:</b> {stats['total_today']} вакансий {trend}\n"
-    message += f"<b>Всего в базе:</b> {stats['total_all']} вакансий\n\n"
-
-    if stats['top_companies']:
-        message += "<b>🏢 Топ компаний сегодня:</b>\n"
-        for i, (company, count) in enumerate(stats['top_companies'], 1):
-            message += f"{i}. {company}: {count} вакансий\n"
-    else:
-        message += "<i>Сегодня вакансий не найдено</i>\n"
-    
-    message += f"\n⏰ Отчет сгенерирован: {get_time().strftime('%H:%M')}"
-    
-    return message
+def _retry_after(response):
+    value = response.headers.get('Retry-After', '')
+    return int(value) if value.isdigit() else None
+
+def html_from_urlfetch_(url):
+    host = urlparse(url).netloc
+    if not ratelimit.breaker.allow(host):
+        raise FetchBlocked(host, ratelimit.breaker.retry_in(host))
+    ratelimit.limiter(host).acquire()
 
-def send_statistics(db_conn, bot_token, chat_id):
-    """Отправка ежедневной статистики"""
     try:
-        stats = collect_statistics(db_conn)
-        if stats is None:
-            return False
-            
-        message = format_statistics_message(stats)
-        
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        payload = {
-            'chat_id': chat_id,
-            'text': message,
-            'parse_mode': 'HTML'
-        }
-        
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-        
-        print(f"Ежедневная статистика отправлена в {get_time().strftime('%H:%M')}")
-        return True
-        
+        with metrics.timer('hh_fetch_seconds', host=host):
+            response = transport.get(url, headers=HH_HEADERS, timeout=10)
     except Exception as e:
-        print(f"Ошибка отправки статистики: {e}")
-        return False
+        ratelimit.breaker.record_error(host)
+        metrics.inc('hh_fetch_errors_total', host=host)
+        logger.error("Ошибка загрузки HTML: %s", e, extra={'url': url})
+        return None
+
+    metrics.inc('hh_fetch_total', host=host, status=response.status_code)
+    if response.status_code in (403, 429) or (response.ok and is_captcha_page(response)):
+        metrics.inc('hh_throttled_total', host=host)
+        cooldown = ratelimit.breaker.record_throttle(host, _retry_after(response))
+        raise FetchBlocked(host, cooldown)
 
-def html_from_urlfetch_(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-    }
-    
     try:
-        response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status()
-        return response.text
     except Exception as e:
-        print(f"Ошибка загрузки HTML: {e}")
+        ratelimit.breaker.record_error(host)
+        metrics.inc('hh_fetch_errors_total', host=host)
+        logger.error("Ошибка загрузки HTML: %s", e, extra={'url': url})
         return None
 
+    ratelimit.breaker.record_success(host)
+    return response.text
+
 def parse_vacancies_html(html_content):
     if html_content is None:
         return []
         
+    from bs4 import BeautifulSoup
+
+    metrics.inc('hh_pages_parsed_total')
     soup = BeautifulSoup(html_content, 'html.parser')
+    try:
+        return _extract_vacancies(soup)
+    finally:
+        # Узлы дерева ссылаются друг на друга (parent/next_element), без decompose
+        # страницу освободит только циклический сборщик мусора
+        soup.decompose()
+
+def _extract_vacancies(soup):
     vacancies = []
 
     vacancy_blocks = soup.select('[data-qa="vacancy-serp__vacancy"]')
     
-    print(f"Найдено блоков вакансий: {len(vacancy_blocks)}")
+    logger.debug("Найдено блоков вакансий: %d", len(vacancy_blocks))
 
     for block in vacancy_blocks:
         try:
@@ -149,7 +103,7 @@ def parse_vacancies_html(html_content):
             title = title_tag.get_text(strip=True)
             
             #ссылка
-            href = title_tag.get('href', '')
+            href = str(title_tag.get('href', ''))
             if href and 'hh.ru' not in href:
                 href = 'https://hh.ru' + href.split('?')[0]
 
@@ -162,7 +116,7 @@ def parse_vacancies_html(html_content):
             salary_tags = block.select('.magritte-text_typography-label-1-regular___pi3R-_4-2-3')
             for tag in salary_tags:
                 text = tag.get_text(strip=True)
-                if 'Br' in text or 'руб' in text.lower():
+                if looks_like_salary(text):
                     salary = text
                     break
 
@@ -185,24 +139,33 @@ def parse_vacancies_html(html_content):
                 'experience': experience,
                 'description': "" 
             }
+            vacancy_data.update(normalize_salary(salary))
 
             vacancies.append(vacancy_data)
-            print(f"{title} - {company}")
+            logger.debug("%s - %s", title, company)
 
         except Exception as e:
-            print(f"Ошибка парсинга вакансии: {e}")
+            logger.warning("Ошибка парсинга вакансии: %s", e)
             continue
 
     return vacancies
 
+def vacancy_id(href):
+    """Числовой id вакансии из ссылки вида https://hh.ru/vacancy/123 (0, если не найден)"""
+    match = VACANCY_ID_RE.search(href or "")
+    return int(match.group(1)) if match else 0
+
 def parse_vacancies_from_url(url):
+    """Вакансии страницы; None - страницу не удалось загрузить (в отличие от пустой выдачи)"""
     html = html_from_urlfetch_(url)
-    if html:
-        return parse_vacancies_html(html)
-    return []
+    if html is None:
+        return None
+    return parse_vacancies_html(html)
 
 def similarity_check(search_text, vacancy_data, threshold=70):
     """Проверяет схожесть вакансии с поисковым запросом"""
+    from fuzzywuzzy import fuzz
+
     title = vacancy_data.get('title', '')
     company = vacancy_data.get('company', '')
     description = vacancy_data.get('description', '')
@@ -214,65 +177,104 @@ def similarity_check(search_text, vacancy_data, threshold=70):
     max_score = max(title_score, company_score, desc_score)
 
     is_similar = max_score >= threshold
+    metrics.inc('hh_vacancies_scored_total')
     return is_similar, max_score
 
-def format_vacancy_message(vacancy):
-    message = f"<b>{vacancy['title']}</b>\n"
-    message += f"🏢 <b>Компания:</b> {vacancy['company']}\n"
-    
-    if vacancy.get('salary'):
-        message += f"💰 <b>Зарплата:</b> {vacancy['salary']}\n"
-    
-    if vacancy.get('address'):
-        message += f"📍 <b>Адрес:</b> {vacancy['address']}\n"
-    
-    if vacancy.get('experience'):
-        message += f"📊 <b>Опыт:</b> {vacancy['experience']}\n"
-    
-    message += f"🔗 <a href='{vacancy['href']}'>Ссылка на вакансию</a>"
-    
-    return message
+def format_vacancy_message(vacancy, fmt='html'):
+    return render_vacancy(vacancy, fmt)
 
-def send_telegram_message(bot_token, chat_id, vacancy):
+def send_payload(bot_token, payload, kind='vacancy'):
+    """Отправляет заранее собранный payload (dict или байты из encode_payload)"""
+    body = payload if isinstance(payload, bytes) else encode_payload(payload)
+    url = f"{TELEGRAM_API_URL}/bot{bot_token}/sendMessage"
+    with metrics.timer('telegram_send_seconds'):
+        response = transport.post(url, data=body, headers=JSON_HEADERS, timeout=10)
+    metrics.inc('telegram_sends_total', kind=kind, status=response.status_code)
+    response.raise_for_status()
+
+def send_telegram_message(bot_token, chat_id, vacancy, fmt='html'):
     try:
-        message = format_vacancy_message(vacancy)
-        
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        
-        payload = {
-            'chat_id': chat_id,
-            'text': message,
-            'parse_mode': 'HTML',
-            'disable_web_page_preview': False
-        }
-        
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-        
-        print(f"Сообщение отправлено в Telegram: {vacancy['title']}")
+        send_payload(bot_token, vacancy_payload(chat_id, vacancy, fmt))
+        logger.debug("Сообщение отправлено в Telegram: %s", vacancy['title'])
         return True
         
     except Exception as e:
-        print(f"Ошибка отправки в Telegram: {e}")
+        logger.error("Ошибка отправки в Telegram: %s", e)
         return False
 
+def send_digest(bot_token, chat_id, vacancies, fmt='compact'):
+    """Сводка вакансий; возвращает вакансии из успешно отправленных сообщений"""
+    delivered = []
+    for payload, chunk in digest_payloads(chat_id, vacancies, fmt):
+        try:
+            send_payload(bot_token, payload, kind='digest')
+            delivered.extend(chunk)
+        except Exception as e:
+            logger.error("Ошибка отправки сводки в Telegram: %s", e)
+    return delivered
+
+def _mysql():
+    """mysql.connector импортируется при первом обращении к БД, а не при импорте модуля"""
+    import mysql.connector
+    return mysql.connector
+
 def connect_db():
     try:
-        conn = mysql.connector.connect(
+        conn = _mysql().connect(
             host='localhost',
             user='chuhan',
             password='pass',
             database='headhunter_db'
         )
-        print("Успешное подключение к БД")
+        logger.info("Успешное подключение к БД")
         return conn
     except Exception as e:
-        print(f"Ошибка подключения к БД: {e}")
+        logger.error("Ошибка подключения к БД: %s", e)
         return None
 
+# Колонки, добавленные после первой версии схемы: (таблица, колонка, определение)
+SCHEMA_COLUMNS = [
+    ("sent_vacancies", "status", "VARCHAR(16) NOT NULL DEFAULT 'sent'"),
+    ("sent_vacancies", "claimed_by", "VARCHAR(64)"),
+    ("sent_vacancies", "search_name", "VARCHAR(255)"),
+]
+
+# Индексы к колонкам выше: (таблица, имя, колонки)
+SCHEMA_INDEXES = [
+    ("sent_vacancies", "idx_search_date", "search_name, sent_date"),
+    ("sent_vacancies", "idx_sent_date", "sent_date"),
+    ("chat_deliveries", "idx_delivery_date", "sent_date"),
+]
+
+# Доставки дополнительным подпискам: дедупликация по паре (чат, вакансия)
+CHAT_DELIVERIES_TABLE = """
+CREATE TABLE IF NOT EXISTS chat_deliveries (
+    chat_id VARCHAR(64) NOT NULL,
+    url VARCHAR(500) NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    claimed_by VARCHAR(64),
+    sent_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chat_id, url)
+)
+"""
+
+def _add_column(cursor, table, column, definition):
+    try:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    except _mysql().Error as e:
+        if e.errno != 1060:  # ER_DUP_FIELDNAME - колонка уже есть
+            raise
+
+def _add_index(cursor, table, name, columns):
+    try:
+        cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+    except _mysql().Error as e:
+        if e.errno != 1061:  # ER_DUP_KEYNAME - индекс уже есть
+            raise
+
 def create_table_if_not_exists(db_conn):
     if db_conn is None:
-        print("Нет подключения к БД")
+        logger.warning("Нет подключения к БД")
         return
         
     cursor = db_conn.cursor()
@@ -282,48 +284,194 @@ def create_table_if_not_exists(db_conn):
         url VARCHAR(500) UNIQUE NOT NULL,
         title VARCHAR(500),
         company VARCHAR(255),
-        sent_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        sent_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        status VARCHAR(16) NOT NULL DEFAULT 'sent',
+        claimed_by VARCHAR(64),
+        search_name VARCHAR(255)
     )
     """
     try:
         cursor.execute(create_table_query)
+        cursor.execute(CHAT_DELIVERIES_TABLE)
+        for table, column, definition in SCHEMA_COLUMNS:
+            _add_column(cursor, table, column, definition)
+        for table, name, columns in SCHEMA_INDEXES:
+            _add_index(cursor, table, name, columns)
         db_conn.commit()
-        print("Таблица sent_vacancies создана или уже существует")
+        logger.info("Таблица sent_vacancies создана или уже существует")
     except Exception as e:
-        print(f"Ошибка создания таблицы: {e}")
+        logger.error("Ошибка создания таблицы: %s", e)
     finally:
         cursor.close()
 
 def is_vacancy_sent(db_conn, url):
+    """Отправлена ли вакансия в основной чат; pending-захваты не считаются -
+    зависшие из них перехватывает claim_vacancy"""
     if db_conn is None:
         return False
         
     cursor = db_conn.cursor()
     try:
-        cursor.execute("SELECT id FROM sent_vacancies WHERE url = %s", (url,))
+        metrics.inc('db_round_trips_total', query='is_vacancy_sent')
+        cursor.execute("SELECT id FROM sent_vacancies WHERE url = %s AND status = 'sent'", (url,))
         result = cursor.fetchone()
         return result is not None
     except Exception as e:
-        print(f"Ошибка проверки вакансии в БД: {e}")
+        logger.error("Ошибка проверки вакансии в БД: %s", e)
         return False
     finally:
         cursor.close()
 
-def mark_vacancy_sent(db_conn, url, title="", company=""):
+def mark_vacancy_sent(db_conn, url, title="", company="", search_name=""):
     if db_conn is None:
         return
         
     cursor = db_conn.cursor()
     try:
+        # Строка могла быть заранее занята claim_vacancy - тогда только подтверждаем отправку
+        metrics.inc('db_round_trips_total', query='mark_vacancy_sent')
+        cursor.execute("UPDATE sent_vacancies SET status = 'sent' WHERE url = %s", (url,))
+        if cursor.rowcount == 0:
+            metrics.inc('db_round_trips_total', query='mark_vacancy_sent')
+            cursor.execute(
+                "INSERT INTO sent_vacancies (url, title, company, search_name) VALUES (%s, %s, %s, %s)", 
+                (url, title, company, search_name)
+            )
+        db_conn.commit()
+        logger.debug("Вакансия добавлена в БД: %s", title)
+    except _mysql().errors.IntegrityError:
+        pass 
+    except Exception as e:
+        logger.error("Ошибка добавления в БД: %s", e)
+    finally:
+        cursor.close()
+
+def claim_vacancy(db_conn, url, title="", company="", worker_id="", search_name="", stale_after=300):
+    """Атомарно занимает вакансию перед отправкой (строка со статусом pending).
+
+    Возвращает True, если вакансию можно отправлять этому процессу. Зависшие
+    pending-строки (процесс упал между захватом и отправкой) перехватываются
+    через stale_after секунд.
+    """
+    if db_conn is None:
+        return True
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='claim_vacancy')
         cursor.execute(
-            "INSERT INTO sent_vacancies (url, title, company) VALUES (%s, %s, %s)", 
-            (url, title, company)
+            "INSERT INTO sent_vacancies (url, title, company, status, claimed_by, search_name) "
+            "VALUES (%s, %s, %s, 'pending', %s, %s)",
+            (url, title, company, worker_id, search_name)
+        )
+        db_conn.commit()
+        return True
+    except _mysql().errors.IntegrityError:
+        metrics.inc('db_round_trips_total', query='claim_vacancy')
+        cursor.execute(
+            "UPDATE sent_vacancies SET claimed_by = %s, sent_date = NOW() "
+            "WHERE url = %s AND status = 'pending' AND sent_date < NOW() - INTERVAL %s SECOND",
+            (worker_id, url, stale_after)
+        )
+        db_conn.commit()
+        return cursor.rowcount == 1
+    except Exception as e:
+        logger.error("Ошибка захвата вакансии в БД: %s", e)
+        return False
+    finally:
+        cursor.close()
+
+def release_vacancy(db_conn, url):
+    """Снимает захват, если отправить вакансию не удалось (повторим в следующем цикле)"""
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='release_vacancy')
+        cursor.execute("DELETE FROM sent_vacancies WHERE url = %s AND status = 'pending'", (url,))
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка снятия захвата вакансии: %s", e)
+    finally:
+        cursor.close()
+
+def claim_delivery(db_conn, chat_id, url, worker_id="", stale_after=300):
+    """Занимает доставку вакансии в чат подписки; False - уже отправлена или занята"""
+    if db_conn is None:
+        return True
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='claim_delivery')
+        cursor.execute(
+            "INSERT INTO chat_deliveries (chat_id, url, claimed_by) VALUES (%s, %s, %s)",
+            (chat_id, url, worker_id)
+        )
+        db_conn.commit()
+        return True
+    except _mysql().errors.IntegrityError:
+        metrics.inc('db_round_trips_total', query='claim_delivery')
+        cursor.execute(
+            "UPDATE chat_deliveries SET claimed_by = %s, sent_date = NOW() "
+            "WHERE chat_id = %s AND url = %s AND status = 'pending' "
+            "AND sent_date < NOW() - INTERVAL %s SECOND",
+            (worker_id, chat_id, url, stale_after)
+        )
+        db_conn.commit()
+        return cursor.rowcount == 1
+    except Exception as e:
+        logger.error("Ошибка захвата доставки в БД: %s", e)
+        return False
+    finally:
+        cursor.close()
+
+def delivered_chats(db_conn, url):
+    """Чаты подписок, которым вакансия уже отправлена"""
+    if db_conn is None:
+        return set()
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='delivered_chats')
+        cursor.execute("SELECT chat_id FROM chat_deliveries WHERE url = %s AND status = 'sent'", (url,))
+        return {str(row[0]) for row in cursor.fetchall()}
+    except Exception as e:
+        logger.error("Ошибка проверки доставок в БД: %s", e)
+        return set()
+    finally:
+        cursor.close()
+
+def confirm_delivery(db_conn, chat_id, url):
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='confirm_delivery')
+        cursor.execute(
+            "UPDATE chat_deliveries SET status = 'sent' WHERE chat_id = %s AND url = %s",
+            (chat_id, url)
+        )
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка подтверждения доставки: %s", e)
+    finally:
+        cursor.close()
+
+def release_delivery(db_conn, chat_id, url):
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='release_delivery')
+        cursor.execute(
+            "DELETE FROM chat_deliveries WHERE chat_id = %s AND url = %s AND status = 'pending'",
+            (chat_id, url)
         )
         db_conn.commit()
-        print(f"Вакансия добавлена в БД: {title}")
-    except mysql.connector.errors.IntegrityError:
-        pass 
     except Exception as e:
-        print(f"Ошибка добавления в БД: {e}")
+        logger.error("Ошибка снятия захвата доставки: %s", e)
     finally:
         cursor.close()
\ No newline at end of file
@@ -0,0 +1,177 @@
+import cProfile
+import glob
+import importlib
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs
+
+from log_config import get_logger
+
+logger = get_logger('profiling')
+
+# Стадии цикла: (модуль, имя функции) -> стадия
+STAGES = {
+    ('parser', 'html_from_urlfetch_'): 'fetch',
+    ('parser', 'parse_vacancies_html'): 'parse',
+    ('main', 'similarity_check'): 'similarity',
+    ('main', 'is_vacancy_sent'): 'db',
+    ('main', 'claim_vacancy'): 'db',
+    ('main', 'release_vacancy'): 'db',
+    ('main', 'mark_vacancy_sent'): 'db',
+    ('main', 'delivered_chats'): 'db',
+    ('main', 'claim_delivery'): 'db',
+    ('main', 'confirm_delivery'): 'db',
+    ('main', 'release_delivery'): 'db',
+    ('main', 'find_repost'): 'db',
+    ('main', 'record_fingerprint'): 'db',
+    ('main', 'load_checkpoint'): 'db',
+    ('main', 'save_checkpoint'): 'db',
+    ('main', 'record_cycle'): 'db',
+    ('liveness', 'archived_ids'): 'db',
+    ('liveness', 'record_archived'): 'db',
+    ('liveness', 'check_vacancy'): 'liveness',
+    ('main', 'send_telegram_message'): 'telegram',
+    ('main', 'send_digest'): 'telegram',
+}
+
+
+class StageTimers:
+    """Суммарное wall-clock время и число вызовов по стадиям"""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def wrap(self, stage, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                # Проверки liveness идут из пула потоков
+                with self._lock:
+                    self.seconds[stage] += time.perf_counter() - start
+                    self.calls[stage] += 1
+        return wrapper
+
+    def report(self, total):
+        lines = [f"{'stage':12} {'calls':>7} {'seconds':>10} {'share':>7}"]
+        for stage, seconds in sorted(self.seconds.items(), key=lambda kv: -kv[1]):
+            share = seconds / total if total else 0
+            lines.append(f"{stage:12} {self.calls[stage]:7d} {seconds:10.3f} {share:7.1%}")
+        lines.append(f"{'total':12} {'':7} {total:10.3f}")
+        return "\n".join(lines)
+
+
+class StackSampler:
+    """Сэмплирующий профайлер: снимает стек целевого потока и копит collapsed stacks"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def _patched(targets):
+    originals = []
+    try:
+        for module, name, replacement in targets:
+            originals.append((module, name, getattr(module, name)))
+            setattr(module, name, replacement)
+        yield
+    finally:
+        for module, name, original in reversed(originals):
+            setattr(module, name, original)
+
+
+def fixture_fetcher(fixture_dir):
+    """Отдаёт сохранённые страницы выдачи вместо запросов к hh.ru (по параметру page).
+
+    За последней страницей - пустая выдача, а не ошибка загрузки: иначе цикл
+    повторял бы несуществующие страницы с паузами и портил отчёт.
+    """
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixture_dir, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+
+    def fetch(url):
+        page = int(parse_qs(urlparse(url).query).get('page', ['0'])[0])
+        return pages[page] if page < len(pages) else ""
+
+    return fetch
+
+
+def profile_cycle(main_module, db_conn, config, output='profile', fixture_dir=None):
+    """Прогоняет один цикл main_module.job() под cProfile и сэмплером, пишет отчёты с префиксом output"""
+    timers = StageTimers()
+    targets = []
+    for (module_name, name), stage in STAGES.items():
+        module = main_module if module_name == 'main' else importlib.import_module(module_name)
+        fn = getattr(module, name)
+        if fixture_dir and stage == 'fetch':
+            fn = fixture_fetcher(fixture_dir)
+        elif fixture_dir and stage == 'liveness':
+            fn = lambda url, timeout=10: True
+        elif fixture_dir and name == 'send_telegram_message':
+            fn = lambda *args, **kwargs: True
+        elif fixture_dir and name == 'send_digest':
+            fn = lambda bot_token, chat_id, vacancies, fmt='compact': list(vacancies)
+        targets.append((module, name, timers.wrap(stage, fn)))
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+
+    with _patched(targets):
+        sampler.start()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            main_module.job(db_conn, config)
+        finally:
+            profiler.disable()
+            total = time.perf_counter() - start
+            sampler.stop()
+
+    profiler.dump_stats(f"{output}.prof")
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(50)
+    with open(f"{output}.txt", 'w', encoding='utf-8') as f:
+        f.write(timers.report(total) + "\n\n" + stream.getvalue())
+    sampler.dump(f"{output}.collapsed")
+
+    logger.info("Профиль цикла сохранён: %s.prof, %s.txt, %s.collapsed", output, output, output)
+    return timers.report(total)
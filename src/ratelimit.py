@@ -0,0 +1,131 @@
+import threading
+import time
+
+import metrics
+from log_config import get_logger
+
+logger = get_logger('ratelimit')
+
+
+class FetchBlocked(Exception):
+    """hh.ru ограничивает запросы (429/403/капча) или цепь для хоста разомкнута"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"{host}: повтор через {retry_in:.0f} с")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Потокобезопасный token bucket: rate запросов в секунду, всплеск до burst"""
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Резервирует токен и возвращает, сколько нужно подождать"""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            metrics.observe('hh_limiter_wait_seconds', wait)
+            self.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """Размыкатель по хостам с экспоненциальным охлаждением.
+
+    После признаков троттлинга (429/403/капча) хост закрывается на cooldown
+    секунд; каждое следующее срабатывание подряд удваивает паузу до max_cooldown.
+    По истечении паузы пропускается один пробный запрос: успех сбрасывает
+    счётчик, неудача снова размыкает цепь на удвоенное время.
+    """
+
+    def __init__(self, cooldown=60, max_cooldown=3600, clock=time.monotonic):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        with self._lock:
+            state = self._state.get(host)
+            if state is None:
+                return True
+            if self.clock() < state['open_until'] or state['probing']:
+                return False
+            state['probing'] = True
+            return True
+
+    def retry_in(self, host):
+        with self._lock:
+            state = self._state.get(host)
+            if state is None:
+                return 0.0
+            return max(0.0, state['open_until'] - self.clock())
+
+    def record_success(self, host):
+        with self._lock:
+            if self._state.pop(host, None) is not None:
+                logger.info("Цепь для %s снова замкнута", host)
+
+    def record_error(self, host):
+        """Сетевая ошибка не говорит о троттлинге: разрешаем следующий пробный запрос"""
+        with self._lock:
+            state = self._state.get(host)
+            if state is not None:
+                state['probing'] = False
+
+    def record_throttle(self, host, retry_after=None):
+        with self._lock:
+            state = self._state.setdefault(host, {'failures': 0, 'open_until': 0.0, 'probing': False})
+            state['failures'] += 1
+            state['probing'] = False
+            cooldown = min(self.cooldown * 2 ** (state['failures'] - 1), self.max_cooldown)
+            if retry_after:
+                cooldown = max(cooldown, min(retry_after, self.max_cooldown))
+            state['open_until'] = self.clock() + cooldown
+        metrics.inc('hh_breaker_open_total', host=host)
+        logger.warning("hh.ru ограничивает запросы (%s), пауза %d с", host, cooldown)
+        return cooldown
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+_settings = {'rate': 1.0, 'burst': 3}
+breaker = CircuitBreaker()
+
+
+def configure(config):
+    """Применяет hh_rate, hh_burst, hh_cooldown и hh_max_cooldown из конфига"""
+    global breaker
+    with _buckets_lock:
+        _settings['rate'] = config.get("hh_rate", 1.0)
+        _settings['burst'] = config.get("hh_burst", 3)
+        _buckets.clear()
+    breaker = CircuitBreaker(config.get("hh_cooldown", 60), config.get("hh_max_cooldown", 3600))
+
+
+def limiter(host):
+    """Общий token bucket для всех запросов к хосту"""
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(_settings['rate'], _settings['burst'])
+        return bucket
@@ -0,0 +1,135 @@
+import datetime
+import gzip
+import json
+import os
+from collections import defaultdict
+
+import metrics
+from log_config import get_logger
+from parser import get_time
+
+logger = get_logger('retention')
+
+# Архивируемые таблицы и ключ, по которому удаляются выгруженные строки
+ARCHIVED_TABLES = {
+    "sent_vacancies": ("url",),
+    "chat_deliveries": ("chat_id", "url"),
+}
+
+
+def archive_path(archive_dir, table, when=None):
+    """Файл архива за месяц строки when (текущий месяц, если дата неизвестна)"""
+    if not isinstance(when, (datetime.date, datetime.datetime)):
+        when = get_time()
+    return os.path.join(archive_dir, f"{table}-{when:%Y%m}.jsonl.gz")
+
+
+def archive_table(db_conn, table, days, archive_dir, batch_size=1000):
+    """Переносит строки старше days дней из table в сжатый JSONL-архив.
+
+    Строки выгружаются пачками: сначала пачка дописывается в файл, затем
+    удаляется из таблицы по ключу. Если процесс упадёт между этими шагами,
+    в архиве окажутся повторы, но не пропуски. Возвращает число строк.
+    """
+    if db_conn is None:
+        return 0
+
+    key = ARCHIVED_TABLES[table]
+    paths = set()
+    archived = 0
+    cursor = db_conn.cursor()
+    try:
+        os.makedirs(archive_dir, exist_ok=True)
+        while True:
+            metrics.inc('db_round_trips_total', query='archive_select')
+            cursor.execute(
+                f"SELECT * FROM {table} WHERE sent_date < NOW() - INTERVAL %s DAY "
+                f"ORDER BY sent_date LIMIT %s",
+                (days, batch_size)
+            )
+            columns = [d[0] for d in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            if not rows:
+                break
+
+            # Строки раскладываются по файлам месяца своей даты, а не месяца запуска
+            by_path = defaultdict(list)
+            for row in rows:
+                by_path[archive_path(archive_dir, table, row.get('sent_date'))].append(row)
+            for path, path_rows in by_path.items():
+                with gzip.open(path, 'at', encoding='utf-8') as f:
+                    for row in path_rows:
+                        f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+                paths.add(path)
+
+            condition = " AND ".join(f"{column} = %s" for column in key)
+            metrics.inc('db_round_trips_total', query='archive_delete')
+            cursor.executemany(
+                f"DELETE FROM {table} WHERE {condition}",
+                [tuple(row[column] for column in key) for row in rows]
+            )
+            db_conn.commit()
+            archived += len(rows)
+            if len(rows) < batch_size:
+                break
+    except Exception as e:
+        logger.error("Ошибка архивации %s: %s", table, e)
+    finally:
+        cursor.close()
+
+    if archived:
+        metrics.inc('rows_archived_total', archived, table=table)
+        logger.info("🗄️ %s: %d строк перенесено в %s", table, archived, ", ".join(sorted(paths)))
+    return archived
+
+
+def prune_fingerprints(db_conn, days):
+    """Отпечатки старше окна поиска повторов больше не нужны"""
+    if db_conn is None:
+        return 0
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='prune_fingerprints')
+        cursor.execute(
+            "DELETE FROM vacancy_fingerprints WHERE sent_date < NOW() - INTERVAL %s DAY", (days,)
+        )
+        db_conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        logger.error("Ошибка очистки отпечатков: %s", e)
+        return 0
+    finally:
+        cursor.close()
+
+
+def prune_archived(db_conn, days):
+    """Закрытые вакансии старше days дней уже не появляются в выдаче"""
+    if db_conn is None:
+        return 0
+
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='prune_archived')
+        cursor.execute(
+            "DELETE FROM archived_vacancies WHERE archived_date < NOW() - INTERVAL %s DAY", (days,)
+        )
+        db_conn.commit()
+        return cursor.rowcount
+    except Exception as e:
+        logger.error("Ошибка очистки закрытых вакансий: %s", e)
+        return 0
+    finally:
+        cursor.close()
+
+
+def run_retention(db_conn, config):
+    """Одна итерация обслуживания: архивация истории, очистка отпечатков и закрытых вакансий"""
+    days = config.get("retention_days", 0)
+    if days:
+        archive_dir = config.get("archive_dir", "archive")
+        batch_size = config.get("archive_batch", 1000)
+        for table in ARCHIVED_TABLES:
+            archive_table(db_conn, table, days, archive_dir, batch_size)
+    prune_fingerprints(db_conn, config.get("repost_window_days", 30))
+    prune_archived(db_conn, config.get("liveness_keep_days", 30))
@@ -0,0 +1,174 @@
+import re
+import threading
+import time
+
+import transport
+from log_config import get_logger
+
+logger = get_logger('salary')
+
+# Маркеры валют в тексте зарплаты hh.ru, проверяются по порядку. Буквенные
+# маркеры ищутся только сразу после суммы и целым словом ("сум", но не "сумма")
+CURRENCY_MARKERS = [
+    ('₽', 'RUB'), ('руб', 'RUB'), ('RUB', 'RUB'),
+    ('$', 'USD'), ('USD', 'USD'),
+    ('€', 'EUR'), ('EUR', 'EUR'),
+    ('₸', 'KZT'), ('тенге', 'KZT'), ('KZT', 'KZT'),
+    ('Br', 'BYN'), ('BYN', 'BYN'),
+    ('₴', 'UAH'), ('грн', 'UAH'), ('UAH', 'UAH'),
+    ('₾', 'GEL'), ('GEL', 'GEL'),
+    ('₼', 'AZN'), ('AZN', 'AZN'),
+    ('сум', 'UZS'), ("so'm", 'UZS'), ('UZS', 'UZS'),
+    ('сом', 'KGS'), ('KGS', 'KGS'),
+]
+
+# Приблизительные курсы (рублей за единицу); уточняются из config или ЦБ РФ
+DEFAULT_RATES = {
+    'RUB': 1.0, 'USD': 95.0, 'EUR': 103.0, 'KZT': 0.19, 'BYN': 29.0,
+    'UAH': 2.3, 'GEL': 35.0, 'AZN': 56.0, 'UZS': 0.0075, 'KGS': 1.1,
+}
+
+CBR_RATES_URL = 'https://www.cbr-xml-daily.ru/daily_json.js'
+
+_SPACES_RE = re.compile(r'[\u00a0\u202f\u2009]')
+_NUMBER_RE = re.compile(r'\d[\d ]*\d|\d')
+_RANGE_RE = re.compile(r'\d\s*[–—-]\s*\d')
+
+
+def _marker_re(marker):
+    if marker.isalpha() or "'" in marker:
+        return re.compile(r'\d\s*' + re.escape(marker) + r'(?![^\W\d_])', re.IGNORECASE)
+    return re.compile(re.escape(marker))
+
+
+_CURRENCY_RES = [(_marker_re(marker), code) for marker, code in CURRENCY_MARKERS]
+
+
+def detect_currency(text):
+    for pattern, code in _CURRENCY_RES:
+        if pattern.search(text):
+            return code
+    return None
+
+
+def looks_like_salary(text):
+    return bool(text) and any(ch.isdigit() for ch in text) and detect_currency(text) is not None
+
+
+def parse_salary(text):
+    """Разбирает текст зарплаты hh.ru: границы, валюта и признак gross/net.
+
+    "от 150 000 ₽ за месяц, до вычета налогов" -> from=150000, to=None,
+    currency=RUB, gross=True. gross=None, если hh.ru не указал.
+    """
+    result = {'salary_from': None, 'salary_to': None, 'salary_currency': None, 'salary_gross': None}
+    if not text:
+        return result
+
+    text = _SPACES_RE.sub(' ', text)
+    lower = text.lower()
+    numbers = [int(n.replace(' ', '')) for n in _NUMBER_RE.findall(text)]
+    result['salary_currency'] = detect_currency(text)
+
+    if 'до вычета' in lower:
+        result['salary_gross'] = True
+    elif 'на руки' in lower:
+        result['salary_gross'] = False
+
+    if len(numbers) >= 2 and (_RANGE_RE.search(text) or ('от' in lower and 'до' in lower)):
+        result['salary_from'], result['salary_to'] = numbers[0], numbers[1]
+    elif numbers:
+        if lower.lstrip().startswith('до'):
+            result['salary_to'] = numbers[0]
+        elif lower.lstrip().startswith('от'):
+            result['salary_from'] = numbers[0]
+        else:
+            result['salary_from'] = result['salary_to'] = numbers[0]
+    return result
+
+
+class RateTable:
+    """Кэш курсов валют с обновлением из ЦБ РФ не чаще раза в ttl секунд"""
+
+    def __init__(self, rates=None, base='RUB', ttl=86400, url=None):
+        self.rates = dict(DEFAULT_RATES)
+        self.rates.update(rates or {})
+        self.base = base
+        self.ttl = ttl
+        self.url = url
+        self.updated = None
+        self._lock = threading.Lock()
+
+    def _due(self):
+        """Пора ли обновлять курсы; вызывается под _lock и сразу занимает обновление"""
+        if not self.url or (self.updated is not None and time.monotonic() - self.updated < self.ttl):
+            return False
+        self.updated = time.monotonic()
+        return True
+
+    def _refresh(self):
+        """Запрос к ЦБ идёт без блокировки: convert() в потоках разбора ждёт только подмены таблицы"""
+        try:
+            response = transport.get(self.url, timeout=10)
+            response.raise_for_status()
+            fresh = {code: item['Value'] / item['Nominal'] for code, item in response.json()['Valute'].items()}
+        except Exception as e:
+            logger.warning("Не удалось обновить курсы валют: %s", e)
+            return
+        with self._lock:
+            self.rates = dict(self.rates, **fresh)
+        logger.info("Курсы валют обновлены: %d валют", len(self.rates))
+
+    def convert(self, amount, currency):
+        """Сумма в базовой валюте (None, если валюта неизвестна)"""
+        if amount is None or currency is None:
+            return None
+        with self._lock:
+            due = self._due()
+        if due:
+            self._refresh()
+        with self._lock:
+            rate = self.rates.get(currency)
+            base_rate = self.rates.get(self.base)
+        if rate is None or not base_rate:
+            return None
+        return round(amount * rate / base_rate)
+
+
+rates = RateTable()
+
+
+def configure(config):
+    """Применяет base_currency, currency_rates и обновление курсов из конфига"""
+    global rates
+    rates = RateTable(
+        config.get("currency_rates"),
+        config.get("base_currency", "RUB"),
+        config.get("currency_rates_ttl", 86400),
+        CBR_RATES_URL if config.get("update_currency_rates") else None,
+    )
+
+
+def normalize_salary(text):
+    """Числовые поля зарплаты для вакансии, включая границы в базовой валюте"""
+    fields = parse_salary(text)
+    currency = fields['salary_currency']
+    fields['salary_from_base'] = rates.convert(fields['salary_from'], currency)
+    fields['salary_to_base'] = rates.convert(fields['salary_to'], currency)
+    return fields
+
+
+def salary_value(vacancy):
+    """Верхняя граница зарплаты в базовой валюте (или нижняя, если верхней нет)"""
+    upper = vacancy.get('salary_to_base')
+    return upper if upper is not None else vacancy.get('salary_from_base')
+
+
+def salary_matches(vacancy, min_salary, include_no_salary=True):
+    """Проходит ли вакансия порог min_salary (в базовой валюте)"""
+    if not min_salary:
+        return True
+    value = salary_value(vacancy)
+    if value is None:
+        return include_no_salary
+    return value >= min_salary
@@ -0,0 +1,325 @@
+import asyncio
+import random
+import signal
+import threading
+import datetime
+
+import metrics
+from log_config import get_logger
+from parser import get_time
+from stats import StatsEngine, send_report
+from checkpoint import load_checkpoint, initial_delay
+
+logger = get_logger('scheduler')
+
+
+def next_stats_delay(stats_time, now=None):
+    """Секунды до ближайшего stats_time (ЧЧ:ММ) по Москве"""
+    now = now or get_time()
+    hour, minute = map(int, stats_time.split(':'))
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += datetime.timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+def next_reports(windows, stats_time, now=None, weekday=0):
+    """(секунды до ближайшего отчёта, окна, которые пора отправить).
+
+    hourly - в начале каждого часа, daily - в stats_time,
+    weekly - в stats_time по дню недели weekday (0 - понедельник).
+    """
+    now = now or get_time()
+    due = {}
+    for window in windows:
+        if window == 'hourly':
+            target = now.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+        else:
+            target = now + datetime.timedelta(seconds=next_stats_delay(stats_time, now))
+            if window == 'weekly':
+                target += datetime.timedelta(days=(weekday - target.weekday()) % 7)
+        due[window] = target
+    target = min(due.values())
+    return (target - now).total_seconds(), [window for window in windows if due[window] == target]
+
+
+def jittered(interval, jitter):
+    """Интервал со случайным отклонением ±jitter (доля от интервала)"""
+    if not jitter:
+        return interval
+    return interval * (1 + random.uniform(-jitter, jitter))
+
+
+class Scheduler:
+    """Цикл событий asyncio: отдельная задача на каждый поиск и задача статистики.
+
+    Блокирующий job() (requests, mysql.connector) выполняется в пуле потоков,
+    у каждого поиска своё подключение к БД. Запуски одного поиска не пересекаются:
+    следующий дедлайн считается от начала предыдущего цикла, а пропущенные
+    дедлайны не накапливаются - цикл просто запускается сразу.
+
+    По SIGTERM/SIGINT новые циклы не запускаются, а текущие дорабатывают
+    начатую страницу и отправку (job получает stop_event) и сохраняют чекпоинт.
+
+    maintenance(db_conn, config) - фоновое обслуживание БД (архивация),
+    запускается при старте и затем раз в retention_interval часов.
+
+    reload() раз в config_poll_interval секунд возвращает (config, searches)
+    нового конфига или None. Изменения применяются между циклами: новые
+    поиски запускаются, удалённые завершаются после текущего цикла, а у
+    изменённых пересчитывается дедлайн. Остальные поиски не затрагиваются.
+
+    commands - бот команд Telegram: его poll() (long polling getUpdates)
+    крутится в пуле потоков рядом с поисками до остановки.
+    """
+
+    def __init__(self, job, searches, config, connect=None, interval_policy=None, maintenance=None,
+                 reload=None, commands=None):
+        self.job = job
+        self.interval_policy = interval_policy
+        self.maintenance = maintenance
+        self.reload = reload
+        self.commands = commands
+        self.searches = searches
+        self.config = config
+        self.connect = connect
+        self.stop_event = threading.Event()
+        self._searches = {self._name(search): search for search in searches}
+        self._tasks = {}
+        self._wake = {}
+        self._stats_task = None
+        self._stats_wake = None
+        self.stats = StatsEngine()
+        self._stop = None
+        self._loop = None
+
+    @staticmethod
+    def _name(search):
+        return search.get("name", search["search_text"])
+
+    def stop(self):
+        self.stop_event.set()
+        if self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def _install_signal_handlers(self):
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self._loop.add_signal_handler(sig, self._on_signal, sig)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # Windows или не главный поток
+
+    def _on_signal(self, sig):
+        logger.info("Получен сигнал %s, дожидаюсь текущих циклов...", signal.Signals(sig).name)
+        self.stop()
+
+    async def _sleep(self, seconds, wake=None):
+        """Спит до дедлайна; возвращает True, если пришла остановка или сработал wake"""
+        waiters = [asyncio.ensure_future(self._stop.wait())]
+        if wake is not None:
+            waiters.append(asyncio.ensure_future(wake.wait()))
+        done, pending = await asyncio.wait(waiters, timeout=max(0.0, seconds),
+                                           return_when=asyncio.FIRST_COMPLETED)
+        for waiter in pending:
+            waiter.cancel()
+        return bool(done)
+
+    async def _open(self):
+        if self.connect is None:
+            return None
+        return await asyncio.to_thread(self.connect)
+
+    async def _interval(self, db_conn, search):
+        """Интервал до следующего цикла в секундах"""
+        if self.interval_policy is None:
+            return search["interval"] * 60
+        try:
+            return await asyncio.to_thread(self.interval_policy, db_conn, search)
+        except Exception as e:
+            logger.error("Ошибка расчёта интервала %s: %s", search.get("name"), e)
+            return search["interval"] * 60
+
+    async def run_search(self, name):
+        loop = asyncio.get_running_loop()
+        wake = self._wake[name]
+        db_conn = await self._open()
+        try:
+            search = self._searches.get(name)
+            if search is None:
+                return
+            checkpoint = await asyncio.to_thread(load_checkpoint, db_conn, name)
+            delay = initial_delay(checkpoint, search["interval"] * 60)
+            if delay:
+                logger.info("Поиск %s недавно завершён, первый цикл через %d с", name, delay)
+            deadline = loop.time() + delay
+            if await self._sleep(delay, wake):
+                if self._stop.is_set():
+                    return
+                wake.clear()
+
+            while not self._stop.is_set():
+                # Конфиг поиска читается перед каждым циклом: job получает целостный снимок
+                search = self._searches.get(name)
+                if search is None:
+                    logger.info("Поиск %s удалён из конфига", name)
+                    break
+
+                start = loop.time()
+                metrics.set_gauge('schedule_lag_seconds', max(0.0, start - deadline), search=name)
+                try:
+                    await asyncio.to_thread(self.job, db_conn, search, self.stop_event)
+                except Exception as e:
+                    logger.exception("Ошибка цикла поиска %s: %s", name, e)
+
+                interval = await self._interval(db_conn, search)
+                deadline = start + jittered(interval, search.get("interval_jitter", 0))
+                if loop.time() > deadline:
+                    metrics.inc('cycles_overrun_total', search=name)
+                while await self._sleep(deadline - loop.time(), wake):
+                    if self._stop.is_set():
+                        return
+                    # Поиск изменили или удалили: дедлайн считается по новому интервалу
+                    wake.clear()
+                    search = self._searches.get(name)
+                    if search is None:
+                        break
+                    interval = await self._interval(db_conn, search)
+                    deadline = start + jittered(interval, search.get("interval_jitter", 0))
+        finally:
+            if db_conn:
+                db_conn.close()
+            if name not in self._searches:
+                # Удалённый из конфига поиск не должен держать задачу и событие
+                self._tasks.pop(name, None)
+                self._wake.pop(name, None)
+
+    async def run_stats(self):
+        db_conn = await self._open()
+        try:
+            while self.config.get("daily_stats", True):
+                stats_time = self.config.get("stats_time", "00:00")
+                delay, windows = next_reports(self.config.get("stats_windows", ["daily"]), stats_time,
+                                              weekday=self.config.get("stats_weekday", 0))
+                logger.info("Статистика (%s) запланирована на %s по Москве", ", ".join(windows),
+                            (get_time() + datetime.timedelta(seconds=delay)).strftime('%d.%m %H:%M'))
+                if await self._sleep(delay, self._stats_wake):
+                    if self._stop.is_set():
+                        break
+                    self._stats_wake.clear()
+                    continue
+                for window in windows:
+                    await asyncio.to_thread(
+                        send_report, self.stats, db_conn, self.config["bot_token"], self.config["chat_id"], window
+                    )
+        finally:
+            if db_conn:
+                db_conn.close()
+
+    async def run_maintenance(self):
+        db_conn = await self._open()
+        interval = self.config.get("retention_interval", 6) * 3600
+        try:
+            while not self._stop.is_set():
+                try:
+                    await asyncio.to_thread(self.maintenance, db_conn, self.config)
+                except Exception as e:
+                    logger.exception("Ошибка обслуживания БД: %s", e)
+                if await self._sleep(interval):
+                    break
+        finally:
+            if db_conn:
+                db_conn.close()
+
+    async def run_reload(self):
+        while not await self._sleep(self.config.get("config_poll_interval", 5)):
+            try:
+                result = await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.exception("Ошибка перечитывания конфига: %s", e)
+                continue
+            if result is not None:
+                self.apply(*result)
+
+    async def run_commands(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.to_thread(self.commands.poll)
+            except Exception as e:
+                logger.error("Ошибка получения команд Telegram: %s", e)
+                if await self._sleep(self.config.get("commands_retry", 30)):
+                    break
+
+    def _start_search(self, name):
+        self._wake[name] = asyncio.Event()
+        self._tasks[name] = asyncio.create_task(self.run_search(name))
+
+    def _start_stats(self):
+        self._stats_wake = asyncio.Event()
+        self._stats_task = asyncio.create_task(self.run_stats())
+
+    def apply(self, config, searches):
+        """Применяет новый конфиг между циклами (вызывается в цикле событий)"""
+        self.config = config
+        self.searches = searches
+        new = {self._name(search): search for search in searches}
+
+        for name in set(self._searches) - set(new):
+            del self._searches[name]
+            self._wake[name].set()
+
+        for name, search in new.items():
+            old = self._searches.get(name)
+            self._searches[name] = search
+            task = self._tasks.get(name)
+            if task is None or task.done():
+                logger.info("Поиск %s добавлен", name)
+                self._start_search(name)
+            elif old != search:
+                logger.info("Поиск %s изменён, пересчитываю расписание", name)
+                self._wake[name].set()
+
+        if self._stats_task is None or self._stats_task.done():
+            if config.get("daily_stats", True):
+                self._start_stats()
+        else:
+            self._stats_wake.set()
+
+    def _running(self, background):
+        return [task for task in list(self._tasks.values()) + background + [self._stats_task]
+                if task is not None]
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self.stop_event.is_set():
+            self._stop.set()
+        self._install_signal_handlers()
+        for name in self._searches:
+            self._start_search(name)
+        if self.config.get("daily_stats", True):
+            self._start_stats()
+        background = []
+        if self.maintenance is not None and self.connect is not None:
+            background.append(asyncio.create_task(self.run_maintenance()))
+        if self.reload is not None:
+            background.append(asyncio.create_task(self.run_reload()))
+        if self.commands is not None:
+            background.append(asyncio.create_task(self.run_commands()))
+
+        stopped = asyncio.ensure_future(self._stop.wait())
+        try:
+            # Задачи поисков могут добавиться при перечитывании конфига, поэтому
+            # набор ожидаемых задач пересобирается после каждого завершения
+            while not self._stop.is_set():
+                pending = [task for task in self._running(background) if not task.done()]
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending + [stopped], return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task is not stopped and not task.cancelled() and task.exception():
+                        raise task.exception()
+            await asyncio.gather(*self._running(background))
+        finally:
+            stopped.cancel()
+            for task in self._running(background):
+                task.cancel()
@@ -0,0 +1,387 @@
+import datetime
+import threading
+from collections import Counter
+
+import metrics
+from log_config import get_logger
+from parser import get_time, send_payload
+from salary import salary_value
+from templates import escape_html
+
+logger = get_logger('stats')
+
+WINDOWS = {
+    'hourly': datetime.timedelta(hours=1),
+    'daily': datetime.timedelta(days=1),
+    'weekly': datetime.timedelta(days=7),
+}
+HOUR = WINDOWS['hourly']
+
+# Границы корзин распределения зарплат, в base_currency
+SALARY_BUCKETS = (50000, 100000, 150000, 200000, 300000)
+NO_SALARY = 'none'
+
+TOP_COMPANIES = 5
+
+
+def hour_of(moment):
+    """Начало часа по Москве без tzinfo - ключ почасовых агрегатов"""
+    return moment.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def salary_bucket(vacancy):
+    value = salary_value(vacancy)
+    if value is None:
+        return NO_SALARY
+    lower = 0
+    for upper in SALARY_BUCKETS:
+        if value < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
+
+def _bucket_order(bucket):
+    if bucket == NO_SALARY:
+        return float('inf')
+    return int(bucket.rstrip('+').split('-')[0])
+
+
+class CycleStats:
+    """Счётчики одного цикла поиска; в БД попадают одной пачкой в конце цикла"""
+
+    def __init__(self, search_name):
+        self.search_name = search_name
+        self.seen = 0
+        self.matched = 0
+        self.sent = 0
+        self.buckets = Counter()
+
+    def add_sent(self, vacancy):
+        self.sent += 1
+        self.buckets[('salary', salary_bucket(vacancy))] += 1
+        self.buckets[('company', (vacancy.get('company') or '')[:255])] += 1
+
+
+def create_stats_tables(db_conn):
+    if db_conn is None:
+        return
+
+    cursor = db_conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stats_hourly (
+                hour DATETIME NOT NULL,
+                search_name VARCHAR(255) NOT NULL,
+                cycles INT NOT NULL DEFAULT 0,
+                seen INT NOT NULL DEFAULT 0,
+                matched INT NOT NULL DEFAULT 0,
+                sent INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (hour, search_name)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stats_buckets (
+                hour DATETIME NOT NULL,
+                search_name VARCHAR(255) NOT NULL,
+                kind VARCHAR(16) NOT NULL,
+                bucket VARCHAR(255) NOT NULL,
+                count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (hour, search_name, kind, bucket)
+            )
+        """)
+        cursor.execute("SELECT 1 FROM stats_hourly LIMIT 1")
+        if cursor.fetchone() is None:
+            # Одноразовый перенос истории отправок: дальше агрегаты ведутся инкрементально.
+            # Часы считаются по Москве, как в record_cycle: sent_date (TIMESTAMP) отдаётся
+            # в часовом поясе сессии, поэтому на время переноса он переключается на +03:00
+            cursor.execute("SET @stats_time_zone = @@session.time_zone")
+            cursor.execute("SET time_zone = '+03:00'")
+            cursor.execute(
+                "INSERT IGNORE INTO stats_hourly (hour, search_name, sent) "
+                "SELECT DATE_FORMAT(sent_date, '%Y-%m-%d %H:00:00'), COALESCE(search_name, ''), COUNT(*) "
+                "FROM sent_vacancies WHERE status = 'sent' GROUP BY 1, 2"
+            )
+            cursor.execute(
+                "INSERT IGNORE INTO stats_buckets (hour, search_name, kind, bucket, count) "
+                "SELECT DATE_FORMAT(sent_date, '%Y-%m-%d %H:00:00'), COALESCE(search_name, ''), "
+                "'company', COALESCE(company, ''), COUNT(*) "
+                "FROM sent_vacancies WHERE status = 'sent' GROUP BY 1, 2, 4"
+            )
+            cursor.execute("SET time_zone = @stats_time_zone")
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка создания таблиц статистики: %s", e)
+    finally:
+        cursor.close()
+
+
+def record_cycle(db_conn, cycle, hour=None):
+    """Прибавляет счётчики цикла к почасовым агрегатам (два запроса на цикл)"""
+    if db_conn is None:
+        return
+
+    hour = hour or hour_of(get_time())
+    cursor = db_conn.cursor()
+    try:
+        metrics.inc('db_round_trips_total', query='record_cycle')
+        cursor.execute(
+            "INSERT INTO stats_hourly (hour, search_name, cycles, seen, matched, sent) "
+            "VALUES (%s, %s, 1, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE cycles = cycles + 1, seen = seen + VALUES(seen), "
+            "matched = matched + VALUES(matched), sent = sent + VALUES(sent)",
+            (hour, cycle.search_name, cycle.seen, cycle.matched, cycle.sent)
+        )
+        if cycle.buckets:
+            metrics.inc('db_round_trips_total', query='record_cycle')
+            cursor.executemany(
+                "INSERT INTO stats_buckets (hour, search_name, kind, bucket, count) "
+                "VALUES (%s, %s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE count = count + VALUES(count)",
+                [(hour, cycle.search_name, kind, bucket, count)
+                 for (kind, bucket), count in cycle.buckets.items()]
+            )
+        db_conn.commit()
+    except Exception as e:
+        logger.error("Ошибка сохранения статистики цикла: %s", e)
+    finally:
+        cursor.close()
+
+
+def _empty_hour():
+    return {'searches': {}, 'buckets': Counter()}
+
+
+class StatsEngine:
+    """Отчёты за окна hourly/daily/weekly из почасовых агрегатов.
+
+    Отчёт строится только по закрытым часам, а они уже не меняются, поэтому
+    загруженные часы кешируются: следующий отчёт (любого окна) дочитывает из
+    БД только недостающие часы. Кеш держит два самых длинных окна - текущее
+    и предыдущее для сравнения.
+    """
+
+    def __init__(self, windows=None):
+        self.windows = {name: WINDOWS[name] for name in (windows or WINDOWS)}
+        self._hours = {}
+        self._total = None
+        self._lock = threading.Lock()
+
+    def _fetch(self, db_conn, start, end):
+        hours = {}
+        hour = start
+        while hour < end:
+            hours[hour] = _empty_hour()
+            hour += HOUR
+
+        cursor = db_conn.cursor()
+        try:
+            metrics.inc('db_round_trips_total', 2, query='stats_report')
+            cursor.execute(
+                "SELECT hour, search_name, cycles, seen, matched, sent FROM stats_hourly "
+                "WHERE hour >= %s AND hour < %s", (start, end)
+            )
+            for hour, name, *values in cursor.fetchall():
+                hours[hour]['searches'][name] = [int(v) for v in values]
+            cursor.execute(
+                "SELECT hour, kind, bucket, SUM(count) FROM stats_buckets "
+                "WHERE hour >= %s AND hour < %s GROUP BY hour, kind, bucket", (start, end)
+            )
+            for hour, kind, bucket, count in cursor.fetchall():
+                hours[hour]['buckets'][(kind, bucket)] += int(count)
+        finally:
+            cursor.close()
+        return hours
+
+    def _fetch_total(self, db_conn, end):
+        cursor = db_conn.cursor()
+        try:
+            metrics.inc('db_round_trips_total', query='stats_report')
+            cursor.execute("SELECT COALESCE(SUM(sent), 0) FROM stats_hourly WHERE hour < %s", (end,))
+            return int(cursor.fetchone()[0])
+        finally:
+            cursor.close()
+
+    def _load(self, db_conn, start, end):
+        missing = []
+        hour = start
+        while hour < end:
+            if hour not in self._hours:
+                missing.append(hour)
+            hour += HOUR
+        if missing:
+            self._hours.update(self._fetch(db_conn, missing[0], missing[-1] + HOUR))
+
+        if self._total is None or self._total[0] > end:
+            self._total = (end, self._fetch_total(db_conn, end))
+        elif self._total[0] < end:
+            # Всего за всё время: прибавляем закрытые с прошлого отчёта часы из кеша
+            since, total = self._total
+            if since < start:
+                self._total = (end, self._fetch_total(db_conn, end))
+            else:
+                self._total = (end, total + sum(self._sent(since, end)))
+
+        horizon = end - 2 * max(self.windows.values())
+        for hour in [hour for hour in self._hours if hour < horizon]:
+            del self._hours[hour]
+
+    def _sent(self, start, end):
+        hour = start
+        while hour < end:
+            for values in self._hours[hour]['searches'].values():
+                yield values[3]
+            hour += HOUR
+
+    def _sum(self, start, end):
+        searches = {}
+        buckets = Counter()
+        hour = start
+        while hour < end:
+            data = self._hours[hour]
+            for name, values in data['searches'].items():
+                totals = searches.setdefault(name, [0, 0, 0, 0])
+                for i, value in enumerate(values):
+                    totals[i] += value
+            buckets.update(data['buckets'])
+            hour += HOUR
+        return searches, buckets
+
+    def report(self, db_conn, window, now=None):
+        """Отчёт за последнее закрытое окно window или None без БД"""
+        if db_conn is None:
+            logger.warning("БД не подключена - статистика недоступна")
+            return None
+
+        delta = WINDOWS[window]
+        end = hour_of(now or get_time())
+        start = end - delta
+        try:
+            with self._lock:
+                self._load(db_conn, start - delta, end)
+                current, buckets = self._sum(start, end)
+                previous, _ = self._sum(start - delta, start)
+                total_all = self._total[1]
+        except Exception as e:
+            logger.error("Ошибка сбора статистики: %s", e)
+            return None
+
+        searches = []
+        for name in sorted(set(current) | set(previous)):
+            cycles, seen, matched, sent = current.get(name, [0, 0, 0, 0])
+            _, prev_seen, prev_matched, prev_sent = previous.get(name, [0, 0, 0, 0])
+            searches.append({
+                'name': name,
+                'cycles': cycles,
+                'seen': seen,
+                'matched': matched,
+                'sent': sent,
+                'prev_sent': prev_sent,
+                'match_rate': matched / seen if seen else None,
+                'prev_match_rate': prev_matched / prev_seen if prev_seen else None,
+            })
+
+        salaries = sorted(((bucket, count) for (kind, bucket), count in buckets.items() if kind == 'salary'),
+                          key=lambda item: _bucket_order(item[0]))
+        companies = sorted(((bucket, count) for (kind, bucket), count in buckets.items()
+                            if kind == 'company' and bucket),
+                           key=lambda item: (-item[1], item[0]))[:TOP_COMPANIES]
+        return {
+            'window': window,
+            'start': start,
+            'end': end,
+            'searches': searches,
+            'total': sum(s['sent'] for s in searches),
+            'prev_total': sum(s['prev_sent'] for s in searches),
+            'total_all': total_all,
+            'salaries': salaries,
+            'top_companies': companies,
+        }
+
+
+def _trend(diff):
+    if diff > 0:
+        return f"📈 +{diff}"
+    if diff < 0:
+        return f"📉 {diff}"
+    return "➡️ 0"
+
+
+def _period(report):
+    start, end = report['start'], report['end']
+    if report['window'] == 'hourly':
+        return f"{start.strftime('%d.%m.%Y %H:%M')}-{end.strftime('%H:%M')}"
+    if report['window'] == 'daily':
+        return start.strftime('%d.%m.%Y')
+    return f"{start.strftime('%d.%m')}-{(end - HOUR).strftime('%d.%m.%Y')}"
+
+
+def _salary_label(bucket):
+    if bucket == NO_SALARY:
+        return "не указана"
+    if bucket.endswith('+'):
+        return f"от {int(bucket[:-1]):,}".replace(',', ' ')
+    lower, upper = (int(v) for v in bucket.split('-'))
+    if not lower:
+        return f"до {upper:,}".replace(',', ' ')
+    return f"{lower:,}-{upper:,}".replace(',', ' ')
+
+
+def format_report(report):
+    """Форматирование отчёта для Telegram (HTML)"""
+    if not report:
+        return "❌ Не удалось собрать статистику"
+
+    parts = [
+        f"📊 <b>Статистика за {_period(report)}</b>\n\n",
+        f"<b>Найдено:</b> {report['total']} вакансий {_trend(report['total'] - report['prev_total'])}\n",
+        f"<b>Всего в базе:</b> {report['total_all']} вакансий\n",
+    ]
+
+    if report['searches']:
+        parts.append("\n<b>🔍 По поискам:</b>\n")
+        for s in report['searches']:
+            line = f"{escape_html(s['name'] or '-')}: {s['sent']} {_trend(s['sent'] - s['prev_sent'])}"
+            if s['match_rate'] is not None:
+                line += f", совпадений {s['matched']}/{s['seen']} ({s['match_rate']:.0%}"
+                if s['prev_match_rate'] is not None:
+                    line += f", было {s['prev_match_rate']:.0%}"
+                line += ")"
+            parts.append(line + "\n")
+
+    if report['salaries']:
+        parts.append("\n<b>💰 Зарплаты:</b>\n")
+        for bucket, count in report['salaries']:
+            parts.append(f"{_salary_label(bucket)}: {count}\n")
+
+    if report['top_companies']:
+        parts.append("\n<b>🏢 Топ компаний:</b>\n")
+        for i, (company, count) in enumerate(report['top_companies'], 1):
+            parts.append(f"{i}. {escape_html(str(company))}: {count} вакансий\n")
+    elif not report['total']:
+        parts.append("\n<i>Вакансий за период не найдено</i>\n")
+
+    parts.append(f"\n⏰ Отчет сгенерирован: {get_time().strftime('%H:%M')}")
+    return "".join(parts)
+
+
+def send_report(engine, db_conn, bot_token, chat_id, window):
+    """Отправка отчёта за окно window"""
+    try:
+        report = engine.report(db_conn, window)
+        if report is None:
+            return False
+
+        payload = {
+            'chat_id': chat_id,
+            'text': format_report(report),
+            'parse_mode': 'HTML'
+        }
+        send_payload(bot_token, payload, kind='stats')
+
+        logger.info("Статистика (%s) отправлена в %s", window, get_time().strftime('%H:%M'))
+        return True
+
+    except Exception as e:
+        logger.error("Ошибка отправки статистики: %s", e)
+        return False
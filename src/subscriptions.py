@@ -0,0 +1,119 @@
+import json
+import re
+
+from builder import EXPERIENCE_CODES
+from salary import salary_value
+from templates import is_digest
+
+_routers = {}
+_ROUTER_CACHE_SIZE = 32
+_CODES = {code.lower(): code for code in EXPERIENCE_CODES}
+_NUMBER_RE = re.compile(r'\d+')
+
+
+def _lower_tuple(values):
+    return tuple(v.strip().lower() for v in values or [] if v.strip())
+
+
+def experience_code(text):
+    """Код опыта hh.ru из кода, ввода builder ("3-6", "6+") или текста выдачи
+    ("Опыт 3–6 лет", "Без опыта"); "" - опыт не распознан"""
+    text = (text or "").strip().lower()
+    if text in _CODES:
+        return _CODES[text]
+    if 'не требуется' in text or 'без опыта' in text:
+        return "noExperience"
+    numbers = _NUMBER_RE.findall(text)
+    if not numbers:
+        return ""
+    start = int(numbers[0])
+    if start >= 6:
+        return "moreThan6"
+    if start >= 3:
+        return "between3And6"
+    if start >= 1:
+        return "between1And3"
+    return "noExperience"
+
+
+class Subscription:
+    """Получатель уведомлений со своими фильтрами поверх общего поиска"""
+
+    def __init__(self, chat_id, message_format="html", min_salary=0, keywords=None,
+                 experience=None, excluded_companies=None, searches=None, include_no_salary=True):
+        self.chat_id = str(chat_id)
+        self.message_format = message_format
+        self.digest = is_digest(message_format)
+        self.min_salary = min_salary or 0
+        self.include_no_salary = include_no_salary
+        self.keywords = _lower_tuple(keywords)
+        # Нераспознанный опыт сравнивается с текстом выдачи как подстрока
+        self.experience = tuple(experience_code(e) or e for e in _lower_tuple(experience))
+        self.excluded_companies = frozenset(_lower_tuple(excluded_companies))
+        self.searches = frozenset(searches) if searches else None
+
+    @classmethod
+    def from_config(cls, data):
+        return cls(
+            data["chat_id"],
+            data.get("message_format", "html"),
+            data.get("min_salary", 0),
+            data.get("keywords"),
+            data.get("experience"),
+            data.get("excluded_companies"),
+            data.get("searches"),
+            data.get("include_no_salary", True),
+        )
+
+
+class Router:
+    """Сопоставляет вакансию со всеми подписками за один проход.
+
+    Признаки вакансии (заголовок и компания в нижнем регистре, зарплата в базовой валюте)
+    считаются один раз, затем каждая подписка проверяется дешёвыми сравнениями.
+    """
+
+    def __init__(self, subscriptions):
+        self.subscriptions = subscriptions
+
+    def recipients(self, vacancy, search_name=None):
+        if not self.subscriptions:
+            return []
+
+        title = (vacancy.get('title') or "").lower()
+        company = (vacancy.get('company') or "").lower()
+        experience = (vacancy.get('experience') or "").lower()
+        experience_kind = experience_code(experience)
+        salary = salary_value(vacancy)
+
+        result = []
+        for sub in self.subscriptions:
+            if sub.searches is not None and search_name not in sub.searches:
+                continue
+            if company in sub.excluded_companies:
+                continue
+            if sub.min_salary:
+                if salary is None:
+                    if not sub.include_no_salary:
+                        continue
+                elif salary < sub.min_salary:
+                    continue
+            if sub.keywords and not any(k in title for k in sub.keywords):
+                continue
+            if sub.experience and not any(e == experience_kind or e not in EXPERIENCE_CODES and e in experience
+                                          for e in sub.experience):
+                continue
+            result.append(sub)
+        return result
+
+
+def get_router(config):
+    """Router для config["subscriptions"], переиспользуется между циклами"""
+    raw = config.get("subscriptions") or []
+    key = json.dumps(raw, sort_keys=True, ensure_ascii=False)
+    router = _routers.get(key)
+    if router is None:
+        if len(_routers) >= _ROUTER_CACHE_SIZE:
+            _routers.pop(next(iter(_routers)))
+        router = _routers[key] = Router([Subscription.from_config(s) for s in raw])
+    return router
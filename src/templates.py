@@ -0,0 +1,143 @@
+import html
+import json
+import re
+import string
+
+_FORMATTER = string.Formatter()
+_MARKDOWN_SPECIAL = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def escape_html(value):
+    return html.escape(value, quote=True)
+
+
+def escape_markdown(value):
+    """Экранирование текста для Telegram MarkdownV2"""
+    return _MARKDOWN_SPECIAL.sub(r'\\\1', value)
+
+
+def escape_markdown_url(value):
+    """Внутри (...) ссылки MarkdownV2 экранируются только ) и \\"""
+    return value.replace('\\', '\\\\').replace(')', '\\)')
+
+
+class Template:
+    """Шаблон сообщения, разобранный один раз при импорте модуля.
+
+    lines - список (текст, обязательное_поле): строка пропускается, если
+    обязательное поле пустое. Поля {name} экранируются функцией escape,
+    {name!u} - функцией escape_url (для адресов ссылок). Литералы шаблона
+    должны быть уже экранированы для своего формата.
+    """
+
+    def __init__(self, lines, escape, escape_url=None, separator="\n"):
+        self.escape = escape
+        self.escape_url = escape_url or escape
+        self.separator = separator
+        self._lines = [(list(_FORMATTER.parse(text)), required) for text, required in lines]
+
+    def render(self, data):
+        parts = []
+        for pieces, required in self._lines:
+            if required and not data.get(required):
+                continue
+            if parts:
+                parts.append(self.separator)
+            for literal, field, _spec, conversion in pieces:
+                if literal:
+                    parts.append(literal)
+                if field is not None:
+                    escape = self.escape_url if conversion == 'u' else self.escape
+                    parts.append(escape(str(data.get(field) or "")))
+        return "".join(parts)
+
+
+HTML_VACANCY = Template([
+    ("<b>{title}</b>", None),
+    ("🏢 <b>Компания:</b> {company}", None),
+    ("💰 <b>Зарплата:</b> {salary}", 'salary'),
+    ("📍 <b>Адрес:</b> {address}", 'address'),
+    ("📊 <b>Опыт:</b> {experience}", 'experience'),
+    ("🔗 <a href='{href!u}'>Ссылка на вакансию</a>", None),
+], escape_html)
+
+MARKDOWN_VACANCY = Template([
+    ("*{title}*", None),
+    ("🏢 *Компания:* {company}", None),
+    ("💰 *Зарплата:* {salary}", 'salary'),
+    ("📍 *Адрес:* {address}", 'address'),
+    ("📊 *Опыт:* {experience}", 'experience'),
+    ("🔗 [Ссылка на вакансию]({href!u})", None),
+], escape_markdown, escape_markdown_url)
+
+COMPACT_ITEM = Template([
+    ("• <a href='{href!u}'>{title}</a> — {company}", None),
+    (" · {salary}", 'salary'),
+], escape_html, separator="")
+
+FORMATS = {
+    'html': {'parse_mode': 'HTML', 'template': HTML_VACANCY, 'digest': False},
+    'markdown': {'parse_mode': 'MarkdownV2', 'template': MARKDOWN_VACANCY, 'digest': False},
+    'compact': {'parse_mode': 'HTML', 'template': COMPACT_ITEM, 'digest': True},
+}
+
+
+def get_format(name):
+    return FORMATS.get(name or 'html', FORMATS['html'])
+
+
+def is_digest(fmt):
+    return get_format(fmt)['digest']
+
+
+def render_vacancy(vacancy, fmt='html'):
+    return get_format(fmt)['template'].render(vacancy)
+
+
+def vacancy_payload(chat_id, vacancy, fmt='html'):
+    """Готовое тело sendMessage для одной вакансии"""
+    return {
+        'chat_id': chat_id,
+        'text': render_vacancy(vacancy, fmt),
+        'parse_mode': get_format(fmt)['parse_mode'],
+        'disable_web_page_preview': False
+    }
+
+
+def digest_payloads(chat_id, vacancies, fmt='compact', limit=TELEGRAM_MESSAGE_LIMIT):
+    """Сводка вакансий одним или несколькими сообщениями (не длиннее limit).
+
+    Возвращает список пар (payload, вакансии в этом сообщении), чтобы
+    подтверждать отправку каждой части отдельно.
+    """
+    template = get_format(fmt)['template']
+    header = f"🆕 <b>Новые вакансии: {len(vacancies)}</b>"
+    result = []
+    lines, chunk, size = [header], [], len(header)
+    for vacancy in vacancies:
+        line = template.render(vacancy)
+        if chunk and size + 1 + len(line) > limit:
+            result.append((lines, chunk))
+            lines, chunk, size = [], [], 0
+        lines.append(line)
+        chunk.append(vacancy)
+        size += 1 + len(line)
+    if chunk:
+        result.append((lines, chunk))
+
+    return [
+        ({
+            'chat_id': chat_id,
+            'text': "\n".join(lines),
+            'parse_mode': get_format(fmt)['parse_mode'],
+            'disable_web_page_preview': True
+        }, chunk)
+        for lines, chunk in result
+    ]
+
+
+def encode_payload(payload):
+    """Сериализует payload заранее, чтобы при доставке оставался только I/O"""
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
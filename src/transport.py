@@ -0,0 +1,196 @@
+import gzip
+import json
+import re
+import threading
+from collections import defaultdict, deque
+
+from log_config import get_logger
+
+logger = get_logger('transport')
+
+# Заголовки ответа, от которых зависит обработка (троттлинг, капча)
+RECORDED_HEADERS = ('Retry-After', 'Content-Type', 'Location')
+
+_TOKEN_RE = re.compile(r'/bot[^/]+/')
+
+
+def redact(url):
+    """URL без токена бота: архив можно хранить и передавать"""
+    return _TOKEN_RE.sub('/bot<token>/', url)
+
+
+class LiveTransport:
+    """Запросы через requests с пулом соединений.
+
+    У каждого потока своя Session (Session не потокобезопасна), а потоки
+    переиспользуются пулом asyncio.to_thread - число сессий ограничено.
+    Сессии завершившихся потоков (например, пула liveness, заменённого при
+    перезагрузке конфига) закрываются при создании следующей сессии.
+    """
+
+    def __init__(self, pool_size=4):
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self._sessions = {}  # поток -> Session
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            import requests.adapters
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size,
+                                                    pool_maxsize=self.pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._local.session = session
+            with self._lock:
+                for thread in [t for t in self._sessions if not t.is_alive()]:
+                    self._sessions.pop(thread).close()
+                self._sessions[threading.current_thread()] = session
+        return session
+
+    def get(self, url, **kwargs):
+        return self._session().get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._session().post(url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+class RecordingTransport:
+    """Пропускает запросы в inner и дописывает каждый обмен в архив (gzip JSONL).
+
+    Запись: method, url (без токена бота), тело запроса для POST, а также
+    status, итоговый url, значимые заголовки и текст ответа.
+    """
+
+    def __init__(self, path, inner=None):
+        self.path = path
+        self.inner = inner or LiveTransport()
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def _record(self, method, url, response, body=None):
+        entry = {
+            'method': method,
+            'url': redact(url),
+            'status': response.status_code,
+            'final_url': redact(response.url or url),
+            'headers': {k: response.headers[k] for k in RECORDED_HEADERS if k in response.headers},
+            'text': response.text,
+        }
+        if body is not None:
+            entry['body'] = body.decode('utf-8') if isinstance(body, bytes) else body
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def get(self, url, **kwargs):
+        response = self.inner.get(url, **kwargs)
+        self._record('GET', url, response)
+        return response
+
+    def post(self, url, **kwargs):
+        response = self.inner.post(url, **kwargs)
+        self._record('POST', url, response, kwargs.get('data'))
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        self.inner.close()
+        logger.info("Архив запросов записан в %s", self.path)
+
+
+class ReplayResponse:
+    """Минимальный ответ в духе requests.Response из записи архива"""
+
+    def __init__(self, entry):
+        from requests.structures import CaseInsensitiveDict
+
+        self.status_code = entry['status']
+        self.url = entry.get('final_url') or entry['url']
+        self.headers = CaseInsensitiveDict(entry.get('headers') or {})
+        self.text = entry.get('text', "")
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} для {self.url}", response=self)
+
+
+class ReplayTransport:
+    """Отвечает записями из архива без сети.
+
+    Ответы на один и тот же запрос отдаются в порядке записи, последний
+    повторяется. GET без записи - ошибка соединения (страница не найдена
+    в архиве), POST без записи (новое сообщение в Telegram) - успешный ответ.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = defaultdict(deque)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[(entry['method'], entry['url'])].append(entry)
+        self._lock = threading.Lock()
+        self.misses = 0
+
+    def _replay(self, method, url):
+        with self._lock:
+            entries = self._entries.get((method, redact(url)))
+            if not entries:
+                self.misses += 1
+                return None
+            return ReplayResponse(entries.popleft() if len(entries) > 1 else entries[0])
+
+    def get(self, url, **kwargs):
+        response = self._replay('GET', url)
+        if response is None:
+            import requests
+            raise requests.ConnectionError(f"нет записи в архиве: {url}")
+        return response
+
+    def post(self, url, **kwargs):
+        response = self._replay('POST', url)
+        if response is None:
+            return ReplayResponse({'status': 200, 'url': redact(url), 'text': '{"ok": true}'})
+        return response
+
+    def close(self):
+        if self.misses:
+            logger.info("Запросов без записи в архиве: %d", self.misses)
+
+
+current = LiveTransport()
+
+
+def install(transport):
+    """Подменяет транспорт для всех запросов parser; возвращает прежний"""
+    global current
+    previous, current = current, transport
+    return previous
+
+
+def get(url, **kwargs):
+    return current.get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return current.post(url, **kwargs)
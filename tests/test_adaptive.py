@@ -0,0 +1,72 @@
+import pytest
+import os
+import sys
+import datetime
+from datetime import timezone, timedelta
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from adaptive import AdaptiveInterval, count_recent_matches, in_quiet_hours
+
+MSK = timezone(timedelta(hours=3))
+DAY = lambda: datetime.datetime(2024, 1, 15, 14, 0, 0, tzinfo=MSK)
+NIGHT = lambda: datetime.datetime(2024, 1, 15, 3, 0, 0, tzinfo=MSK)
+
+SEARCH = {
+    "name": "python",
+    "interval": 10,
+    "min_interval": 5,
+    "max_interval": 60,
+    "adaptive_window": 24,
+    "quiet_hours": [1, 7],
+    "quiet_factor": 3
+}
+
+def make_conn(count):
+    mock_conn = Mock()
+    mock_cursor = Mock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.return_value = [count]
+    return mock_conn
+
+class TestAdaptive:
+
+    @pytest.mark.parametrize("hour,quiet_hours,expected", [
+        (3, [1, 7], True),
+        (7, [1, 7], False),
+        (23, [22, 6], True),
+        (5, [22, 6], True),
+        (12, [22, 6], False),
+        (3, None, False),
+    ])
+    def test_in_quiet_hours(self, hour, quiet_hours, expected):
+        assert in_quiet_hours(hour, quiet_hours) == expected
+
+    def test_no_db_uses_base_interval(self):
+        assert AdaptiveInterval(DAY).minutes(None, SEARCH) == 10
+
+    def test_quiet_search_uses_max_interval(self):
+        assert AdaptiveInterval(DAY).minutes(make_conn(0), SEARCH) == 60
+
+    def test_busy_search_clamped_to_min(self):
+        # 480 совпадений за сутки = 20 в час -> 3 минуты, но не меньше 5
+        assert AdaptiveInterval(DAY).minutes(make_conn(480), SEARCH) == 5
+
+    def test_interval_from_rate(self):
+        # 48 совпадений за сутки = 2 в час -> 30 минут
+        assert AdaptiveInterval(DAY).minutes(make_conn(48), SEARCH) == 30
+
+    def test_night_multiplier(self):
+        # 144 за сутки = 6 в час -> 10 минут, ночью x3
+        assert AdaptiveInterval(NIGHT).minutes(make_conn(144), SEARCH) == 30
+
+    def test_call_returns_seconds(self):
+        assert AdaptiveInterval(DAY)(make_conn(48), SEARCH) == 1800
+
+    def test_count_ignores_pending_claims(self):
+        mock_conn = make_conn(3)
+
+        assert count_recent_matches(mock_conn, "python", 24) == 3
+        query = mock_conn.cursor.return_value.execute.call_args[0][0]
+        assert "status = 'sent'" in query
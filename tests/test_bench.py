@@ -0,0 +1,30 @@
+import pytest
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../benchmarks'))
+
+from bench import check_baseline, compare
+
+BASELINE = {'pages_per_sec': 100.0, 'cycle_latency_sec': 1.0}
+
+class TestBench:
+
+    @pytest.mark.parametrize("results,regressed", [
+        ({'pages_per_sec': 85.0, 'cycle_latency_sec': 1.1}, []),
+        ({'pages_per_sec': 80.0, 'cycle_latency_sec': 1.0}, ['pages_per_sec']),
+        ({'pages_per_sec': 100.0, 'cycle_latency_sec': 1.25}, ['cycle_latency_sec']),
+        ({'pages_per_sec': 200.0, 'new_metric': 1.0}, []),
+    ])
+    def test_compare_threshold(self, results, regressed):
+        assert [r[0] for r in compare(results, BASELINE, 0.2)] == regressed
+
+    def test_check_baseline_exit_codes(self, tmp_path):
+        path = tmp_path / 'baseline.json'
+
+        assert check_baseline(BASELINE, str(path), 0.2) == 2
+
+        path.write_text(json.dumps(BASELINE), encoding='utf-8')
+        assert check_baseline(BASELINE, str(path), 0.2) == 0
+        assert check_baseline(dict(BASELINE, pages_per_sec=50.0), str(path), 0.2) == 1
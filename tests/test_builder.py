@@ -7,7 +7,11 @@ from unittest.mock import patch, mock_open
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
 
-from builder import load_config, save_config, build_url, get_experience, REGIONS
+from builder import (
+    load_config, save_config, build_url, get_experience, get_searches, validate_config,
+    parse_regions, parse_experience, normalize_excluded, import_searches, main,
+    DEFAULT_CONFIG, REGIONS
+)
 
 class TestBuilder:
     
@@ -108,6 +112,22 @@ class TestBuilder:
         assert "excluded_text=java+php" in url or "excluded_text=java php" in url
         assert "page=1" in url
     
+    def test_build_url_encodes_special_characters(self):
+        url = build_url("C# & C++ #1", "1C+PHP, c++", [], "", 0)
+        assert "text=C%23+%26+C%2B%2B+%231" in url
+        assert "excluded_text=1C+PHP+c%2B%2B" in url
+        assert url.endswith("&page=0")
+
+    def test_build_url_is_canonical(self):
+        a = build_url("python  developer ", "java+php", ["area=40", "area=113"], "between1And3", 2)
+        b = build_url("python developer", "java php", [113, "area=40", "113"], "between1And3", 2)
+        assert a == b
+        query = a.split("?", 1)[1].split("&")
+        keys = [p.split("=")[0] for p in query[:-1]]
+        assert keys == sorted(keys)
+        assert query[-1] == "page=2"
+        assert build_url("python", "", [], "", None) == build_url("python", "", [], "", 5).rsplit("&", 1)[0]
+
     def test_build_url_empty_params(self):
         url = build_url("test", "", [], "", 0)
         assert "text=test" in url
@@ -139,4 +159,132 @@ class TestBuilder:
         inputs = ["invalid", "1-3"]
         with patch('builtins.input', side_effect=inputs):
             result = get_experience()
-            assert result == "between1And3"
\ No newline at end of file
+            assert result == "between1And3"
+    
+    def test_get_searches_single(self):
+        config = {"search_text": "Python", "interval": 10, "searches": []}
+        searches = get_searches(config)
+        assert len(searches) == 1
+        assert searches[0]["name"] == "Python"
+        assert "searches" not in searches[0]
+    
+    def test_get_searches_overrides(self):
+        config = {
+            "search_text": "Python",
+            "interval": 10,
+            "min_similarity": 70,
+            "searches": [
+                {"name": "go", "search_text": "Go Developer"},
+                {"search_text": "Rust", "interval": 30}
+            ]
+        }
+        searches = get_searches(config)
+        assert [s["name"] for s in searches] == ["go", "Rust"]
+        assert searches[0]["interval"] == 10
+        assert searches[0]["min_similarity"] == 70
+        assert searches[1]["interval"] == 30
+
+    def test_validate_config_ok(self):
+        config = dict(DEFAULT_CONFIG, bot_token="t", chat_id="1",
+                      searches=[{"name": "go", "search_text": "Go", "interval": 5}])
+        assert validate_config(config) == []
+
+    @pytest.mark.parametrize("overrides,error", [
+        ({"bot_token": ""}, "bot_token"),
+        ({"interval": 0}, "interval"),
+        ({"interval": "10"}, "interval"),
+        ({"min_similarity": 150}, "min_similarity"),
+        ({"search_text": " "}, "search_text"),
+        ({"area_ids": "area=1"}, "area_ids"),
+        ({"area_ids": ["area=moscow"]}, "area_ids"),
+        ({"searches": [{"name": "a"}, {"name": "a"}]}, "повторяющееся"),
+        ({"searches": "python"}, "searches"),
+        ({"experience": "between0And1"}, "experience"),
+        ({"searches": [{"name": "go", "experience": "3-6"}]}, "experience"),
+    ])
+    def test_validate_config_errors(self, overrides, error):
+        config = dict(DEFAULT_CONFIG, bot_token="t", chat_id="1")
+        config.update(overrides)
+        errors = validate_config(config)
+        assert any(error in e for e in errors)
+
+    def test_get_searches_base_url(self):
+        config = {"search_text": "Python", "excluded_text": "", "area_ids": ["area=113"],
+                  "experience": "", "searches": []}
+        base_url = get_searches(config)[0]["base_url"]
+        assert base_url == build_url("Python", "", ["area=113"], "", None)
+        assert "&page=" not in base_url
+
+    def test_parse_regions(self):
+        assert parse_regions("Россия, казахстан") == ["area=113", "area=40"]
+        assert parse_regions([16, "area=28", "5"]) == ["area=16", "area=28", "area=5"]
+        assert parse_regions("") == []
+        with pytest.raises(ValueError, match="марс"):
+            parse_regions("россия, марс")
+
+    @pytest.mark.parametrize("value,expected", [
+        ("0", "noExperience"), ("1-3", "between1And3"), ("6+", "moreThan6"),
+        (4, "between3And6"), ("between1And3", "between1And3"), ("", ""),
+        ("0-1", "noExperience"), ("1+", "between1And3"), ("3+", "between3And6"), ("0+", ""),
+    ])
+    def test_parse_experience(self, value, expected):
+        assert parse_experience(value) == expected
+
+    @pytest.mark.parametrize("value", ["abc", "5-2", "x+", "0-6"])
+    def test_parse_experience_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_experience(value)
+
+    def test_normalize_excluded(self):
+        assert normalize_excluded("java, php") == "java php"
+        assert normalize_excluded(["java", "php"]) == "java php"
+        assert normalize_excluded(None) == ""
+
+    def test_import_searches_json(self, tmp_path):
+        path = tmp_path / "searches.json"
+        path.write_text(json.dumps({
+            "interval": 15,
+            "searches": [
+                {"name": "go", "search_text": "Go Developer", "regions": "россия", "experience": "1-3"},
+                {"search_text": "Rust", "regions": ["беларусь"], "interval": "30", "min_similarity": ""},
+            ]
+        }), encoding="utf-8")
+
+        config, errors = import_searches(str(path), bot_token="t", chat_id="1")
+
+        assert errors == []
+        assert config["interval"] == 15 and config["bot_token"] == "t"
+        assert config["searches"] == [
+            {"name": "go", "search_text": "Go Developer", "area_ids": ["area=113"], "experience": "between1And3"},
+            {"search_text": "Rust", "area_ids": ["area=16"], "interval": 30},
+        ]
+
+    def test_import_searches_csv_collects_errors(self, tmp_path):
+        path = tmp_path / "searches.csv"
+        path.write_text(
+            "name,search_text,regions,experience,interval\n"
+            "py,Python,\"россия, грузия\",3-6,10\n"
+            "bad,Java,атлантида,когда-то,часто\n",
+            encoding="utf-8"
+        )
+
+        config, errors = import_searches(str(path), {"bot_token": "t", "chat_id": "1"})
+
+        assert config["searches"][0] == {"name": "py", "search_text": "Python",
+                                         "area_ids": ["area=113", "area=28"],
+                                         "experience": "between3And6", "interval": 10}
+        assert len(errors) == 3
+        assert all(e.startswith("bad: ") for e in errors)
+
+    def test_main_check_does_not_write(self, tmp_path):
+        path = tmp_path / "searches.json"
+        path.write_text(json.dumps([{"search_text": "Python"}]), encoding="utf-8")
+        output = tmp_path / "config.json"
+
+        assert main(["--searches", str(path), "--fresh", "--output", str(output)]) == 1
+        assert main(["--searches", str(path), "--fresh", "--bot-token", "t", "--chat-id", "1",
+                     "--output", str(output), "--check"]) == 0
+        assert not output.exists()
+        assert main(["--searches", str(path), "--fresh", "--bot-token", "t", "--chat-id", "1",
+                     "--output", str(output)]) == 0
+        assert json.loads(output.read_text(encoding="utf-8"))["searches"] == [{"search_text": "Python"}]
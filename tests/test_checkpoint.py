@@ -0,0 +1,65 @@
+import pytest
+import os
+import sys
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from checkpoint import load_checkpoint, save_checkpoint, resume_page, initial_delay, DONE, IN_PROGRESS, MAX_PAGES_LENGTH
+
+class TestCheckpoint:
+
+    def test_load_checkpoint_no_connection(self):
+        assert load_checkpoint(None, 'python') is None
+
+    def test_load_checkpoint_row(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = (3, IN_PROGRESS, 42, '5,7')
+
+        checkpoint = load_checkpoint(mock_conn, 'python')
+
+        assert checkpoint == {'page': 3, 'status': IN_PROGRESS, 'age': 42,
+                              'failed_pages': [5, 7]}
+
+    def test_save_checkpoint_upsert(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+
+        save_checkpoint(mock_conn, 'python', 2)
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert 'ON DUPLICATE KEY UPDATE' in query
+        assert params == ('python', 2, IN_PROGRESS, '')
+        mock_conn.commit.assert_called_once()
+
+    def test_save_checkpoint_caps_failed_pages(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+
+        save_checkpoint(mock_conn, 'python', 2, failed_pages=range(1000, 1200))
+
+        packed = mock_cursor.execute.call_args[0][1][3]
+        assert len(packed) <= MAX_PAGES_LENGTH
+        assert packed.startswith('1000,1001,')
+
+    @pytest.mark.parametrize("checkpoint,expected", [
+        (None, 0),
+        ({'page': 4, 'status': IN_PROGRESS, 'age': 30}, 4),
+        ({'page': 4, 'status': IN_PROGRESS, 'age': 3600}, 0),
+        ({'page': 0, 'status': DONE, 'age': 30}, 0),
+    ])
+    def test_resume_page(self, checkpoint, expected):
+        assert resume_page(checkpoint, 600) == expected
+
+    @pytest.mark.parametrize("checkpoint,expected", [
+        (None, 0),
+        ({'page': 0, 'status': DONE, 'age': 100}, 500),
+        ({'page': 0, 'status': DONE, 'age': 900}, 0),
+        ({'page': 2, 'status': IN_PROGRESS, 'age': 100}, 0),
+    ])
+    def test_initial_delay(self, checkpoint, expected):
+        assert initial_delay(checkpoint, 600) == expected
@@ -0,0 +1,62 @@
+import pytest
+import os
+import sys
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from cluster import LeaseCoordinator
+
+SEARCH = {"name": "python", "interval": 10}
+
+def make_conn(fetchone):
+    mock_conn = Mock()
+    mock_cursor = Mock()
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.fetchone.side_effect = fetchone
+    return mock_conn, mock_cursor
+
+class TestCluster:
+
+    def test_acquire_without_db(self):
+        coordinator = LeaseCoordinator("w1", 2)
+        assert coordinator.acquire(None, SEARCH) == True
+
+    def test_acquire_free_lease(self):
+        # 2 живых воркера, у нас 0 аренд, поиск свободен, после захвата - наш
+        conn, cursor = make_conn([[2], [0], None, ["w1"]])
+        coordinator = LeaseCoordinator("w1", 4)
+
+        assert coordinator.acquire(conn, SEARCH) == True
+
+    def test_acquire_lost_race(self):
+        conn, cursor = make_conn([[2], [0], None, ["w2"]])
+        coordinator = LeaseCoordinator("w1", 4)
+
+        assert coordinator.acquire(conn, SEARCH) == False
+
+    def test_acquire_over_fair_share_skips(self):
+        # 2 воркера, 4 поиска - доля 2, у нас уже 2 чужих поиска
+        conn, cursor = make_conn([[2], [2], ["w2", 1]])
+        coordinator = LeaseCoordinator("w1", 4)
+
+        assert coordinator.acquire(conn, SEARCH) == False
+
+    def test_acquire_releases_excess_lease(self):
+        # Появился третий воркер: доля 2, у нас 3 аренды, включая эту
+        conn, cursor = make_conn([[3], [3], ["w1", 1]])
+        coordinator = LeaseCoordinator("w1", 6)
+
+        assert coordinator.acquire(conn, SEARCH) == False
+        assert cursor.execute.call_args[0][0].startswith("DELETE FROM search_leases")
+
+    def test_wrap_runs_job_only_with_lease(self):
+        job = Mock()
+        coordinator = LeaseCoordinator("w1", 1)
+        coordinator.acquire = Mock(side_effect=[True, False])
+        cluster_job = coordinator.wrap(job)
+
+        cluster_job(None, SEARCH)
+        cluster_job(None, SEARCH)
+
+        job.assert_called_once_with(None, SEARCH, None)
@@ -0,0 +1,119 @@
+import pytest
+import os
+import sys
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from commands import CommandBot, CommandState
+
+SEARCHES = [
+    {"name": "python", "search_text": "python", "min_similarity": 60, "interval": 10},
+    {"name": "Data Engineer", "search_text": "data engineer", "min_similarity": 70, "interval": 30},
+]
+CONFIG = {"bot_token": "TOKEN", "chat_id": "100", "command_chats": [200]}
+
+def _update(update_id, text, chat_id=100):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "text": text}}
+
+def _response(updates):
+    response = Mock(status_code=200)
+    response.json.return_value = {"ok": True, "result": updates}
+    return response
+
+class TestCommandState:
+
+    def test_wrap_skips_paused_search(self):
+        state = CommandState()
+        state.paused.add("python")
+        job = Mock()
+
+        assert state.wrap(job)(None, SEARCHES[0]) is None
+        job.assert_not_called()
+
+    def test_wrap_applies_threshold_and_records(self):
+        state = CommandState()
+        state.thresholds["python"] = 85
+        job = Mock(return_value=Mock(sent=2))
+
+        state.wrap(job)(None, SEARCHES[0])
+        state.wrap(job)(None, SEARCHES[0])
+
+        assert job.call_args[0][1]["min_similarity"] == 85
+        assert SEARCHES[0]["min_similarity"] == 60
+        assert state.cycles["python"]["cycles"] == 2
+        assert state.cycles["python"]["sent"] == 4
+
+class TestCommandBot:
+
+    def _bot(self):
+        return CommandBot(CONFIG, CommandState(), lambda: SEARCHES)
+
+    def test_pause_resume(self):
+        bot = self._bot()
+
+        assert "приостановлен" in bot.handle("/pause data engineer")
+        assert "Data Engineer" in bot.state.paused
+        assert "пауза" in bot.handle("/searches")
+        bot.handle("/resume Data Engineer")
+        assert not bot.state.paused
+
+    def test_threshold(self):
+        bot = self._bot()
+
+        assert "85%" in bot.handle("/threshold python 85")
+        assert bot.state.thresholds == {"python": 85}
+        assert "от 0 до 100" in bot.handle("/threshold python 150")
+        bot.handle("/threshold python")
+        assert bot.state.thresholds == {}
+
+    def test_unknown_search_and_command(self):
+        bot = self._bot()
+
+        assert "не найден" in bot.handle("/pause golang")
+        assert "Неизвестная команда" in bot.handle("/deploy")
+
+    def test_stats_from_memory(self):
+        bot = self._bot()
+        bot.state.record("python", 5)
+
+        text = bot.handle("/stats@hh_bot")
+
+        assert "отправлено 5 за 1 циклов" in text
+        assert "циклов ещё не было" in text
+        assert "Всего отправлено:</b> 5" in text
+
+    @patch('commands.send_payload')
+    @patch('commands.transport.get')
+    def test_poll_answers_allowed_chats_only(self, mock_get, mock_send):
+        mock_get.return_value = _response([
+            _update(1, "/pause python"),
+            _update(2, "/pause python", chat_id=999),
+            _update(3, "просто текст"),
+            _update(4, "/help", chat_id=200),
+        ])
+        bot = self._bot()
+        bot.drained = True
+
+        assert bot.poll() == 2
+        assert bot.offset == 5
+        assert [call[0][1]["chat_id"] for call in mock_send.call_args_list] == ["100", "200"]
+        assert mock_get.call_args[1]["params"]["timeout"] == 10
+        assert "offset" not in mock_get.call_args[1]["params"]
+
+        mock_get.return_value = _response([])
+        bot.poll()
+        assert mock_get.call_args[1]["params"]["offset"] == 5
+
+    @patch('commands.send_payload')
+    @patch('commands.transport.get')
+    def test_poll_skips_updates_from_before_start(self, mock_get, mock_send):
+        mock_get.side_effect = [_response([_update(7, "/pause python")]), _response([_update(8, "/help")])]
+        bot = self._bot()
+
+        assert bot.poll() == 1
+
+        drain, poll = mock_get.call_args_list
+        assert drain[1]["params"]["offset"] == -1 and drain[1]["params"]["timeout"] == 0
+        assert poll[1]["params"]["offset"] == 8
+        assert bot.state.paused == set()
@@ -0,0 +1,60 @@
+import pytest
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from builder import DEFAULT_CONFIG
+from config_watch import ConfigWatcher
+
+class TestConfigWatch:
+
+    def _write(self, path, data, mtime):
+        path.write_text(data if isinstance(data, str) else json.dumps(data), encoding='utf-8')
+        os.utime(path, ns=(mtime, mtime))
+
+    def _config(self, **overrides):
+        config = dict(DEFAULT_CONFIG, bot_token="t", chat_id="1")
+        config.update(overrides)
+        return config
+
+    def test_unchanged_file_is_not_reread(self, tmp_path):
+        path = tmp_path / 'config.json'
+        self._write(path, self._config(), 1_000_000_000)
+        watcher = ConfigWatcher(self._config(), str(path))
+
+        assert watcher.poll() is None
+
+    def test_valid_change_is_applied(self, tmp_path):
+        path = tmp_path / 'config.json'
+        self._write(path, self._config(), 1_000_000_000)
+        watcher = ConfigWatcher(self._config(), str(path))
+
+        self._write(path, {"bot_token": "t", "chat_id": "1", "interval": 3}, 2_000_000_000)
+        config = watcher.poll()
+
+        assert config["interval"] == 3
+        assert config["min_similarity"] == DEFAULT_CONFIG["min_similarity"]
+        assert watcher.config is config
+        assert watcher.poll() is None
+
+    @pytest.mark.parametrize("content", [
+        '{"bot_token": "t", "chat_id": ',
+        json.dumps({"bot_token": "t", "chat_id": "1", "interval": -1}),
+    ])
+    def test_invalid_change_is_rejected(self, tmp_path, content):
+        path = tmp_path / 'config.json'
+        self._write(path, self._config(), 1_000_000_000)
+        current = self._config()
+        watcher = ConfigWatcher(current, str(path))
+
+        self._write(path, content, 2_000_000_000)
+
+        assert watcher.poll() is None
+        assert watcher.config is current
+
+    def test_missing_file(self, tmp_path):
+        watcher = ConfigWatcher(self._config(), str(tmp_path / 'config.json'))
+
+        assert watcher.poll() is None
@@ -0,0 +1,81 @@
+import pytest
+import os
+import sys
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from fingerprint import (
+    FingerprintIndex, bands, distance, find_repost, fingerprint, normalize_text, record_fingerprint
+)
+
+VACANCY = {
+    'title': 'Senior Python Developer',
+    'company': 'ООО «Рога и копыта»',
+    'salary_from_base': 250000,
+    'salary_to_base': 300000,
+    'href': 'https://hh.ru/vacancy/1'
+}
+
+class TestFingerprint:
+
+    def test_normalize_text(self):
+        assert normalize_text('  Senior  Python-разработчик (Ёлки) ') == 'senior python разработчик елки'
+
+    def test_repost_has_same_fingerprint(self):
+        repost = dict(VACANCY, title='SENIOR python developer!', company='ООО Рога и копыта',
+                      href='https://hh.ru/vacancy/2')
+
+        assert fingerprint(repost) == fingerprint(VACANCY)
+
+    @pytest.mark.parametrize("changes", [
+        {'title': 'Junior Java Developer'},
+        {'company': 'Яндекс'},
+        {'salary_from_base': 100000, 'salary_to_base': 150000},
+    ])
+    def test_different_vacancy_is_far(self, changes):
+        assert distance(fingerprint(VACANCY), fingerprint(dict(VACANCY, **changes))) > 3
+
+    def test_bands_split_fingerprint(self):
+        fp = 0x0123_4567_89ab_cdef
+
+        assert bands(fp) == [0xcdef, 0x89ab, 0x4567, 0x0123]
+
+    def test_index_finds_near_duplicate(self):
+        index = FingerprintIndex()
+        fp = fingerprint(VACANCY)
+        index.add('https://hh.ru/vacancy/1', fp)
+
+        assert index.find(fp ^ 0b101, 3) == 'https://hh.ru/vacancy/1'
+        assert index.find(fp, 3, exclude_url='https://hh.ru/vacancy/1') is None
+        assert index.find(fp ^ 0xffff_ffff, 3) is None
+
+    def test_find_repost_no_connection(self):
+        assert find_repost(None, 'https://hh.ru/vacancy/2', 1) is None
+
+    def test_find_repost_checks_distance(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        fp = fingerprint(VACANCY)
+        mock_cursor.fetchall.return_value = [
+            ('https://hh.ru/vacancy/7', fp ^ 0xff00),
+            ('https://hh.ru/vacancy/1', fp ^ 0b11),
+        ]
+
+        assert find_repost(mock_conn, 'https://hh.ru/vacancy/2', fp) == 'https://hh.ru/vacancy/1'
+        query, params = mock_cursor.execute.call_args[0]
+        assert 'b0 = %s OR b1 = %s' in query
+        assert params[:4] == tuple(bands(fp))
+
+    def test_record_fingerprint(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+
+        record_fingerprint(mock_conn, 'https://hh.ru/vacancy/1', 42)
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert query.startswith("INSERT IGNORE INTO vacancy_fingerprints")
+        assert params == ('https://hh.ru/vacancy/1', 42, 42, 0, 0, 0)
+        mock_conn.commit.assert_called_once()
@@ -0,0 +1,116 @@
+import pytest
+import datetime
+import gzip
+import json
+import os
+import sys
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from history import detect_format, export_table, import_table, read_chunks, parse_args
+
+ROWS = [
+    (1, 'https://hh.ru/vacancy/1', 'Python', datetime.datetime(2024, 1, 1, 12, 0), None),
+    (2, 'https://hh.ru/vacancy/2', 'Go', datetime.datetime(2024, 1, 2, 12, 0), 'python'),
+    (3, 'https://hh.ru/vacancy/3', 'Rust', datetime.datetime(2024, 1, 3, 12, 0), 'python'),
+]
+COLUMNS = ['id', 'url', 'title', 'sent_date', 'search_name']
+
+class TestHistory:
+
+    def _export_conn(self, chunk_size):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.description = [(c,) for c in COLUMNS]
+        chunks = [ROWS[i:i + chunk_size] for i in range(0, len(ROWS), chunk_size)]
+        mock_cursor.fetchmany.side_effect = chunks + [[]]
+        return mock_conn, mock_cursor
+
+    def _import_conn(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        return mock_conn, mock_cursor
+
+    @pytest.mark.parametrize("path,expected", [
+        ('out.csv', 'csv'), ('out.csv.gz', 'csv'), ('out.parquet', 'parquet'),
+        ('archive/sent_vacancies-202401.jsonl.gz', 'jsonl'),
+    ])
+    def test_detect_format(self, path, expected):
+        assert detect_format(path) == expected
+
+    def test_detect_format_unknown(self):
+        with pytest.raises(ValueError):
+            detect_format('out.xlsx')
+
+    def test_export_csv_in_chunks(self, tmp_path):
+        path = str(tmp_path / 'out.csv.gz')
+        mock_conn, mock_cursor = self._export_conn(2)
+
+        assert export_table(mock_conn, 'sent_vacancies', path, chunk_size=2) == 3
+
+        mock_cursor.fetchmany.assert_called_with(2)
+        mock_cursor.fetchall.assert_not_called()
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines[0] == ','.join(COLUMNS)
+        assert lines[1] == '1,https://hh.ru/vacancy/1,Python,2024-01-01 12:00:00,'
+
+    def test_export_unknown_table(self, tmp_path):
+        with pytest.raises(ValueError):
+            export_table(Mock(), 'users', str(tmp_path / 'out.csv'))
+
+    def test_import_csv_batched_without_ids(self, tmp_path):
+        path = str(tmp_path / 'out.csv')
+        export_table(self._export_conn(3)[0], 'sent_vacancies', path)
+        mock_conn, mock_cursor = self._import_conn()
+
+        assert import_table(mock_conn, 'sent_vacancies', path, chunk_size=2) == 3
+
+        assert mock_cursor.executemany.call_count == 2
+        query, params = mock_cursor.executemany.call_args_list[0][0]
+        assert query.startswith("INSERT IGNORE INTO sent_vacancies (url, title, sent_date, search_name)")
+        assert params[0] == ('https://hh.ru/vacancy/1', 'Python', '2024-01-01 12:00:00', None)
+        assert not os.path.exists(path + '.progress')
+
+    def test_import_resume_skips_committed_rows(self, tmp_path):
+        path = str(tmp_path / 'out.jsonl')
+        export_table(self._export_conn(3)[0], 'sent_vacancies', path)
+        with open(path + '.progress', 'w') as f:
+            json.dump({'rows': 2}, f)
+        mock_conn, mock_cursor = self._import_conn()
+
+        assert import_table(mock_conn, 'sent_vacancies', path, chunk_size=2, resume=True) == 3
+
+        [call] = mock_cursor.executemany.call_args_list
+        assert [row[0] for row in call[0][1]] == ['https://hh.ru/vacancy/3']
+
+    def test_import_failure_keeps_progress(self, tmp_path):
+        path = str(tmp_path / 'out.csv')
+        export_table(self._export_conn(3)[0], 'sent_vacancies', path)
+        mock_conn, mock_cursor = self._import_conn()
+        mock_cursor.executemany.side_effect = [None, Exception("connection lost")]
+
+        with pytest.raises(Exception):
+            import_table(mock_conn, 'sent_vacancies', path, chunk_size=2)
+
+        with open(path + '.progress') as f:
+            assert json.load(f) == {'rows': 2}
+
+    def test_parquet_roundtrip(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        path = str(tmp_path / 'out.parquet')
+
+        export_table(self._export_conn(2)[0], 'sent_vacancies', path, chunk_size=2)
+        rows = [row for chunk in read_chunks(path) for row in chunk]
+
+        assert [r['url'] for r in rows] == [r[1] for r in ROWS]
+        assert rows[1]['sent_date'] == datetime.datetime(2024, 1, 2, 12, 0)
+
+    def test_parse_args(self):
+        args = parse_args(["import", "dump.csv", "--resume", "--chunk", "100"])
+
+        assert (args.command, args.path, args.table, args.chunk, args.resume) == \
+            ("import", "dump.csv", "sent_vacancies", 100, True)
@@ -0,0 +1,116 @@
+import pytest
+import os
+import sys
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+import ratelimit
+from liveness import LivenessChecker, archived_ids, check_vacancy, record_archived
+
+OPEN_PAGE = '<div data-qa="vacancy-description">Python</div>'
+ARCHIVED_PAGE = '<div data-qa="vacancy-archive-description">Вакансия в архиве</div>'
+
+
+def vacancy(vid):
+    return {'title': f'Вакансия {vid}', 'href': f'https://hh.ru/vacancy/{vid}', 'company': ''}
+
+
+class TestLiveness:
+
+    def setup_method(self):
+        ratelimit.configure({"hh_rate": 1000, "hh_burst": 1000})
+
+    @pytest.mark.parametrize("status, text, expected", [
+        (200, OPEN_PAGE, True),
+        (200, ARCHIVED_PAGE, False),
+        (404, '', False),
+        (500, '', None),
+    ])
+    @patch('requests.Session.get')
+    def test_check_vacancy(self, mock_get, status, text, expected):
+        mock_get.return_value = Mock(status_code=status, ok=status < 400, text=text, headers={})
+
+        assert check_vacancy('https://hh.ru/vacancy/1') is expected
+
+    @patch('requests.Session.get')
+    def test_check_vacancy_throttled_opens_breaker(self, mock_get):
+        mock_get.return_value = Mock(status_code=429, ok=False, text='', headers={})
+
+        assert check_vacancy('https://hh.ru/vacancy/1') is None
+        assert check_vacancy('https://hh.ru/vacancy/2') is None
+        assert mock_get.call_count == 1
+
+    @patch('liveness.check_vacancy')
+    def test_closed_checks_each_vacancy_once(self, mock_check):
+        mock_check.side_effect = lambda url: not url.endswith('/2')
+        checker = LivenessChecker(ttl=3600, concurrency=2)
+
+        vacancies = [vacancy(1), vacancy(2), vacancy(3)]
+        assert checker.closed(None, vacancies) == {'https://hh.ru/vacancy/2'}
+        assert checker.closed(None, vacancies) == {'https://hh.ru/vacancy/2'}
+        assert mock_check.call_count == 3
+        checker.close()
+
+    @patch('liveness.check_vacancy')
+    def test_open_vacancy_rechecked_after_ttl(self, mock_check):
+        now = [0.0]
+        mock_check.return_value = True
+        checker = LivenessChecker(ttl=60, clock=lambda: now[0])
+
+        checker.closed(None, [vacancy(1)])
+        now[0] = 61
+        checker.closed(None, [vacancy(1)])
+
+        assert mock_check.call_count == 2
+        checker.close()
+
+    @patch('liveness.check_vacancy')
+    def test_unknown_result_is_not_cached(self, mock_check):
+        mock_check.return_value = None
+        checker = LivenessChecker()
+
+        assert checker.closed(None, [vacancy(1)]) == set()
+        checker.closed(None, [vacancy(1)])
+        assert mock_check.call_count == 2
+        checker.close()
+
+    @patch('liveness.check_vacancy')
+    def test_archived_in_db_skips_request(self, mock_check):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [(2,)]
+        mock_check.return_value = False
+        checker = LivenessChecker()
+
+        closed = checker.closed(mock_conn, [vacancy(1), vacancy(2)])
+
+        assert closed == {'https://hh.ru/vacancy/1', 'https://hh.ru/vacancy/2'}
+        mock_check.assert_called_once_with('https://hh.ru/vacancy/1')
+        # Новая закрытая вакансия записывается в БД
+        rows = mock_cursor.executemany.call_args[0][1]
+        assert rows == [(1, 'https://hh.ru/vacancy/1')]
+        checker.close()
+
+    def test_cache_is_bounded(self):
+        checker = LivenessChecker(max_size=2)
+        for vid in (1, 2, 3):
+            checker.remember(vid, False)
+
+        assert checker.cached(1) is None
+        assert checker.cached(3) is False
+
+    def test_archived_ids_single_query(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchall.return_value = [(1,)]
+
+        assert archived_ids(mock_conn, [1, 2, 3]) == {1}
+        query, params = mock_cursor.execute.call_args[0]
+        assert query.count('%s') == 3 and params == (1, 2, 3)
+
+    def test_no_connection(self):
+        assert archived_ids(None, [1]) == set()
+        record_archived(None, [vacancy(1)])
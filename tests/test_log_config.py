@@ -0,0 +1,46 @@
+import pytest
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from log_config import ExcQueueHandler, JsonFormatter, get_logger
+
+class TestLogConfig:
+
+    def test_get_logger_namespace(self):
+        assert get_logger('parser').name == 'hh.parser'
+
+    def test_json_formatter_basic(self):
+        record = logging.LogRecord('hh.main', logging.INFO, __file__, 1, "Найдено %d вакансий", (3,), None)
+
+        data = json.loads(JsonFormatter().format(record))
+
+        assert data['level'] == 'INFO'
+        assert data['logger'] == 'hh.main'
+        assert data['msg'] == 'Найдено 3 вакансий'
+
+    def test_json_formatter_extra_fields(self):
+        record = logging.LogRecord('hh.main', logging.DEBUG, __file__, 1, "Новая вакансия", (), None)
+        record.href = 'https://hh.ru/vacancy/123'
+        record.score = 85
+
+        data = json.loads(JsonFormatter().format(record))
+
+        assert data['href'] == 'https://hh.ru/vacancy/123'
+        assert data['score'] == 85
+
+    def test_queue_handler_keeps_exception_separate(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord('hh.main', logging.ERROR, __file__, 1, "Ошибка %s", ('БД',),
+                                       sys.exc_info())
+
+        prepared = ExcQueueHandler(None).prepare(record)
+        data = json.loads(JsonFormatter().format(prepared))
+
+        assert data['msg'] == 'Ошибка БД'
+        assert 'ValueError: boom' in data['exc']
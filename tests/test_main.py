@@ -5,7 +5,46 @@ from unittest.mock import patch, Mock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
 
-from main import job, main, schedule_stats
+from main import job, main, apply_config, fetch_page, run_replay, run_once, parse_args
+from builder import build_url
+
+class SentVacanciesDB:
+    """sent_vacancies в памяти: url -> статус; остальные запросы ничего не находят"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        cursor = Mock(rowcount=0)
+        cursor.fetchone.return_value = None
+        cursor.fetchall.return_value = []
+
+        def execute(query, params=()):
+            import mysql.connector
+            cursor.rowcount = 0
+            cursor.fetchone.return_value = None
+            if query.startswith("SELECT id FROM sent_vacancies"):
+                if "status = 'sent'" not in query or self.rows.get(params[0]) == 'sent':
+                    cursor.fetchone.return_value = (1,) if params[0] in self.rows else None
+            elif query.startswith("INSERT INTO sent_vacancies"):
+                if params[0] in self.rows:
+                    raise mysql.connector.errors.IntegrityError("Duplicate entry")
+                self.rows[params[0]] = 'pending'
+            elif query.startswith("UPDATE sent_vacancies SET claimed_by"):
+                # Захват старше stale_after: строка досталась упавшему воркеру
+                if self.rows.get(params[1]) == 'pending':
+                    cursor.rowcount = 1
+            elif query.startswith("UPDATE sent_vacancies SET status = 'sent'"):
+                if params[0] in self.rows:
+                    self.rows[params[0]] = 'sent'
+                    cursor.rowcount = 1
+
+        cursor.execute.side_effect = execute
+        return cursor
+
+    def commit(self):
+        pass
+
 
 class TestMain:
     
@@ -44,6 +83,33 @@ class TestMain:
         mock_send.assert_called_once()
         mock_mark.assert_called_once()
     
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.send_telegram_message')
+    def test_job_takes_over_stale_pending_claim(self, mock_send, mock_similarity, mock_parse):
+        config = {
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test_token",
+            "chat_id": "test_chat",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+            "repost_dedup": False
+        }
+        url = 'https://hh.ru/vacancy/123'
+        db = SentVacanciesDB({url: 'pending'})
+        mock_parse.return_value = [{'title': 'Python Developer', 'href': url, 'company': 'Test Co'}]
+        mock_similarity.return_value = (True, 85)
+        mock_send.return_value = True
+
+        result = job(db, config)
+
+        # Воркер упал между захватом и отправкой - вакансию отправляет этот цикл
+        mock_send.assert_called_once()
+        assert db.rows[url] == 'sent'
+        assert result.sent == 1
+
     @patch('main.parse_vacancies_from_url')
     @patch('main.similarity_check') 
     def test_job_no_suitable_vacancies(self, mock_similarity, mock_parse):
@@ -86,9 +152,8 @@ class TestMain:
     @patch('main.get_config')
     @patch('main.connect_db')
     @patch('main.create_table_if_not_exists')
-    @patch('main.schedule')
-    @patch('main.job')
-    def test_main_success(self, mock_job, mock_schedule, mock_create_table, 
+    @patch('scheduler.Scheduler')
+    def test_main_success(self, mock_scheduler, mock_create_table, 
                          mock_connect_db, mock_get_config):
         mock_config = {
             "bot_token": "test",
@@ -105,65 +170,452 @@ class TestMain:
         mock_db = Mock()
         mock_connect_db.return_value = mock_db
         
-        mock_schedule.run_pending.side_effect = KeyboardInterrupt
+        mock_scheduler.return_value.run.side_effect = KeyboardInterrupt
         
-        try:
-            main()
-        except KeyboardInterrupt:
-            pass
+        main()
         
         mock_get_config.assert_called_once()
         mock_connect_db.assert_called_once()
         mock_create_table.assert_called_once_with(mock_db)
-        mock_job.assert_called()
+        searches = mock_scheduler.call_args[0][1]
+        assert [s["name"] for s in searches] == ["Python"]
+        mock_scheduler.return_value.run.assert_called_once()
     
-    @patch('main.get_config')
-    def test_main_no_config(self, mock_get_config):
-        mock_get_config.return_value = {
-            "bot_token": "",
-            "chat_id": "",
-            "search_text": "Python", 
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.load_checkpoint')
+    @patch('main.save_checkpoint')
+    def test_job_resumes_from_checkpoint(self, mock_save, mock_load, mock_similarity, mock_parse):
+        config = {
+            "search_text": "Python",
+            "min_similarity": 70,
             "excluded_text": "",
             "area_ids": [],
             "experience": "",
-            "daily_stats": True
+            "interval": 10
         }
+        mock_load.return_value = {'page': 3, 'status': 'in_progress', 'age': 10}
+        mock_parse.return_value = []
         
-        # main() просто возвращается при ошибке, не вызывает sys.exit
-        result = main()
-        assert result is None  # Просто проверяем что функция завершилась
+        job(Mock(), config)
+        
+        assert "page=3" in mock_parse.call_args[0][0]
     
-    @patch('main.schedule')
-    def test_schedule_stats_enabled(self, mock_schedule):
-        mock_db = Mock()
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.send_telegram_message')
+    @patch('main.save_checkpoint')
+    def test_job_stops_on_stop_event(self, mock_save, mock_send, mock_similarity, mock_parse):
+        import threading
         config = {
-            "daily_stats": True
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test_token", 
+            "chat_id": "test_chat",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": ""
+        }
+        stop_event = threading.Event()
+        mock_parse.return_value = [
+            {'title': 'Python Developer', 'href': f'https://hh.ru/vacancy/{i}', 'company': 'Test Co'}
+            for i in range(30)
+        ]
+        mock_similarity.return_value = (True, 85)
+        mock_send.side_effect = lambda *args: stop_event.set() or True
+        
+        job(None, config, stop_event)
+        
+        # Первая отправка завершается, дальше цикл останавливается и сохраняет страницу
+        mock_send.assert_called_once()
+        mock_parse.assert_called_once()
+    
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.send_digest')
+    @patch('main.mark_vacancy_sent')
+    @patch('main.release_vacancy')
+    def test_job_compact_digest(self, mock_release, mock_mark, mock_digest, mock_similarity, mock_parse):
+        config = {
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test_token", 
+            "chat_id": "test_chat",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+            "message_format": "compact",
+            "repost_dedup": False
         }
+        vacancies = [
+            {'title': 'Python Developer', 'href': f'https://hh.ru/vacancy/{i}', 'company': 'Test Co'}
+            for i in range(3)
+        ]
+        mock_parse.return_value = vacancies
+        mock_similarity.return_value = (True, 85)
+        mock_digest.return_value = vacancies[:2]
         
-        schedule_stats(mock_db, config)
+        job(None, config)
         
-        mock_schedule.every.assert_called_once()
+        # Одна сводка на страницу; недоставленная вакансия освобождается
+        mock_digest.assert_called_once()
+        assert mock_mark.call_count == 2
+        mock_release.assert_called_once_with(None, 'https://hh.ru/vacancy/2')
     
-    @patch('main.schedule')
-    def test_schedule_stats_disabled(self, mock_schedule):
-        mock_db = Mock()
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.send_telegram_message')
+    @patch('main.claim_delivery')
+    @patch('main.confirm_delivery')
+    def test_job_fanout_to_subscriptions(self, mock_confirm, mock_claim, mock_send,
+                                         mock_similarity, mock_parse):
         config = {
-            "daily_stats": False
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test_token", 
+            "chat_id": "main_chat",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+            "subscriptions": [
+                {"chat_id": "team", "keywords": ["python"]},
+                {"chat_id": "go_team", "keywords": ["golang"]}
+            ]
         }
+        mock_parse.return_value = [
+            {'title': 'Python Developer', 'href': 'https://hh.ru/vacancy/1', 'company': 'Test Co'}
+        ]
+        mock_similarity.return_value = (True, 85)
+        mock_send.return_value = True
+        mock_claim.return_value = True
         
-        schedule_stats(mock_db, config)
+        job(None, config)
         
-        mock_schedule.every.assert_not_called()
+        chats = [call.args[1] for call in mock_send.call_args_list]
+        assert chats == ["main_chat", "team"]
+        mock_confirm.assert_called_once_with(None, "team", 'https://hh.ru/vacancy/1')
     
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.send_telegram_message')
+    @patch('main.claim_delivery')
+    @patch('main.confirm_delivery')
+    def test_job_min_salary_prefilter(self, mock_confirm, mock_claim, mock_send,
+                                      mock_similarity, mock_parse):
+        config = {
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test_token",
+            "chat_id": "main_chat",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+            "min_salary": 300000,
+            "subscriptions": [{"chat_id": "team", "min_salary": 200000}]
+        }
+        mock_parse.return_value = [
+            {'title': 'Python Junior', 'href': 'https://hh.ru/vacancy/1', 'company': 'A',
+             'salary_from_base': 100000, 'salary_to_base': 150000},
+            {'title': 'Python Middle', 'href': 'https://hh.ru/vacancy/2', 'company': 'B',
+             'salary_from_base': 200000, 'salary_to_base': 250000},
+            {'title': 'Python Senior', 'href': 'https://hh.ru/vacancy/3', 'company': 'C',
+             'salary_from_base': 350000, 'salary_to_base': None},
+        ]
+        mock_similarity.return_value = (True, 85)
+        mock_send.return_value = True
+        mock_claim.return_value = True
+
+        job(None, config)
+
+        assert mock_similarity.call_count == 2
+        sent = [(call.args[1], call.args[2]['title']) for call in mock_send.call_args_list]
+        assert sent == [("team", "Python Middle"), ("main_chat", "Python Senior"), ("team", "Python Senior")]
+
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.send_telegram_message')
+    @patch('main.find_repost')
+    @patch('main.record_fingerprint')
+    def test_job_suppresses_reposts(self, mock_record, mock_find, mock_send,
+                                    mock_similarity, mock_parse):
+        config = {
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test_token",
+            "chat_id": "main_chat",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+        }
+        mock_parse.return_value = [
+            {'title': 'Python Developer', 'href': 'https://hh.ru/vacancy/1', 'company': 'A'},
+            {'title': 'Python Developer', 'href': 'https://hh.ru/vacancy/2', 'company': 'A'},
+            {'title': 'Go Developer', 'href': 'https://hh.ru/vacancy/3', 'company': 'B'},
+        ]
+        mock_similarity.return_value = (True, 85)
+        mock_send.return_value = True
+        mock_find.side_effect = lambda db, url, fp, *args: 'https://hh.ru/vacancy/0' if url.endswith('/3') else None
+
+        job(None, config)
+
+        sent = [call.args[2]['href'] for call in mock_send.call_args_list]
+        assert sent == ['https://hh.ru/vacancy/1']
+        assert mock_record.call_args.args[1] == 'https://hh.ru/vacancy/1'
+
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.is_vacancy_sent')
+    @patch('main.send_telegram_message')
+    @patch('main.liveness.checker')
+    def test_job_skips_closed_vacancies(self, mock_checker, mock_send, mock_is_sent,
+                                        mock_similarity, mock_parse):
+        config = {
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test_token",
+            "chat_id": "main_chat",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+            "liveness_check": True,
+        }
+        mock_parse.return_value = [
+            {'title': 'Python Developer', 'href': 'https://hh.ru/vacancy/1', 'company': 'A'},
+            {'title': 'Python Developer', 'href': 'https://hh.ru/vacancy/2', 'company': 'B'},
+            {'title': 'Python Developer', 'href': 'https://hh.ru/vacancy/3', 'company': 'C'},
+        ]
+        mock_similarity.return_value = (True, 85)
+        mock_is_sent.side_effect = lambda db, url: url.endswith('/3')
+        mock_send.return_value = True
+        mock_checker.closed.return_value = {'https://hh.ru/vacancy/2'}
+
+        result = job(None, config)
+
+        # Уже отправленные вакансии не проверяются, закрытые не отправляются
+        checked = [v['href'] for v in mock_checker.closed.call_args.args[1]]
+        assert checked == ['https://hh.ru/vacancy/1', 'https://hh.ru/vacancy/2']
+        sent = [call.args[2]['href'] for call in mock_send.call_args_list]
+        assert sent == ['https://hh.ru/vacancy/1']
+        assert result.sent == 1
+
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.is_vacancy_sent')
+    @patch('main.delivered_chats')
+    @patch('main.send_telegram_message')
+    @patch('main.liveness.checker')
+    def test_job_liveness_skips_fully_delivered(self, mock_checker, mock_send, mock_delivered,
+                                                mock_is_sent, mock_similarity, mock_parse):
+        config = {
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test_token",
+            "chat_id": "main_chat",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+            "liveness_check": True,
+            "subscriptions": [{"chat_id": "team"}],
+        }
+        mock_parse.return_value = [
+            {'title': 'Python Developer', 'href': 'https://hh.ru/vacancy/1', 'company': 'A'},
+            {'title': 'Python Developer', 'href': 'https://hh.ru/vacancy/2', 'company': 'B'},
+        ]
+        mock_similarity.return_value = (True, 85)
+        mock_is_sent.return_value = True
+        mock_delivered.side_effect = lambda db, url: {'team'} if url.endswith('/1') else set()
+        mock_send.return_value = True
+        mock_checker.closed.return_value = set()
+
+        job(None, config)
+
+        # Вакансия 1 уже есть во всех чатах - сеть для неё не тратится
+        checked = [v['href'] for v in mock_checker.closed.call_args.args[1]]
+        assert checked == ['https://hh.ru/vacancy/2']
+        assert [call.args[1] for call in mock_send.call_args_list] == ['team']
+
+    @patch('main.salary.configure')
+    @patch('main.ratelimit.configure')
+    def test_apply_config_keeps_shared_state(self, mock_ratelimit, mock_salary):
+        old = {"search_text": "Python", "interval": 10, "hh_rate": 1.0, "searches": []}
+        new = dict(old, interval=5)
+        coordinator = Mock(worker_id="w1")
+
+        searches = apply_config(old, new, coordinator)
+
+        mock_ratelimit.assert_not_called()
+        mock_salary.assert_not_called()
+        assert searches[0]["interval"] == 5
+        assert searches[0]["worker_id"] == "w1"
+        assert coordinator.total_searches == 1
+
+        apply_config(old, dict(new, hh_rate=0.5))
+        mock_ratelimit.assert_called_once()
+
+    @patch('main.setup_logging')
+    def test_apply_config_logging_and_restart_keys(self, mock_logging, caplog):
+        old = {"search_text": "Python", "searches": [], "log_level": "INFO", "commands": True,
+               "bot_token": "a", "adaptive_interval": False}
+        new = dict(old, log_level="DEBUG", bot_token="b", adaptive_interval=True)
+
+        with caplog.at_level('WARNING', logger='hh.main'):
+            apply_config(old, new)
+
+        mock_logging.assert_called_once_with(new)
+        assert "adaptive_interval, bot_token" in caplog.text
+
     @patch('main.get_config')
+    @patch('main.setup_logging')
+    @patch('main.deliver')
+    def test_run_replay_uses_archive(self, mock_deliver, mock_logging, mock_get_config, tmp_path):
+        import gzip, json
+        config = {
+            "search_text": "Python", "min_similarity": 0, "bot_token": "t", "chat_id": "1",
+            "excluded_text": "", "area_ids": [], "experience": "", "page_delay": 5, "searches": []
+        }
+        mock_get_config.return_value = config
+        page = """<div data-qa="vacancy-serp__vacancy">
+            <a data-qa="serp-item__title" href="/vacancy/7">Python Developer</a></div>"""
+        archive = tmp_path / 'archive.jsonl.gz'
+        with gzip.open(archive, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'method': 'GET', 'url': build_url("Python", "", [], "", 0),
+                                'status': 200, 'text': page}) + "\n")
+        mock_deliver.return_value = 1
+
+        run_replay(parse_args(["--replay", str(archive)]))
+
+        mock_deliver.assert_called_once()
+        assert mock_deliver.call_args.args[3][0]['href'] == 'https://hh.ru/vacancy/7'
+
+    def _paged(self, pages):
+        """side_effect для parse_vacancies_from_url: страница -> список вакансий или None"""
+        def parse(url):
+            return pages.get(int(url.rsplit('&page=', 1)[1]), [])
+        return parse
+
+    def _vacancies(self, page, count):
+        return [{'title': 'Java', 'href': f'https://hh.ru/vacancy/{page}{i:03d}', 'company': 'Co'}
+                for i in range(count)]
+
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    def test_job_retries_failed_page(self, mock_similarity, mock_parse):
+        config = {"search_text": "Python", "min_similarity": 70, "excluded_text": "", "area_ids": [],
+                  "experience": "", "page_retry_delay": 0}
+        attempts = [None, self._vacancies(0, 5)]
+        mock_parse.side_effect = lambda url: attempts.pop(0)
+        mock_similarity.return_value = (False, 0)
+
+        result = job(None, config)
+
+        assert mock_parse.call_count == 2
+        assert result.pages == [0]
+        assert result.complete
+
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.save_checkpoint')
+    def test_job_continues_after_failed_page(self, mock_save, mock_similarity, mock_parse):
+        config = {"search_text": "Python", "min_similarity": 70, "excluded_text": "", "area_ids": [],
+                  "experience": "", "page_retry_delay": 0, "page_attempts": 2}
+        mock_parse.side_effect = self._paged({0: self._vacancies(0, 20), 1: None, 2: self._vacancies(2, 5)})
+        mock_similarity.return_value = (False, 0)
+
+        result = job(None, config)
+
+        assert result.pages == [0, 2]
+        assert result.failed_pages == [1]
+        assert not result.complete
+        assert mock_save.call_args.args[3] == 'done'
+        assert mock_save.call_args.args[4] == [1]
+
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    def test_job_stops_after_consecutive_failures(self, mock_similarity, mock_parse):
+        config = {"search_text": "Python", "min_similarity": 70, "excluded_text": "", "area_ids": [],
+                  "experience": "", "page_retry_delay": 0, "max_failed_pages": 2}
+        mock_parse.return_value = None
+
+        result = job(None, config)
+
+        assert result.failed_pages == [0, 1]
+        assert mock_parse.call_count == 6
+
+    @patch('main.parse_vacancies_from_url')
+    @patch('main.similarity_check')
+    @patch('main.load_checkpoint')
+    @patch('main.save_checkpoint')
+    def test_job_fetches_failed_pages_first(self, mock_save, mock_load, mock_similarity, mock_parse):
+        config = {"search_text": "Python", "min_similarity": 70, "excluded_text": "", "area_ids": [],
+                  "experience": "", "interval": 10}
+        mock_load.return_value = {'page': 0, 'status': 'done', 'age': 60,
+                                  'failed_pages': [1]}
+        mock_parse.side_effect = self._paged({0: self._vacancies(0, 20), 1: self._vacancies(1, 20),
+                                              2: self._vacancies(2, 5)})
+        mock_similarity.return_value = (False, 0)
+
+        result = job(Mock(), config)
+
+        pages = [int(call.args[0].rsplit('&page=', 1)[1]) for call in mock_parse.call_args_list]
+        # Страница 1 запрошена первой и при обычном обходе повторно не загружается
+        assert pages == [1, 0, 2]
+        assert result.pages == [1, 0, 2]
+        assert mock_save.call_args.args[4] == []
+
+    def test_fetch_page_stops_waiting_on_stop_event(self):
+        import threading
+        stop_event = threading.Event()
+        stop_event.set()
+        with patch('main.parse_vacancies_from_url', return_value=None) as mock_parse:
+            assert fetch_page('url', attempts=3, delay=60, stop_event=stop_event) is None
+        mock_parse.assert_called_once()
+
+    @patch('main.get_config')
+    @patch('main.setup_logging')
     @patch('main.connect_db')
-    @patch('main.create_table_if_not_exists')
-    @patch('main.schedule')
     @patch('main.job')
-    def test_main_with_daily_stats_disabled(self, mock_job, mock_schedule, 
-                                          mock_create_table, mock_connect_db, 
-                                          mock_get_config):
-        mock_config = {
+    def test_run_once_runs_each_search(self, mock_job, mock_connect_db, mock_logging, mock_get_config):
+        mock_get_config.return_value = {
+            "search_text": "Python", "min_similarity": 70, "bot_token": "t", "chat_id": "1",
+            "excluded_text": "", "area_ids": [], "experience": "",
+            "searches": [{"name": "a"}, {"name": "b", "search_text": "Go"}]
+        }
+        mock_connect_db.return_value = None
+        mock_job.return_value = Mock(sent=2)
+
+        assert run_once(parse_args(["--once"])) == 0
+
+        assert [call.args[1]["name"] for call in mock_job.call_args_list] == ["a", "b"]
+
+    def test_import_defers_heavy_dependencies(self):
+        import subprocess
+        code = ("import sys; import main; "
+                "print([m for m in ('requests', 'bs4', 'fuzzywuzzy', 'mysql', 'asyncio') if m in sys.modules])")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.join(os.path.dirname(__file__), '../src'))
+        assert result.stdout.strip() == '[]'
+
+    @patch('main.get_config')
+    def test_main_no_config(self, mock_get_config):
+        mock_get_config.return_value = {
+            "bot_token": "",
+            "chat_id": "",
+            "search_text": "Python", 
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+            "daily_stats": True
+        }
+        
+        # main() просто возвращается при ошибке, не вызывает sys.exit
+        result = main()
+        assert result is None  # Просто проверяем что функция завершилась
+    
+    @patch('main.get_config')
+    @patch('main.connect_db')
+    @patch('scheduler.Scheduler')
+    def test_main_without_db(self, mock_scheduler, mock_connect_db, mock_get_config):
+        mock_get_config.return_value = {
             "bot_token": "test",
             "chat_id": "test", 
             "search_text": "Python",
@@ -171,19 +623,12 @@ class TestMain:
             "excluded_text": "",
             "area_ids": [],
             "experience": "",
-            "daily_stats": False  # Статистика отключена
+            "daily_stats": False
         }
-        mock_get_config.return_value = mock_config
-        
-        mock_db = Mock()
-        mock_connect_db.return_value = mock_db
-        
-        mock_schedule.run_pending.side_effect = KeyboardInterrupt
+        mock_connect_db.return_value = None
+        mock_scheduler.return_value.run.side_effect = KeyboardInterrupt
         
-        try:
-            main()
-        except KeyboardInterrupt:
-            pass
+        main()
         
-        # Проверяем что статистика не планируется
-        mock_schedule.every().day.at.assert_not_called()
\ No newline at end of file
+        # Без БД планировщик не пытается открывать подключения
+        assert mock_scheduler.call_args[0][3] is None
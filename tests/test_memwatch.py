@@ -0,0 +1,64 @@
+import pytest
+import os
+import sys
+import tracemalloc
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+import metrics
+from memwatch import MemoryMonitor, rss_bytes
+
+class TestMemoryMonitor:
+
+    @pytest.fixture(autouse=True)
+    def stop_tracing(self):
+        yield
+        tracemalloc.stop()
+
+    def test_rss_bytes(self):
+        assert rss_bytes() > 0
+
+    def test_report_shows_growth(self):
+        monitor = MemoryMonitor(top=5)
+        monitor.start()
+        leak = [bytearray(1024) for _ in range(200)]
+
+        diff = monitor.report(force=True)
+
+        assert diff
+        assert sum(d.size_diff for d in diff) >= 100 * 1024
+        assert any(d.traceback[0].filename == __file__ for d in diff)
+        assert len(leak) == 200
+
+    def test_report_throttled_by_interval(self):
+        now = [0]
+        monitor = MemoryMonitor(interval=600, clock=lambda: now[0])
+        monitor.start()
+
+        assert monitor.report() is None
+        now[0] = 601
+        assert monitor.report() is not None
+        assert monitor.report() is None
+
+    def test_report_before_start(self):
+        assert MemoryMonitor().report(force=True) is None
+
+    def test_report_sets_gauge(self):
+        monitor = MemoryMonitor()
+        monitor.start()
+        monitor.report(force=True)
+
+        gauges = {g['name'] for g in metrics.snapshot()['gauges']}
+        assert 'tracemalloc_current_bytes' in gauges
+
+    def test_wrap_reports_after_job(self):
+        monitor = MemoryMonitor()
+        monitor.report = Mock()
+        job = Mock(side_effect=RuntimeError("boom"))
+
+        with pytest.raises(RuntimeError):
+            monitor.wrap(job)("db", {"name": "a"})
+
+        job.assert_called_once_with("db", {"name": "a"}, None)
+        monitor.report.assert_called_once_with()
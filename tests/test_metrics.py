@@ -0,0 +1,55 @@
+import pytest
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+import metrics
+
+class TestMetrics:
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_inc_counter_with_labels(self):
+        metrics.inc('hh_fetch_total', host='hh.ru')
+        metrics.inc('hh_fetch_total', host='hh.ru')
+        metrics.inc('hh_fetch_total', host='api.hh.ru')
+
+        text = metrics.render_prometheus()
+        assert 'hh_fetch_total{host="hh.ru"} 2' in text
+        assert 'hh_fetch_total{host="api.hh.ru"} 1' in text
+
+    def test_observe_histogram(self):
+        metrics.observe('cycle_duration_seconds', 0.3)
+        metrics.observe('cycle_duration_seconds', 7)
+
+        text = metrics.render_prometheus()
+        assert 'cycle_duration_seconds_bucket{le="0.5"} 1' in text
+        assert 'cycle_duration_seconds_bucket{le="10"} 2' in text
+        assert 'cycle_duration_seconds_bucket{le="+Inf"} 2' in text
+        assert 'cycle_duration_seconds_count 2' in text
+
+    def test_timer_records_observation(self):
+        with metrics.timer('stage_seconds', stage='parse'):
+            pass
+
+        snap = metrics.snapshot()
+        assert snap['histograms'][0]['name'] == 'stage_seconds'
+        assert snap['histograms'][0]['labels'] == {'stage': 'parse'}
+        assert snap['histograms'][0]['count'] == 1
+
+    def test_dump_json(self):
+        metrics.inc('cycles_total')
+        metrics.set_gauge('schedule_lag_seconds', 1.5)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'metrics.json')
+            metrics.dump_json(path)
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+
+        assert data['counters'] == [{'name': 'cycles_total', 'labels': {}, 'value': 1}]
+        assert data['gauges'][0]['value'] == 1.5
@@ -15,11 +15,15 @@ from parser import (
     connect_db,
     is_vacancy_sent,
     mark_vacancy_sent,
-    collect_statistics,
-    format_statistics_message,
-    send_statistics,
-    get_time
+    get_time,
+    claim_vacancy,
+    release_vacancy,
+    html_from_urlfetch_,
+    parse_vacancies_from_url,
+    FetchBlocked
 )
+import ratelimit
+import mysql.connector
 
 class TestParser:
     
@@ -40,6 +44,23 @@ class TestParser:
         assert vacancies[0]['address'] == 'Москва'
         assert 'hh.ru/vacancy/123' in vacancies[0]['href']
     
+    def test_parse_vacancies_html_salary_fields(self):
+        html_content = """
+        <div data-qa="vacancy-serp__vacancy">
+            <a data-qa="serp-item__title" href="/vacancy/124">Go Developer</a>
+            <span class="magritte-text_typography-label-1-regular___pi3R-_4-2-3">Опыт 1–3 года</span>
+            <span class="magritte-text_typography-label-1-regular___pi3R-_4-2-3">до 3 000 $ за месяц, на руки</span>
+        </div>
+        """
+
+        vacancy = parse_vacancies_html(html_content)[0]
+
+        assert vacancy['salary'] == 'до 3 000 $ за месяц, на руки'
+        assert vacancy['salary_to'] == 3000
+        assert vacancy['salary_currency'] == 'USD'
+        assert vacancy['salary_gross'] is False
+        assert vacancy['salary_to_base'] > 3000
+
     def test_parse_vacancies_html_empty(self):
         vacancies = parse_vacancies_html("<html></html>")
         assert vacancies == []
@@ -92,6 +113,17 @@ class TestParser:
         assert '🏢 <b>Компания:</b> Test Corp' in message
         assert '💰 <b>Зарплата:</b> 100 000 ₽' in message
     
+    def test_format_vacancy_message_escapes_html(self):
+        vacancy = {
+            'title': 'Developer <C++>',
+            'company': 'A & B',
+            'href': 'https://hh.ru/vacancy/123'
+        }
+        
+        message = format_vacancy_message(vacancy)
+        assert '<b>Developer &lt;C++&gt;</b>' in message
+        assert '🏢 <b>Компания:</b> A &amp; B' in message
+    
     def test_format_vacancy_message_minimal(self):
         vacancy = {
             'title': 'Developer',
@@ -103,7 +135,7 @@ class TestParser:
         assert '<b>Developer</b>' in message
         assert '🏢 <b>Компания:</b> Company' in message
     
-    @patch('parser.requests.post')
+    @patch('requests.Session.post')
     def test_send_telegram_message_success(self, mock_post):
         mock_response = Mock()
         mock_response.raise_for_status.return_value = None
@@ -120,7 +152,7 @@ class TestParser:
         assert success == True
         mock_post.assert_called_once()
     
-    @patch('parser.requests.post')
+    @patch('requests.Session.post')
     def test_send_telegram_message_failure(self, mock_post):
         mock_post.side_effect = Exception("Network error")
         
@@ -129,7 +161,7 @@ class TestParser:
         
         assert success == False
     
-    @patch('parser.mysql.connector.connect')
+    @patch('mysql.connector.connect')
     def test_connect_db_success(self, mock_connect):
         mock_conn = Mock()
         mock_connect.return_value = mock_conn
@@ -139,7 +171,7 @@ class TestParser:
         assert conn == mock_conn
         mock_connect.assert_called_once()
     
-    @patch('parser.mysql.connector.connect')
+    @patch('mysql.connector.connect')
     def test_connect_db_failure(self, mock_connect):
         mock_connect.side_effect = Exception("DB error")
         
@@ -171,137 +203,96 @@ class TestParser:
         
         assert result == False
     
-    # Новые тесты для статистики
-    def test_collect_statistics_no_db(self):
-        result = collect_statistics(None)
-        assert result is None
+    def test_get_time(self):
+        time_result = get_time()
+        assert isinstance(time_result, datetime.datetime)
+        # Проверяем что время в правильном часовом поясе (+3)
+        assert time_result.tzinfo.utcoffset(time_result) == timedelta(hours=3)
+    
+    def test_claim_vacancy_no_connection(self):
+        assert claim_vacancy(None, 'https://hh.ru/vacancy/1') == True
     
-    @patch('parser.get_time')
-    def test_collect_statistics_with_db(self, mock_get_time):
+    def test_claim_vacancy_inserted(self):
         mock_conn = Mock()
         mock_cursor = Mock()
         mock_conn.cursor.return_value = mock_cursor
         
-        # Мокируем результаты запросов - fetchone для COUNT, fetchall для компаний
-        mock_cursor.fetchone.side_effect = [
-            [5],  # total_today
-            [3],  # total_yesterday  
-            [100]  # total_all
-        ]
-        mock_cursor.fetchall.return_value = [('Company A', 2), ('Company B', 1)]  # top_companies
-        
-        # Мокируем время
-        mock_time = datetime.datetime(2024, 1, 15, 10, 30, 0, tzinfo=timezone(timedelta(hours=3)))
-        mock_get_time.return_value = mock_time
-        
-        result = collect_statistics(mock_conn)
-        
-        assert result is not None
-        assert result['total_today'] == 5
-        assert result['total_yesterday'] == 3
-        assert result['total_all'] == 100
-        assert result['date'] == '15.01.2024'
-        assert len(result['top_companies']) == 2
-        assert result['top_companies'] == [('Company A', 2), ('Company B', 1)]
+        assert claim_vacancy(mock_conn, 'https://hh.ru/vacancy/1', 'T', 'C', 'w1', 'python') == True
+        query, params = mock_cursor.execute.call_args[0]
+        assert "'pending'" in query
+        assert params == ('https://hh.ru/vacancy/1', 'T', 'C', 'w1', 'python')
     
-    @patch('parser.get_time')
-    def test_format_statistics_message_with_data(self, mock_get_time):
-        # Мокируем время для предсказуемого результата
-        mock_time = datetime.datetime(2024, 1, 15, 10, 30, 0, tzinfo=timezone(timedelta(hours=3)))
-        mock_get_time.return_value = mock_time
-        
-        stats = {
-            'total_today': 8,
-            'total_yesterday': 5,
-            'total_all': 150,
-            'top_companies': [('Yandex', 3), ('Sber', 2), ('Tinkoff', 1)],
-            'date': '15.01.2024'
-        }
-        
-        message = format_statistics_message(stats)
-        
-        # Проверяем с HTML тегами
-        assert '📊 <b>Статистика за 15.01.2024</b>' in message
-        assert '<b>Сегодня найдено:</b> 8 вакансий 📈 +3' in message
-        assert '<b>Всего в базе:</b> 150 вакансий' in message
-        assert '<b>🏢 Топ компаний сегодня:</b>' in message
-        assert '1. Yandex: 3 вакансий' in message
-        assert '2. Sber: 2 вакансий' in message  
-        assert '3. Tinkoff: 1 вакансий' in message
-        assert '⏰ Отчет сгенерирован: 10:30' in message
-
-    @patch('parser.get_time')
-    def test_format_statistics_message_no_data(self, mock_get_time):
-        # Мокируем время для предсказуемого результата
-        mock_time = datetime.datetime(2024, 1, 15, 10, 30, 0, tzinfo=timezone(timedelta(hours=3)))
-        mock_get_time.return_value = mock_time
-        
-        stats = {
-            'total_today': 0,
-            'total_yesterday': 0,
-            'total_all': 0,
-            'top_companies': [],
-            'date': '15.01.2024'
-        }
-        
-        message = format_statistics_message(stats)
+    def test_claim_vacancy_taken_by_other_worker(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.execute.side_effect = [mysql.connector.errors.IntegrityError(), None]
+        mock_cursor.rowcount = 0
         
-        # Проверяем с HTML тегами
-        assert '<b>Сегодня найдено:</b> 0 вакансий ➡️ 0' in message
-        assert '<b>Всего в базе:</b> 0 вакансий' in message
-        assert '<i>Сегодня вакансий не найдено</i>' in message
-        assert '⏰ Отчет сгенерирован: 10:30' in message
+        assert claim_vacancy(mock_conn, 'https://hh.ru/vacancy/1', worker_id='w2') == False
     
-    def test_format_statistics_message_none(self):
-        message = format_statistics_message(None)
-        assert message == "❌ Не удалось собрать статистику"
-    
-    @patch('parser.collect_statistics')
-    @patch('parser.requests.post')
-    def test_send_statistics_success(self, mock_post, mock_collect):
-        mock_db = Mock()
-        mock_stats = {
-            'total_today': 5,
-            'total_yesterday': 3,
-            'total_all': 100,
-            'top_companies': [('Test Co', 2)],
-            'date': '15.01.2024'
-        }
-        mock_collect.return_value = mock_stats
-        
-        mock_response = Mock()
-        mock_response.raise_for_status.return_value = None
-        mock_post.return_value = mock_response
-        
-        success = send_statistics(mock_db, 'token', 'chat123')
+    def test_claim_vacancy_stale_pending_reclaimed(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.execute.side_effect = [mysql.connector.errors.IntegrityError(), None]
+        mock_cursor.rowcount = 1
         
-        assert success == True
-        mock_post.assert_called_once()
+        assert claim_vacancy(mock_conn, 'https://hh.ru/vacancy/1', worker_id='w2') == True
     
-    @patch('parser.collect_statistics')
-    def test_send_statistics_no_stats(self, mock_collect):
-        mock_db = Mock()
-        mock_collect.return_value = None
+    def test_release_vacancy_deletes_pending(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
         
-        success = send_statistics(mock_db, 'token', 'chat123')
+        release_vacancy(mock_conn, 'https://hh.ru/vacancy/1')
         
-        assert success == False
+        query = mock_cursor.execute.call_args[0][0]
+        assert query.startswith("DELETE") and "pending" in query
     
-    @patch('parser.collect_statistics')
-    @patch('parser.requests.post')
-    def test_send_statistics_network_error(self, mock_post, mock_collect):
-        mock_db = Mock()
-        mock_stats = {'total_today': 1, 'total_yesterday': 0, 'total_all': 10, 'top_companies': [], 'date': '15.01.2024'}
-        mock_collect.return_value = mock_stats
-        
-        mock_post.side_effect = Exception("Network error")
-        
-        success = send_statistics(mock_db, 'token', 'chat123')
+    @patch('requests.Session.get')
+    def test_html_from_urlfetch_success(self, mock_get):
+        ratelimit.configure({"hh_rate": 1000, "hh_burst": 1000})
+        mock_get.return_value = Mock(status_code=200, ok=True, url='https://hh.ru/search/vacancy',
+                                     text='<div data-qa="vacancy-serp__vacancy"></div>')
         
-        assert success == False
+        assert html_from_urlfetch_('https://hh.ru/search/vacancy?page=0') is not None
     
-    def test_get_time(self):
-        time_result = get_time()
-        assert isinstance(time_result, datetime.datetime)
-        # Проверяем что время в правильном часовом поясе (+3)
-        assert time_result.tzinfo.utcoffset(time_result) == timedelta(hours=3)
\ No newline at end of file
+    @patch('requests.Session.get')
+    def test_html_from_urlfetch_429_opens_breaker(self, mock_get):
+        ratelimit.configure({"hh_rate": 1000, "hh_burst": 1000, "hh_cooldown": 60})
+        mock_get.return_value = Mock(status_code=429, ok=False, url='https://hh.ru/search/vacancy',
+                                     text='', headers={'Retry-After': '120'})
+        
+        with pytest.raises(FetchBlocked) as exc:
+            html_from_urlfetch_('https://hh.ru/search/vacancy?page=0')
+        assert exc.value.retry_in == 120
+        
+        # Пока цепь разомкнута, запросы к hh.ru не уходят
+        with pytest.raises(FetchBlocked):
+            html_from_urlfetch_('https://hh.ru/search/vacancy?page=1')
+        assert mock_get.call_count == 1
+    
+    @patch('requests.Session.get')
+    def test_html_from_urlfetch_captcha(self, mock_get):
+        ratelimit.configure({"hh_rate": 1000, "hh_burst": 1000})
+        mock_get.return_value = Mock(status_code=200, ok=True, url='https://hh.ru/account/captcha?backurl=x',
+                                     text='<html>captcha</html>', headers={})
+        
+        with pytest.raises(FetchBlocked):
+            html_from_urlfetch_('https://hh.ru/search/vacancy?page=0')
+    
+    @patch('requests.Session.get')
+    def test_html_from_urlfetch_network_error(self, mock_get):
+        ratelimit.configure({"hh_rate": 1000, "hh_burst": 1000})
+        mock_get.side_effect = Exception("timeout")
+        
+        assert html_from_urlfetch_('https://hh.ru/search/vacancy?page=0') is None
+
+    @patch('parser.html_from_urlfetch_')
+    def test_parse_vacancies_from_url_failed_vs_empty(self, mock_fetch):
+        # Ошибка загрузки и пустая выдача различаются: первую стоит повторить
+        mock_fetch.return_value = None
+        assert parse_vacancies_from_url('https://hh.ru/search/vacancy?page=0') is None
+        mock_fetch.return_value = '<html><body></body></html>'
+        assert parse_vacancies_from_url('https://hh.ru/search/vacancy?page=0') == []
\ No newline at end of file
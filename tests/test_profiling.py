@@ -0,0 +1,71 @@
+import pytest
+import os
+import sys
+import tempfile
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+import main
+from profiling import STAGES, StageTimers, fixture_fetcher, profile_cycle
+
+class TestProfiling:
+
+    def test_stage_timers_wrap(self):
+        timers = StageTimers()
+        wrapped = timers.wrap('parse', lambda x: x * 2)
+
+        assert wrapped(2) == 4
+        assert wrapped(3) == 6
+        assert timers.calls['parse'] == 2
+        assert 'parse' in timers.report(1.0)
+
+    def test_fixture_fetcher_by_page(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, html in enumerate(["<p>0</p>", "<p>1</p>"]):
+                with open(os.path.join(tmp, f"{i:02d}.html"), 'w', encoding='utf-8') as f:
+                    f.write(html)
+
+            fetch = fixture_fetcher(tmp)
+
+        assert fetch("https://hh.ru/search/vacancy?text=python&page=1") == "<p>1</p>"
+        assert fetch("https://hh.ru/search/vacancy?text=python&page=5") == ""
+
+    def test_profile_cycle_writes_reports(self):
+        config = {
+            "search_text": "Python",
+            "min_similarity": 70,
+            "bot_token": "test",
+            "chat_id": "test",
+            "excluded_text": "",
+            "area_ids": [],
+            "experience": "",
+            "page_delay": 0
+        }
+        # Полная страница: цикл запросит следующую, которой в каталоге нет
+        html = "".join(f"""
+        <div data-qa="vacancy-serp__vacancy">
+            <a data-qa="serp-item__title" href="/vacancy/{i}">Python Developer</a>
+        </div>
+        """ for i in range(1, 21))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "00.html"), 'w', encoding='utf-8') as f:
+                f.write(html)
+            output = os.path.join(tmp, 'profile')
+
+            report = profile_cycle(main, None, config, output, fixture_dir=tmp)
+
+            assert os.path.exists(output + '.prof')
+            assert os.path.exists(output + '.txt')
+            assert os.path.exists(output + '.collapsed')
+
+        assert 'parse' in report
+        assert 'telegram' in report
+        # Страница за последней - конец выдачи, а не сбой загрузки с паузами
+        total = float(report.splitlines()[-1].split()[-1])
+        assert total < 1.5
+
+    def test_db_stage_covers_send_path(self):
+        db = {name for (module, name), stage in STAGES.items() if stage == 'db'}
+        assert {'claim_vacancy', 'claim_delivery', 'find_repost', 'record_fingerprint', 'record_cycle'} <= db
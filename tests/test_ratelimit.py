@@ -0,0 +1,71 @@
+import pytest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from ratelimit import TokenBucket, CircuitBreaker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class TestRateLimit:
+
+    def test_token_bucket_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+
+        waits = [bucket.acquire() for _ in range(5)]
+
+        assert waits[:3] == [0.0, 0.0, 0.0]
+        assert waits[3] == pytest.approx(0.5)
+        assert clock.now == pytest.approx(1.0)
+
+    def test_token_bucket_refills(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+
+        bucket.acquire()
+        clock.now += 10
+        assert bucket.acquire() == 0.0
+
+    def test_breaker_exponential_cooldown(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(cooldown=60, max_cooldown=200, clock=clock)
+
+        assert breaker.record_throttle('hh.ru') == 60
+        assert breaker.allow('hh.ru') == False
+
+        clock.now += 61
+        assert breaker.allow('hh.ru') == True   # пробный запрос
+        assert breaker.allow('hh.ru') == False  # второй параллельный - нет
+        assert breaker.record_throttle('hh.ru') == 120
+        assert breaker.record_throttle('hh.ru') == 200
+
+    def test_breaker_success_resets(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(cooldown=60, clock=clock)
+
+        breaker.record_throttle('hh.ru')
+        clock.now += 61
+        assert breaker.allow('hh.ru') == True
+        breaker.record_success('hh.ru')
+
+        assert breaker.allow('hh.ru') == True
+        assert breaker.record_throttle('hh.ru') == 60
+
+    def test_breaker_retry_after(self):
+        breaker = CircuitBreaker(cooldown=60, clock=FakeClock())
+        assert breaker.record_throttle('hh.ru', retry_after=300) == 300
+
+    def test_breaker_hosts_independent(self):
+        breaker = CircuitBreaker(clock=FakeClock())
+        breaker.record_throttle('hh.ru')
+        assert breaker.allow('api.hh.ru') == True
@@ -0,0 +1,105 @@
+import pytest
+import gzip
+import json
+import os
+import sys
+import datetime
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from retention import archive_table, prune_archived, prune_fingerprints, run_retention
+
+class TestRetention:
+
+    def _conn(self, batches):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.description = [('url',), ('title',), ('sent_date',)]
+        mock_cursor.fetchall.side_effect = batches
+        return mock_conn, mock_cursor
+
+    def test_archive_table_no_connection(self, tmp_path):
+        assert archive_table(None, 'sent_vacancies', 90, str(tmp_path)) == 0
+
+    def test_archive_table_writes_then_deletes_in_batches(self, tmp_path):
+        old = datetime.datetime(2024, 1, 1, 12, 0)
+        mock_conn, mock_cursor = self._conn([
+            [('https://hh.ru/vacancy/1', 'A', old), ('https://hh.ru/vacancy/2', 'B', old)],
+            [('https://hh.ru/vacancy/3', 'C', old)],
+        ])
+
+        archived = archive_table(mock_conn, 'sent_vacancies', 90, str(tmp_path), batch_size=2)
+
+        assert archived == 3
+        query, params = mock_cursor.execute.call_args_list[0][0]
+        assert 'INTERVAL %s DAY' in query
+        assert params == (90, 2)
+        deleted = [args[0][1] for args in mock_cursor.executemany.call_args_list]
+        assert deleted == [[('https://hh.ru/vacancy/1',), ('https://hh.ru/vacancy/2',)],
+                           [('https://hh.ru/vacancy/3',)]]
+        assert mock_conn.commit.call_count == 2
+
+        [path] = tmp_path.iterdir()
+        assert path.name == 'sent_vacancies-202401.jsonl.gz'
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        assert [r['url'] for r in rows] == [f'https://hh.ru/vacancy/{i}' for i in (1, 2, 3)]
+        assert rows[0]['sent_date'] == '2024-01-01 12:00:00'
+
+    def test_archive_table_splits_rows_by_month(self, tmp_path):
+        mock_conn, mock_cursor = self._conn([[
+            ('https://hh.ru/vacancy/1', 'A', datetime.datetime(2024, 1, 31, 23, 0)),
+            ('https://hh.ru/vacancy/2', 'B', datetime.datetime(2024, 2, 1, 1, 0)),
+        ]])
+
+        assert archive_table(mock_conn, 'sent_vacancies', 90, str(tmp_path)) == 2
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            'sent_vacancies-202401.jsonl.gz', 'sent_vacancies-202402.jsonl.gz']
+
+    def test_archive_table_keeps_rows_if_write_fails(self, tmp_path):
+        mock_conn, mock_cursor = self._conn([[('https://hh.ru/vacancy/1', 'A', None)]])
+
+        with patch('retention.gzip.open', side_effect=OSError("disk full")):
+            assert archive_table(mock_conn, 'chat_deliveries', 90, str(tmp_path)) == 0
+
+        mock_cursor.executemany.assert_not_called()
+        mock_conn.commit.assert_not_called()
+
+    def test_prune_fingerprints(self):
+        mock_conn, mock_cursor = self._conn([])
+        mock_cursor.rowcount = 5
+
+        assert prune_fingerprints(mock_conn, 30) == 5
+        query, params = mock_cursor.execute.call_args[0]
+        assert query.startswith("DELETE FROM vacancy_fingerprints")
+        assert params == (30,)
+
+    def test_prune_archived(self):
+        mock_conn, mock_cursor = self._conn([])
+        mock_cursor.rowcount = 2
+
+        assert prune_archived(mock_conn, 30) == 2
+        query, params = mock_cursor.execute.call_args[0]
+        assert query.startswith("DELETE FROM archived_vacancies")
+        assert params == (30,)
+
+    @patch('retention.prune_fingerprints')
+    @patch('retention.archive_table')
+    def test_run_retention_disabled_by_default(self, mock_archive, mock_prune):
+        run_retention(Mock(), {})
+
+        mock_archive.assert_not_called()
+        mock_prune.assert_called_once()
+
+    @patch('retention.prune_fingerprints')
+    @patch('retention.archive_table')
+    def test_run_retention_archives_all_tables(self, mock_archive, mock_prune):
+        conn = Mock()
+        run_retention(conn, {"retention_days": 90, "archive_dir": "/tmp/a"})
+
+        tables = [call.args[1] for call in mock_archive.call_args_list]
+        assert tables == ['sent_vacancies', 'chat_deliveries']
+        assert mock_archive.call_args.args[2:] == (90, "/tmp/a", 1000)
@@ -0,0 +1,101 @@
+import pytest
+import os
+import sys
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+import salary
+from salary import (
+    RateTable, detect_currency, looks_like_salary, parse_salary, normalize_salary, salary_matches
+)
+
+
+class TestSalary:
+
+    @pytest.mark.parametrize("text,expected", [
+        ('200 000 – 300 000 ₽ за месяц, на руки', (200000, 300000, 'RUB', False)),
+        ('от 150 000 ₽ за месяц, до вычета налогов', (150000, None, 'RUB', True)),
+        ('до 3 000 $', (None, 3000, 'USD', None)),
+        ('от 1 500 до 2 500 €', (1500, 2500, 'EUR', None)),
+        ('500 000 ₸', (500000, 500000, 'KZT', None)),
+        ('от 2 000 Br', (2000, None, 'BYN', None)),
+        ('', (None, None, None, None)),
+    ])
+    def test_parse_salary(self, text, expected):
+        result = parse_salary(text)
+
+        assert (result['salary_from'], result['salary_to'],
+                result['salary_currency'], result['salary_gross']) == expected
+
+    def test_looks_like_salary(self):
+        assert looks_like_salary('от 3 000 $')
+        assert not looks_like_salary('Опыт 1–3 года')
+        assert not looks_like_salary('Можно удалённо')
+        assert detect_currency('100 000 руб.') == 'RUB'
+
+    @pytest.mark.parametrize("text,expected", [
+        ('5 000 000 сум', 'UZS'),
+        ('50 000 сом', 'KGS'),
+        ('Итоговая сумма 3 дня', None),
+        ('Brand manager 2 года', None),
+        ('Опыт 3 сомелье', None),
+    ])
+    def test_currency_markers_anchored_to_amount(self, text, expected):
+        assert detect_currency(text) == expected
+
+    @patch('requests.Session.get')
+    def test_rate_table_fetches_outside_lock(self, mock_get):
+        table = RateTable(url='http://rates')
+
+        def fetch(*args, **kwargs):
+            # Пока идёт запрос к ЦБ, таблица не заблокирована
+            assert not table._lock.locked()
+            response = Mock(status_code=200)
+            response.json.return_value = {'Valute': {'USD': {'Value': 80.0, 'Nominal': 1}}}
+            return response
+
+        mock_get.side_effect = fetch
+
+        assert table.convert(10, 'USD') == 800
+
+    def test_rate_table_converts_to_base(self):
+        table = RateTable({'USD': 100.0}, base='RUB')
+
+        assert table.convert(3000, 'USD') == 300000
+        assert table.convert(3000, 'XYZ') is None
+        assert RateTable({'USD': 100.0}, base='USD').convert(200000, 'RUB') == 2000
+
+    @patch('requests.Session.get')
+    def test_rate_table_refresh_is_cached(self, mock_get):
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.json.return_value = {
+            'Valute': {'USD': {'Value': 80.0, 'Nominal': 1}, 'KZT': {'Value': 17.0, 'Nominal': 100}}
+        }
+        table = RateTable(ttl=3600, url='http://rates')
+
+        assert table.convert(10, 'USD') == 800
+        assert table.convert(1000, 'KZT') == 170
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_rate_table_refresh_failure_keeps_rates(self, mock_get):
+        mock_get.side_effect = Exception("timeout")
+        table = RateTable({'USD': 90.0}, url='http://rates')
+
+        assert table.convert(1, 'USD') == 90
+
+    def test_normalize_salary_and_matches(self):
+        salary.configure({"currency_rates": {"USD": 100.0}})
+        try:
+            vacancy = normalize_salary('от 2 000 до 2 500 $')
+        finally:
+            salary.configure({})
+
+        assert vacancy['salary_from_base'] == 200000
+        assert vacancy['salary_to_base'] == 250000
+        assert salary_matches(vacancy, 250000)
+        assert not salary_matches(vacancy, 300000)
+        assert salary_matches(normalize_salary(''), 300000)
+        assert not salary_matches(normalize_salary(''), 300000, include_no_salary=False)
+        assert salary_matches(normalize_salary(''), 0, include_no_salary=False)
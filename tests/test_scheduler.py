@@ -0,0 +1,233 @@
+import pytest
+import asyncio
+import os
+import sys
+import datetime
+from datetime import timezone, timedelta
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from scheduler import Scheduler, next_stats_delay, next_reports, jittered
+
+MSK = timezone(timedelta(hours=3))
+
+class TestScheduler:
+
+    def test_next_stats_delay_today(self):
+        now = datetime.datetime(2024, 1, 15, 10, 30, 0, tzinfo=MSK)
+        assert next_stats_delay("12:00", now) == 90 * 60
+
+    def test_next_stats_delay_tomorrow(self):
+        now = datetime.datetime(2024, 1, 15, 10, 30, 0, tzinfo=MSK)
+        assert next_stats_delay("00:00", now) == 13.5 * 3600
+
+    def test_jittered_bounds(self):
+        for _ in range(100):
+            assert 540 <= jittered(600, 0.1) <= 660
+        assert jittered(600, 0) == 600
+
+    def test_searches_run_concurrently_without_overlap(self):
+        calls = []
+        running = set()
+
+        def job(db_conn, search, stop_event):
+            assert search["name"] not in running
+            running.add(search["name"])
+            calls.append(search["name"])
+            running.discard(search["name"])
+
+        searches = [
+            {"name": "a", "search_text": "a", "interval": 0.0005},
+            {"name": "b", "search_text": "b", "interval": 0.0005},
+        ]
+        scheduler = Scheduler(job, searches, {"daily_stats": False})
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.2)
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+
+        assert calls.count("a") >= 2
+        assert calls.count("b") >= 2
+
+    def test_job_error_does_not_stop_search(self):
+        job = Mock(side_effect=[Exception("boom"), None, None, None, None, None])
+        searches = [{"name": "a", "search_text": "a", "interval": 0.0005}]
+        scheduler = Scheduler(job, searches, {"daily_stats": False})
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.1)
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+
+        assert job.call_count >= 2
+
+    def test_connection_per_search_is_closed(self):
+        conn = Mock()
+        connect = Mock(return_value=conn)
+        searches = [{"name": "a", "search_text": "a", "interval": 10}]
+        scheduler = Scheduler(Mock(), searches, {"daily_stats": False}, connect)
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.05)
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+
+        connect.assert_called_once()
+        conn.close.assert_called_once()
+
+    def test_maintenance_runs_periodically(self):
+        conn = Mock()
+        connect = Mock(return_value=conn)
+        maintenance = Mock()
+        config = {"daily_stats": False, "retention_interval": 0.00001}
+        scheduler = Scheduler(Mock(), [], config, connect, None, maintenance)
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.1)
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+
+        assert maintenance.call_count >= 2
+        maintenance.assert_called_with(conn, config)
+        conn.close.assert_called_once()
+
+    def test_apply_reschedules_only_changed_search(self):
+        calls = []
+
+        def job(db_conn, search, stop_event):
+            calls.append((search["name"], search["search_text"]))
+
+        searches = [
+            {"name": "a", "search_text": "a", "interval": 10},
+            {"name": "b", "search_text": "b", "interval": 10},
+        ]
+        scheduler = Scheduler(job, searches, {"daily_stats": False})
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.05)
+            scheduler.apply({"daily_stats": False}, [
+                {"name": "a", "search_text": "a2", "interval": 0.0005},
+                {"name": "b", "search_text": "b", "interval": 10},
+                {"name": "c", "search_text": "c", "interval": 10},
+            ])
+            await asyncio.sleep(0.1)
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+
+        assert calls.count(("a", "a")) == 1
+        assert calls.count(("a", "a2")) >= 2
+        assert calls.count(("b", "b")) == 1
+        assert calls.count(("c", "c")) == 1
+
+    def test_apply_removes_search(self):
+        job = Mock()
+        searches = [{"name": "a", "search_text": "a", "interval": 0.0005}]
+        scheduler = Scheduler(job, searches, {"daily_stats": False})
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.05)
+            scheduler.apply({"daily_stats": False}, [])
+            await asyncio.sleep(0.05)
+            count = job.call_count
+            await asyncio.sleep(0.05)
+            assert job.call_count == count
+            assert "a" not in scheduler._tasks
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+
+    def test_reload_polls_config(self):
+        new_searches = [{"name": "b", "search_text": "b", "interval": 10}]
+        reload = Mock(side_effect=[None, ({"daily_stats": False}, new_searches)] + [None] * 1000)
+        job = Mock()
+        config = {"daily_stats": False, "config_poll_interval": 0.001}
+        scheduler = Scheduler(job, [], config, reload=reload)
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.1)
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+
+        assert reload.call_count >= 2
+        job.assert_called_once_with(None, new_searches[0], scheduler.stop_event)
+
+    def test_stop_event_passed_to_job(self):
+        events = []
+
+        def job(db_conn, search, stop_event):
+            events.append(stop_event)
+            scheduler.stop()
+
+        searches = [{"name": "a", "search_text": "a", "interval": 10}]
+        scheduler = Scheduler(job, searches, {"daily_stats": False})
+
+        asyncio.run(scheduler.run())
+
+        assert len(events) == 1
+        assert events[0].is_set()
+
+    @patch('scheduler.load_checkpoint')
+    def test_recent_cycle_delays_first_run(self, mock_load):
+        mock_load.return_value = {'page': 0, 'status': 'done', 'age': 60}
+        job = Mock()
+        searches = [{"name": "a", "search_text": "a", "interval": 10}]
+        scheduler = Scheduler(job, searches, {"daily_stats": False})
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.05)
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+
+        job.assert_not_called()
+
+    def test_commands_polled_until_stop(self):
+        job = Mock()
+        commands = Mock()
+        scheduler = Scheduler(job, [], {"daily_stats": False}, commands=commands)
+
+        async def run():
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.05)
+            scheduler.stop()
+            await task
+
+        asyncio.run(run())
+        assert commands.poll.call_count > 1
+
+    def test_next_reports_picks_earliest_windows(self):
+        now = datetime.datetime(2024, 1, 15, 23, 30, 0, tzinfo=MSK)  # понедельник
+        assert next_reports(["daily"], "00:00", now) == (1800, ["daily"])
+        assert next_reports(["hourly", "daily"], "00:00", now) == (1800, ["hourly", "daily"])
+        assert next_reports(["hourly", "weekly"], "00:00", now) == (1800, ["hourly"])
+
+    def test_next_reports_weekly(self):
+        now = datetime.datetime(2024, 1, 15, 10, 30, 0, tzinfo=MSK)  # понедельник
+        delay, windows = next_reports(["weekly"], "00:00", now)
+        assert windows == ["weekly"]
+        assert delay == (6 * 24 + 13.5) * 3600
+        assert next_reports(["weekly"], "12:00", now)[0] == 90 * 60
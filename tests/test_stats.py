@@ -0,0 +1,201 @@
+import pytest
+import os
+import sys
+import datetime
+from datetime import timezone, timedelta
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from stats import (
+    CycleStats, StatsEngine, create_stats_tables, format_report, record_cycle, salary_bucket, send_report
+)
+
+MSK = timezone(timedelta(hours=3))
+NOW = datetime.datetime(2024, 1, 15, 10, 30, 0, tzinfo=MSK)
+
+def _hour(day, hour):
+    return datetime.datetime(2024, 1, day, hour)
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, query, params=()):
+        self.db.queries.append(query)
+        if 'SUM(sent)' in query:
+            self.result = [(sum(row[5] for row in self.db.hourly if row[0] < params[0]),)]
+        elif 'FROM stats_hourly' in query:
+            self.result = [row for row in self.db.hourly if params[0] <= row[0] < params[1]]
+        elif 'FROM stats_buckets' in query:
+            self.result = [row for row in self.db.buckets if params[0] <= row[0] < params[1]]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+    def close(self):
+        pass
+
+class FakeDB:
+    def __init__(self, hourly, buckets):
+        self.hourly = hourly
+        self.buckets = buckets
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+def _db():
+    return FakeDB(
+        hourly=[
+            # hour, search_name, cycles, seen, matched, sent
+            (_hour(14, 9), 'python', 6, 100, 10, 3),
+            (_hour(15, 9), 'python', 6, 100, 20, 5),
+            (_hour(15, 9), 'go', 6, 50, 5, 1),
+            (_hour(1, 0), 'python', 1, 10, 1, 1),
+        ],
+        buckets=[
+            (_hour(15, 9), 'company', 'Yandex', 4),
+            (_hour(15, 9), 'company', 'Sber', 2),
+            (_hour(15, 9), 'salary', 'none', 2),
+            (_hour(15, 9), 'salary', '100000-150000', 3),
+            (_hour(15, 9), 'salary', '0-50000', 1),
+        ],
+    )
+
+class TestStats:
+
+    def test_salary_bucket(self):
+        assert salary_bucket({}) == 'none'
+        assert salary_bucket({'salary_from_base': 40000}) == '0-50000'
+        assert salary_bucket({'salary_from_base': 90000, 'salary_to_base': 120000}) == '100000-150000'
+        assert salary_bucket({'salary_to_base': 500000}) == '300000+'
+
+    def test_record_cycle_upserts_aggregates(self):
+        cycle = CycleStats('python')
+        cycle.seen = 50
+        cycle.matched = 4
+        cycle.add_sent({'company': 'Yandex', 'salary_to_base': 120000})
+        mock_conn = Mock()
+        mock_cursor = mock_conn.cursor.return_value
+
+        record_cycle(mock_conn, cycle, _hour(15, 10))
+
+        query, params = mock_cursor.execute.call_args[0]
+        assert 'ON DUPLICATE KEY UPDATE' in query
+        assert params == (_hour(15, 10), 'python', 50, 4, 1)
+        rows = mock_cursor.executemany.call_args[0][1]
+        assert (_hour(15, 10), 'python', 'company', 'Yandex', 1) in rows
+        assert (_hour(15, 10), 'python', 'salary', '100000-150000', 1) in rows
+        mock_conn.commit.assert_called_once()
+
+    def test_backfill_groups_hours_in_moscow_time(self):
+        mock_conn = Mock()
+        mock_cursor = Mock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_cursor.fetchone.return_value = None
+
+        create_stats_tables(mock_conn)
+
+        queries = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        backfill = [i for i, q in enumerate(queries) if 'FROM sent_vacancies' in q]
+        switch = queries.index("SET time_zone = '+03:00'")
+        restore = queries.index("SET time_zone = @stats_time_zone")
+        assert switch < min(backfill) and max(backfill) < restore
+
+    def test_record_cycle_no_db(self):
+        record_cycle(None, CycleStats('python'))
+
+    def test_daily_report(self):
+        report = StatsEngine().report(_db(), 'daily', NOW)
+
+        assert report['start'] == _hour(14, 10)
+        assert report['end'] == _hour(15, 10)
+        assert report['total'] == 6
+        assert report['prev_total'] == 3
+        assert report['total_all'] == 10
+        python = report['searches'][1]
+        assert python['name'] == 'python'
+        assert python['match_rate'] == 0.2
+        assert python['prev_match_rate'] == 0.1
+        assert report['top_companies'] == [('Yandex', 4), ('Sber', 2)]
+        assert [bucket for bucket, _ in report['salaries']] == ['0-50000', '100000-150000', 'none']
+
+    def test_reports_reuse_cached_hours(self):
+        db = _db()
+        engine = StatsEngine()
+
+        engine.report(db, 'weekly', NOW)
+        queries = len(db.queries)
+        daily = engine.report(db, 'daily', NOW)
+        hourly = engine.report(db, 'hourly', NOW)
+
+        assert len(db.queries) == queries
+        assert daily['total'] == 6
+        assert hourly['total'] == 6
+
+    def test_next_hour_fetches_only_new_hour(self):
+        db = _db()
+        engine = StatsEngine()
+        engine.report(db, 'daily', NOW)
+        db.hourly.append((_hour(15, 10), 'python', 6, 10, 1, 1))
+        db.queries.clear()
+
+        report = engine.report(db, 'daily', NOW + timedelta(hours=1))
+
+        assert len(db.queries) == 2
+        assert report['total'] == 7
+        assert report['total_all'] == 11
+
+    def test_report_no_db(self):
+        assert StatsEngine().report(None, 'daily') is None
+
+    @patch('stats.get_time')
+    def test_format_report_with_data(self, mock_get_time):
+        mock_get_time.return_value = NOW
+        report = StatsEngine().report(_db(), 'daily', NOW)
+
+        message = format_report(report)
+
+        assert '📊 <b>Статистика за 14.01.2024</b>' in message
+        assert '<b>Найдено:</b> 6 вакансий 📈 +3' in message
+        assert '<b>Всего в базе:</b> 10 вакансий' in message
+        assert 'python: 5 📈 +2, совпадений 20/100 (20%, было 10%)' in message
+        assert 'до 50 000: 1' in message
+        assert 'не указана: 2' in message
+        assert '1. Yandex: 4 вакансий' in message
+        assert '⏰ Отчет сгенерирован: 10:30' in message
+
+    @patch('stats.get_time')
+    def test_format_report_no_data(self, mock_get_time):
+        mock_get_time.return_value = NOW
+        report = StatsEngine().report(FakeDB([], []), 'hourly', NOW)
+
+        message = format_report(report)
+
+        assert '📊 <b>Статистика за 15.01.2024 09:00-10:00</b>' in message
+        assert '<b>Найдено:</b> 0 вакансий ➡️ 0' in message
+        assert '<i>Вакансий за период не найдено</i>' in message
+
+    def test_format_report_none(self):
+        assert format_report(None) == "❌ Не удалось собрать статистику"
+
+    @patch('requests.Session.post')
+    def test_send_report_success(self, mock_post):
+        mock_post.return_value = Mock(status_code=200)
+
+        assert send_report(StatsEngine(), _db(), 'token', 'chat123', 'weekly') == True
+        mock_post.assert_called_once()
+
+    def test_send_report_no_stats(self):
+        assert send_report(StatsEngine(), None, 'token', 'chat123', 'daily') == False
+
+    @patch('requests.Session.post')
+    def test_send_report_network_error(self, mock_post):
+        mock_post.side_effect = Exception("Network error")
+
+        assert send_report(StatsEngine(), _db(), 'token', 'chat123', 'daily') == False
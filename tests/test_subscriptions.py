@@ -0,0 +1,71 @@
+import pytest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from salary import normalize_salary
+from subscriptions import Router, Subscription, experience_code, get_router
+
+VACANCY = {
+    'title': 'Senior Python Developer',
+    'company': 'Яндекс',
+    'salary': '200 000 – 300 000 ₽ за месяц',
+    'experience': 'Опыт 3–6 лет',
+    'href': 'https://hh.ru/vacancy/1',
+    **normalize_salary('200 000 – 300 000 ₽ за месяц')
+}
+
+class TestSubscriptions:
+
+    def test_recipients_filters(self):
+        subs = [
+            Subscription('1'),
+            Subscription('2', min_salary=250000),
+            Subscription('3', min_salary=400000),
+            Subscription('4', keywords=['go', 'rust']),
+            Subscription('5', keywords=['python'], experience=['3–6']),
+            Subscription('6', excluded_companies=['яндекс']),
+            Subscription('7', searches=['other']),
+        ]
+
+        chats = [s.chat_id for s in Router(subs).recipients(VACANCY, 'python')]
+
+        assert chats == ['1', '2', '5']
+
+    @pytest.mark.parametrize("experience, chats", [
+        (['between3And6'], ['1']),
+        (['3-6'], ['1']),
+        (['noExperience', 'moreThan6'], []),
+    ])
+    def test_experience_codes(self, experience, chats):
+        subs = [Subscription('1', experience=experience)]
+
+        assert [s.chat_id for s in Router(subs).recipients(VACANCY)] == chats
+
+    @pytest.mark.parametrize("text, code", [
+        ('Опыт 1–3 года', 'between1And3'),
+        ('Опыт более 6 лет', 'moreThan6'),
+        ('Без опыта', 'noExperience'),
+        ('Опыт не требуется', 'noExperience'),
+        ('BETWEEN1AND3', 'between1And3'),
+        ('', ''),
+    ])
+    def test_experience_code(self, text, code):
+        assert experience_code(text) == code
+
+    def test_no_salary_optional(self):
+        vacancy = dict(VACANCY, salary='', **normalize_salary(''))
+        subs = [Subscription('1', min_salary=100000),
+                Subscription('2', min_salary=100000, include_no_salary=False)]
+
+        assert [s.chat_id for s in Router(subs).recipients(vacancy)] == ['1']
+
+    def test_get_router_is_cached(self):
+        config = {"subscriptions": [{"chat_id": 42, "keywords": ["python"]}]}
+
+        router = get_router(config)
+
+        assert get_router(dict(config)) is router
+        assert router.subscriptions[0].chat_id == '42'
+        assert get_router({}).recipients(VACANCY) == []
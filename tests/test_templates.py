@@ -0,0 +1,78 @@
+import pytest
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from templates import (
+    render_vacancy, vacancy_payload, digest_payloads, encode_payload, escape_markdown
+)
+
+VACANCY = {
+    'title': 'C# <Senior> & Lead',
+    'company': 'ООО "Рога и копыта"',
+    'salary': 'от 300 000 ₽',
+    'address': '',
+    'experience': '3–6 лет',
+    'href': "https://hh.ru/vacancy/123?a=1&b=2"
+}
+
+class TestTemplates:
+
+    def test_html_escapes_fields(self):
+        message = render_vacancy(VACANCY, 'html')
+
+        assert '<b>C# &lt;Senior&gt; &amp; Lead</b>' in message
+        assert 'ООО &quot;Рога и копыта&quot;' in message
+        assert "href='https://hh.ru/vacancy/123?a=1&amp;b=2'" in message
+
+    def test_html_skips_empty_optional_lines(self):
+        message = render_vacancy(VACANCY, 'html')
+
+        assert '📍' not in message
+        assert '💰 <b>Зарплата:</b> от 300 000 ₽' in message
+        assert message.endswith("Ссылка на вакансию</a>")
+
+    def test_markdown_escapes_fields(self):
+        message = render_vacancy({'title': 'Python (Django) dev.', 'company': 'A_B',
+                                  'href': 'https://hh.ru/vacancy/1'}, 'markdown')
+
+        assert '*Python \\(Django\\) dev\\.*' in message
+        assert 'A\\_B' in message
+        assert '[Ссылка на вакансию](https://hh.ru/vacancy/1)' in message
+
+    def test_escape_markdown(self):
+        assert escape_markdown('1+1=2!') == '1\\+1\\=2\\!'
+
+    def test_vacancy_payload(self):
+        payload = vacancy_payload('chat', VACANCY, 'markdown')
+        assert payload['parse_mode'] == 'MarkdownV2'
+        assert payload['chat_id'] == 'chat'
+
+    def test_unknown_format_falls_back_to_html(self):
+        assert vacancy_payload('chat', VACANCY, 'nope')['parse_mode'] == 'HTML'
+
+    def test_digest_single_message(self):
+        vacancies = [dict(VACANCY, href=f'https://hh.ru/vacancy/{i}') for i in range(3)]
+
+        payloads = digest_payloads('chat', vacancies)
+
+        assert len(payloads) == 1
+        payload, chunk = payloads[0]
+        assert 'Новые вакансии: 3' in payload['text']
+        assert payload['text'].count('•') == 3
+        assert chunk == vacancies
+
+    def test_digest_split_by_limit(self):
+        vacancies = [dict(VACANCY, href=f'https://hh.ru/vacancy/{i}') for i in range(50)]
+
+        payloads = digest_payloads('chat', vacancies, limit=1000)
+
+        assert len(payloads) > 1
+        assert all(len(p['text']) <= 1000 for p, _ in payloads)
+        assert sum(len(chunk) for _, chunk in payloads) == 50
+
+    def test_encode_payload(self):
+        body = encode_payload({'chat_id': 'c', 'text': 'Привет'})
+        assert json.loads(body.decode('utf-8')) == {'chat_id': 'c', 'text': 'Привет'}
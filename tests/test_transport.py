@@ -0,0 +1,119 @@
+import pytest
+import gzip
+import json
+import os
+import sys
+from unittest.mock import Mock
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+import ratelimit
+import transport
+from transport import RecordingTransport, ReplayTransport, redact
+from parser import parse_vacancies_from_url, send_telegram_message
+
+PAGE = """
+<div data-qa="vacancy-serp__vacancy">
+    <a data-qa="serp-item__title" href="/vacancy/123">Python Developer</a>
+</div>
+"""
+URL = 'https://hh.ru/search/vacancy?text=python&page=0'
+
+def _response(status=200, text=PAGE, url=URL, headers=None):
+    response = Mock(status_code=status, text=text, url=url, ok=status < 400)
+    response.headers = headers or {}
+    return response
+
+class TestTransport:
+
+    def _record(self, path, get=(), post=()):
+        inner = Mock()
+        inner.get.side_effect = list(get)
+        inner.post.side_effect = list(post)
+        recorder = RecordingTransport(str(path), inner)
+        return recorder
+
+    def test_redact_bot_token(self):
+        assert redact('https://api.telegram.org/bot123:ABC/sendMessage') == \
+            'https://api.telegram.org/bot<token>/sendMessage'
+
+    def test_record_writes_archive(self, tmp_path):
+        path = tmp_path / 'archive.jsonl.gz'
+        recorder = self._record(path, get=[_response(429, '', headers={'Retry-After': '30', 'X-Other': '1'})],
+                                post=[_response(200, '{"ok": true}', 'https://api.telegram.org/botT/sendMessage')])
+
+        recorder.get(URL, timeout=10)
+        recorder.post('https://api.telegram.org/botT/sendMessage', data=b'{"text": "hi"}')
+        recorder.close()
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        assert entries[0]['status'] == 429
+        assert entries[0]['headers'] == {'Retry-After': '30'}
+        assert entries[1]['url'] == 'https://api.telegram.org/bot<token>/sendMessage'
+        assert entries[1]['body'] == '{"text": "hi"}'
+
+    def test_replay_serves_recorded_responses_in_order(self, tmp_path):
+        path = tmp_path / 'archive.jsonl.gz'
+        recorder = self._record(path, get=[_response(503, 'down'), _response()])
+        recorder.get(URL)
+        recorder.get(URL)
+        recorder.close()
+
+        replay = ReplayTransport(str(path))
+
+        first = replay.get(URL)
+        assert first.status_code == 503
+        with pytest.raises(requests.HTTPError):
+            first.raise_for_status()
+        assert replay.get(URL).text == PAGE
+        assert replay.get(URL).text == PAGE
+        with pytest.raises(requests.ConnectionError):
+            replay.get('https://hh.ru/other')
+        assert replay.post('https://api.telegram.org/botX/sendMessage').ok
+        assert replay.misses == 2
+
+    def test_replay_full_fetch_and_send_path(self, tmp_path):
+        path = tmp_path / 'archive.jsonl.gz'
+        recorder = self._record(path, get=[_response()],
+                                post=[_response(400, '{"ok": false}', 'https://api.telegram.org/botT/sendMessage')])
+        recorder.get(URL)
+        recorder.post('https://api.telegram.org/botT/sendMessage')
+        recorder.close()
+
+        ratelimit.configure({"hh_rate": 1e9, "hh_burst": 1e9})
+        previous = transport.install(ReplayTransport(str(path)))
+        try:
+            vacancies = parse_vacancies_from_url(URL)
+            sent = send_telegram_message('other-token', '1', vacancies[0])
+        finally:
+            transport.install(previous)
+            ratelimit.configure({})
+
+        assert vacancies[0]['title'] == 'Python Developer'
+        assert sent is False
+
+    def test_live_transport_reuses_session_per_thread(self):
+        live = transport.LiveTransport()
+        first = live._session()
+
+        assert live._session() is first
+        live.close()
+        assert live._sessions == {}
+
+    def test_live_transport_closes_sessions_of_finished_threads(self):
+        import threading
+        live = transport.LiveTransport()
+        sessions = []
+        worker = threading.Thread(target=lambda: sessions.append(live._session()))
+        worker.start()
+        worker.join()
+        sessions[0].close = Mock()
+
+        live._session()
+
+        sessions[0].close.assert_called_once()
+        assert list(live._sessions) == [threading.current_thread()]
+        live.close()